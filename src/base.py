@@ -1,6 +1,5 @@
 from __future__ import annotations
 from abc import abstractmethod
-from copy import deepcopy
 from functools import total_ordering
 from bounded import BoundedInt
 from enum import IntEnum, StrEnum, Enum
@@ -67,7 +66,8 @@ _T_bounded_col = TypeVar("_T_bounded_col", bound=BoundedInt)
 class RCBounded(Contract, Generic[_T_bounded_row, _T_bounded_col]):
     @Contract.on
     def __init__(self, row: _T_bounded_row, col: _T_bounded_col):
-        self.check_pre(row.is_OK and col.is_OK, "row and col must be correct")
+        if not (row.is_OK and col.is_OK):
+            return self.fail_pre("row and col must be correct")
         self._row = row
         self._col = col
 
@@ -81,11 +81,10 @@ class RCBounded(Contract, Generic[_T_bounded_row, _T_bounded_col]):
 
     @Contract.on
     def from_raw(self, row: int, col: int):
-        r = deepcopy(self._row)
-        c = deepcopy(self._col)
-        r.value = row
-        c.value = col
-        self.check_pre(r.is_OK and c.is_OK, "row and col must be in range")
+        r = type(self._row).of(row)
+        c = type(self._col).of(col)
+        if not (r.is_OK and c.is_OK):
+            return self.fail_pre("row and col must be in range")
         self._row = r
         self._col = c
 
@@ -134,7 +133,7 @@ class Rect(Contract):
     def __iter__(self):
         for row in range(self._height.value):  # Добавить .value
             for col in range(self._width.value):  # Добавить .value
-                yield RC(RowInt(row), ColInt(col))
+                yield RC(RowInt.of(row), ColInt.of(col))
 
     @property
     def width(self) -> PositiveInt:
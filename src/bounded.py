@@ -1,7 +1,8 @@
 from __future__ import annotations
+from array import array
 from functools import total_ordering
-from typing import Generic, TypeVar, Literal, Union, overload, ClassVar, Optional, Type, cast
-from contract import Contract
+from typing import Generic, Iterable, TypeVar, Literal, Union, overload, ClassVar, Optional, Type, cast
+from contract import Contract, ContractStatus, ContractErrPreException
 import types
 
 import contract
@@ -11,32 +12,83 @@ T = TypeVar('T', bound=int)
 
 @total_ordering
 class BoundedInt(Generic[T], Contract):
+    """Целое в границах [min_value, max_value].
+
+    Быстрый путь: экземпляры без __dict__ (__slots__), проверка границ в конструкторе
+    и сеттере написана inline, без обертки Contract.on, -- статусы и сообщения при этом
+    те же, что выставил бы декоратор. Через of() выдаются общие неизменяемые экземпляры
+    для малых значений -- свой кэш у каждого типа; их нельзя менять через value.
+    Арифметика (+, -, *) возвращает новый изменяемый экземпляр, как конструктор."""
+    __slots__ = ("_value", "_frozen")
+
     # Параметры класса для границ значений
     min_value: int = 0
     max_value: int = 0
+    # значения с |value| <= SMALL_VALUE_LIMIT кэшируются в of()
+    SMALL_VALUE_LIMIT: ClassVar[int] = 256
+
+    MSG_INIT_OUT_OF_BOUNDS: ClassVar[str] = str(ContractErrPreException("Initial value is out of Bounds"))
+    MSG_NEW_OUT_OF_BOUNDS: ClassVar[str] = str(ContractErrPreException("New value is out of Bounds"))
     
-    @Contract.on
     def __init__(self, initial_value: int):
-        super().__init__()
+        self._frozen = False
         # Проверка значения при инициализации
-        self.check_pre(isinstance(initial_value, int) and \
-            initial_value >= self.min_value and \
-            initial_value <= self.max_value, "Initial value is out of Bounds")
-        self._value = initial_value
+        if isinstance(initial_value, int) and self.min_value <= initial_value <= self.max_value:
+            self._value = initial_value
+            self._status = ContractStatus.OK
+            self._message = "OK"
+        else:
+            self._status = ContractStatus.ERR
+            self._message = self.MSG_INIT_OUT_OF_BOUNDS
+
+    @classmethod
+    def of(cls, value: int) -> BoundedInt[T]:
+        """Экземпляр со значением value; для малых корректных значений -- общий из кэша типа."""
+        cache = cls.__dict__.get("_small_cache")
+        if cache is None:
+            cache = {}
+            setattr(cls, "_small_cache", cache)
+        instance = cache.get(value)
+        if instance is not None:
+            return instance
+        instance = cls(value)
+        if instance._status == ContractStatus.OK and -cls.SMALL_VALUE_LIMIT <= value <= cls.SMALL_VALUE_LIMIT:
+            instance._frozen = True
+            cache[value] = instance
+        return instance
+
+    @property
+    def is_frozen(self) -> bool:
+        return self._frozen
     
     @property
     def value(self) -> int:
         return self._value
     
     @value.setter
-    @Contract.on
     def value(self, new_value: int) -> None:
+        if self._frozen:
+            raise AttributeError(f"{self.__class__.__name__}({self._value}) из кэша неизменяем")
         # Проверка значения при изменении
-        self.check_pre(isinstance(new_value, int) and \
-            new_value >= self.min_value and \
-            new_value <= self.max_value, "New value is out of Bounds")
+        if isinstance(new_value, int) and self.min_value <= new_value <= self.max_value:
+            self._value = new_value
+            self._status = ContractStatus.OK
+            self._message = "OK"
+        else:
+            self._status = ContractStatus.ERR
+            self._message = self.MSG_NEW_OUT_OF_BOUNDS
 
-        self._value = new_value
+    def __copy__(self) -> BoundedInt[T]:
+        if self._frozen:
+            return self
+        ans = self.__class__.__new__(self.__class__)
+        for slot in ("_value", "_frozen", "_status", "_message"):
+            if hasattr(self, slot):
+                setattr(ans, slot, getattr(self, slot))
+        return ans
+
+    def __deepcopy__(self, memo) -> BoundedInt[T]:
+        return self.__copy__()
     
     def __str__(self) -> str:
         return str(self._value)
@@ -63,6 +115,11 @@ class BoundedInt(Generic[T], Contract):
 
     def __lt__(self, other: BoundedInt[T]) -> bool:
         return self._value < other.value
+
+    @classmethod
+    def array(cls, values: Iterable[int] = ()) -> BoundedIntArray:
+        """Массив значений этого типа, проверенный целиком (см. BoundedIntArray)."""
+        return BoundedIntArray(cls, values)
     
     # Фабричный метод для создания специализированных классов
     @classmethod
@@ -74,13 +131,102 @@ class BoundedInt(Generic[T], Contract):
         class_name = name or f"BoundedInt_{min_val}_{max_val}"
         
         new_class = types.new_class(class_name, (BoundedInt,), {}, lambda ns: ns.update({
+            '__slots__': (),
             'min_value': min_val,
-            'max_value': max_val
+            'max_value': max_val,
+            '_small_cache': {}
         }))
         
         return cast(Type[BoundedInt[T]], new_class)
 
 
+class BoundedIntArray(Contract):
+    """Пачка целых в границах типа BoundedInt, в компактном буфере array.
+
+    Границы проверяются для всей пачки сразу -- одним min/max, а не по элементу;
+    неудачная пачка не добавляется целиком (статус ERR). Элементы -- обычные int,
+    view() отдает буфер без копирования (memoryview только для чтения).
+    Код типа буфера -- самый узкий, в который влезают границы ('h' для координат поля)."""
+    TYPECODES: ClassVar[tuple] = ("b", "h", "i", "q")
+    MSG_OUT_OF_BOUNDS: ClassVar[str] = "Values are out of Bounds"
+
+    @Contract.on
+    def __init__(self, bounded_type: Type[BoundedInt], values: Iterable[int] = ()):
+        self._type = bounded_type
+        self._buffer = array(self._typecode(bounded_type))
+        self._low: Optional[int] = None
+        self._high: Optional[int] = None
+        return self._extend(values)
+
+    @staticmethod
+    def _typecode(bounded_type: Type[BoundedInt]) -> str:
+        for typecode in BoundedIntArray.TYPECODES:
+            limit = 1 << (array(typecode).itemsize * 8 - 1)
+            if -limit <= bounded_type.min_value and bounded_type.max_value < limit:
+                return typecode
+        raise ValueError(f"{bounded_type.__name__} bounds do not fit into array")
+
+    @property
+    def bounded_type(self) -> Type[BoundedInt]:
+        return self._type
+
+    @property
+    def low(self) -> Optional[int]:
+        """Наименьшее значение (None для пустого массива)."""
+        return self._low
+
+    @property
+    def high(self) -> Optional[int]:
+        """Наибольшее значение (None для пустого массива)."""
+        return self._high
+
+    @Contract.on
+    def extend(self, values: Iterable[int]) -> None:
+        """Добавляет пачку значений: все или ничего."""
+        return self._extend(values)
+
+    def _extend(self, values: Iterable[int]):
+        try:
+            batch = array(self._buffer.typecode, values)
+        except (OverflowError, TypeError):
+            return self.fail_pre(self.MSG_OUT_OF_BOUNDS)
+        if not batch:
+            return
+        low, high = min(batch), max(batch)
+        if low < self._type.min_value or high > self._type.max_value:
+            return self.fail_pre(self.MSG_OUT_OF_BOUNDS)
+        self._buffer.extend(batch)
+        self._low = low if self._low is None else min(self._low, low)
+        self._high = high if self._high is None else max(self._high, high)
+
+    def view(self, columns: Optional[int] = None) -> memoryview:
+        """Буфер без копирования, только для чтения; columns -- вид таблицей по columns в строке
+        (пустой массив остается одномерным: memoryview не умеет форму с нулем)."""
+        view = memoryview(self._buffer).toreadonly()
+        if columns is None or not self._buffer:
+            return view
+        return view.cast("B").cast(self._buffer.typecode, (len(self._buffer) // columns, columns))
+
+    def bounded(self, index: int) -> BoundedInt:
+        """Элемент как значение типа (общий экземпляр из кэша of())."""
+        return self._type.of(self._buffer[index])
+
+    def tolist(self) -> list:
+        return self._buffer.tolist()
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def __getitem__(self, index: int) -> int:
+        return self._buffer[index]
+
+    def __iter__(self):
+        return iter(self._buffer)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self._type.__name__}, {self._buffer.tolist()})"
+
+
 '''
 # Примеры использования от нейросетки
 
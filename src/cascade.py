@@ -0,0 +1,86 @@
+"""Каскад хода по частям: с бюджетом раундов или времени и продолжением.
+
+GameBoard.cascade -- генератор раундов каскада; CascadeDriver крутит его столько,
+сколько позволяет бюджет, и продолжает при следующем вызове. Сервер, ведущий много
+сессий, может двигать каскады всех сессий по очереди (run_round_robin) и не
+задерживать одного клиента чужим длинным каскадом.
+"""
+from __future__ import annotations
+from time import perf_counter
+from typing import Iterable, List, Optional
+
+from game_board import GameBoard, CascadeStep, MoveResult
+
+
+class CascadeDriver:
+    """Ведет каскад одного поля.
+
+    run выполняет раунды, пока каскад не кончится или не исчерпан бюджет
+    (max_steps раундов и/или time_budget секунд; хотя бы один раунд за вызов выполняется всегда).
+    Если на поле начат ход (GameBoard.begin_move), по окончании каскада ход принимается
+    и его итог доступен в result."""
+
+    def __init__(self, game_board: GameBoard):
+        self._game_board = game_board
+        self._cascade = game_board.cascade()
+        self._steps: List[CascadeStep] = []
+        self._done = False
+        self._result: Optional[MoveResult] = None
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    @property
+    def steps(self) -> List[CascadeStep]:
+        """Все выполненные раунды по порядку."""
+        return list(self._steps)
+
+    @property
+    def result(self) -> Optional[MoveResult]:
+        """Итог хода после окончания каскада (если каскад шел внутри хода)."""
+        return self._result
+
+    def run(self, max_steps: Optional[int] = None, time_budget: Optional[float] = None) -> List[CascadeStep]:
+        """Выполняет раунды в пределах бюджета; возвращает раунды этого вызова."""
+        steps: List[CascadeStep] = []
+        if self._done:
+            return steps
+        deadline = None if time_budget is None else perf_counter() + time_budget
+        while True:
+            step = next(self._cascade, None)
+            if step is None:
+                self._finish()
+                break
+            steps.append(step)
+            if max_steps is not None and len(steps) >= max_steps:
+                break
+            if deadline is not None and perf_counter() >= deadline:
+                break
+        self._steps.extend(steps)
+        return steps
+
+    def run_to_completion(self) -> List[CascadeStep]:
+        """Выполняет каскад до конца."""
+        return self.run()
+
+    def _finish(self) -> None:
+        self._done = True
+        if self._game_board.in_move:
+            self._result = self._game_board.end_move()
+
+
+def run_round_robin(drivers: Iterable[CascadeDriver], steps_per_turn: int = 1,
+                    time_budget: Optional[float] = None) -> int:
+    """Один проход по каскадам: каждому незаконченному -- до steps_per_turn раундов.
+    time_budget ограничивает весь проход (незатронутые каскады подождут следующего).
+    Возвращает, сколько каскадов еще не закончено."""
+    deadline = None if time_budget is None else perf_counter() + time_budget
+    pending = 0
+    for driver in drivers:
+        if driver.done:
+            continue
+        if deadline is None or perf_counter() < deadline:
+            driver.run(max_steps=steps_per_turn)
+        pending += not driver.done
+    return pending
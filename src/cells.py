@@ -1,5 +1,6 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
+from copy import copy
 import random
 from typing import TypedDict, Dict
 from contract import Contract
@@ -8,6 +9,12 @@ from base import (
     WIDTH, HEIGHT, Bonus, RC, Rect, R, C, 
     MAIN_RECT, MAIN_RECT_RAW, StoneFull
 )
+from combinations import Mask, BitMask
+
+# коды ячеек в байтовом представлении поля: 0 -- пустая, i + 1 -- камень STONES[i]
+STONES = tuple(Stone)
+STONE_CODES: Dict[str, int] = {NonStoneValues.EMPTY.value: 0}
+STONE_CODES.update({stone.value: i + 1 for i, stone in enumerate(STONES)})
 
 # === ИНТЕРФЕЙСЫ ===
 
@@ -58,6 +65,30 @@ class ICells(Contract):
         """
         pass
 
+    @abstractmethod
+    def erase_many(self, mask: Mask) -> None:
+        """Стирает все ячейки маски за один проход.
+        Предусловие: все ячейки маски в пределах поля (проверяется один раз для всей маски)
+        Постусловие: все ячейки маски равны NonStoneValues.EMPTY
+        """
+        pass
+
+    @abstractmethod
+    def set_many(self, mask: Mask, stone: StoneFull) -> None:
+        """Записывает камень во все ячейки маски за один проход.
+        Предусловие: все ячейки маски в пределах поля
+        Постусловие: все ячейки маски равны stone
+        """
+        pass
+
+    @abstractmethod
+    def copy_region(self, source: ICells, mask: Mask) -> None:
+        """Копирует ячейки маски из source (поле того же размера).
+        Предусловие: размеры полей совпадают, все ячейки маски в пределах поля
+        Постусловие: ячейки маски совпадают с source
+        """
+        pass
+
 
 class IBonusChest(ABC):
     """Интерфейс для отслеживания бонусов."""
@@ -150,11 +181,20 @@ class Cells(ICells):
     """Класс для управления ячейками игрового поля.
     
     Инвариант: все координаты находятся в пределах rect
+
+    Кроме строк значений поле хранит байтовые буферы (индекс row * width + col, строка 0 -- нижняя):
+    коды камней (STONE_CODES) и one-hot плоскости по STONES. Они обновляются при каждой записи,
+    наружу отдаются только для чтения и без копирования (codes_view, one_hot_view, буферный протокол).
     """
     @Contract.on
     def __init__(self, rect: Rect = MAIN_RECT):
         self.check_pre(rect.is_OK, "rect is BAD")
         self._rect = rect
+        size = rect.width.value * rect.height.value
+        self._codes = bytearray(size)
+        self._planes = bytearray(len(STONES) * size)
+        self._buffers_owned = True
+        self._views = None
         self.clear()
 
     @property
@@ -171,23 +211,65 @@ class Cells(ICells):
 
     @Contract.on
     def __getitem__(self, rc: RC) -> Stone:
-        self.check_pre(rc.is_OK, "rc is BAD")
-        cond = rc in self._rect
-        self.check_pre(cond, "Координаты должны быть в пределах поля")
-        ans = self._cells[rc.row.value][rc.col.value]
-        return ans
+        # чтение -- горячий путь перебора ходов, неудача проверки здесь без исключений
+        if not rc.is_OK:
+            return self.fail_pre("rc is BAD")
+        if rc not in self._rect:
+            return self.fail_pre("Координаты должны быть в пределах поля")
+        return self._cells[rc.row.value][rc.col.value]
 
     @Contract.on
     def __setitem__(self, rc: RC, stone: Stone) -> None:
-        self.check_pre(rc.is_OK, "rc is BAD")
-        self.check_pre(rc in self._rect, "Координаты должны быть в пределах поля")
-        old_stone = self._cells[rc.row.value][rc.col.value]
-        self._cells[rc.row.value][rc.col.value] = stone
+        if not rc.is_OK:
+            return self.fail_pre("rc is BAD")
+        if rc not in self._rect:
+            return self.fail_pre("Координаты должны быть в пределах поля")
+        row = self._own_row(rc.row.value)
+        row[rc.col.value] = stone
+        self._set_code(rc.row.value * self.width.value + rc.col.value, stone)
         self.check_post(self._cells[rc.row.value][rc.col.value] == stone, "Камень должен быть установлен")
         
     @Contract.on
     def clear(self) -> None:
         self._cells = [[NonStoneValues.EMPTY for _ in range(self.width.value)] for _ in range(self.height.value)]
+        self._row_owned = [True] * self.height.value
+        # буферы обнуляются на месте: выданные ранее представления остаются действительными
+        self._own_buffers()
+        self._codes[:] = bytes(len(self._codes))
+        self._planes[:] = bytes(len(self._planes))
+
+    # === КОПИРОВАНИЕ ПРИ ЗАПИСИ ===
+    # после fork строки общие у обеих копий; строка копируется при первой записи в нее.
+    # Байтовые буферы так же общие и копируются целиком при первой записи -- пока ни одна копия
+    # не выдала на них представлений (представления всегда смотрят на собственные буферы поля)
+    def _own_row(self, row: int) -> list:
+        if not self._row_owned[row]:
+            self._cells[row] = list(self._cells[row])
+            self._row_owned[row] = True
+        return self._cells[row]
+
+    def _own_buffers(self) -> None:
+        if not self._buffers_owned:
+            self._codes = bytearray(self._codes)
+            self._planes = bytearray(self._planes)
+            self._buffers_owned = True
+
+    def fork(self) -> Cells:
+        """Дешевая копия: O(высоты) вместо O(клеток), строки и байтовые буферы копируются только при записи.
+        Если на буферы оригинала уже выданы представления, копия сразу получает свои буферы:
+        оригинал пишет в те, на которые смотрят его представления."""
+        other = copy(self)
+        other._cells = list(self._cells)
+        other._views = None
+        if self._views is not None:
+            other._codes = bytearray(self._codes)
+            other._planes = bytearray(self._planes)
+        else:
+            self._buffers_owned = False
+            other._buffers_owned = False
+        self._row_owned = [False] * self.height.value
+        other._row_owned = [False] * self.height.value
+        return other
 
     @Contract.on
     def erase_rc(self, rc: RC) -> None:
@@ -196,18 +278,135 @@ class Cells(ICells):
         self[rc] = NonStoneValues.EMPTY
         self.check_post(self[rc] == NonStoneValues.EMPTY, "Ячейка должна быть пустой")
     
+    # === МАССОВЫЕ ОПЕРАЦИИ ===
+    # маска один раз переводится в битовое множество (бит row * width + col) и проверяется целиком,
+    # дальше запись идет по строкам: каждая затронутая строка берется во владение один раз
+    def _mask_bits(self, mask: Mask) -> int:
+        bitmask = BitMask.from_mask(mask, self._rect)
+        self.check_pre(bitmask is mask or len(bitmask) == len(mask), "Координаты должны быть в пределах поля")
+        return bitmask.bits
+
+    def _check_bits(self, bits: int) -> None:
+        w, h = self.width.value, self.height.value
+        self.check_pre(bits >= 0 and bits >> (w * h) == 0, "Координаты должны быть в пределах поля")
+
+    def _write_bits(self, bits: int, value: StoneFull, source: Cells | None = None) -> None:
+        """Запись по битовому множеству: value или (если задан source) значения из source."""
+        w = self.width.value
+        row_full = (1 << w) - 1
+        if bits:
+            self._own_buffers()
+        codes, planes, size = self._codes, self._planes, len(self._codes)
+        row = 0
+        while bits:
+            row_bits = bits & row_full
+            if row_bits:
+                cells_row = self._own_row(row)
+                source_row = source._cells[row] if source is not None else None
+                while row_bits:
+                    low = row_bits & -row_bits
+                    col = low.bit_length() - 1
+                    cell_value = value if source_row is None else source_row[col]
+                    cells_row[col] = cell_value
+                    # то же, что _set_code, без вызова метода на каждую ячейку
+                    index = row * w + col
+                    old, new = codes[index], STONE_CODES[cell_value]
+                    if old != new:
+                        if old:
+                            planes[(old - 1) * size + index] = 0
+                        if new:
+                            planes[(new - 1) * size + index] = 1
+                        codes[index] = new
+                    row_bits ^= low
+            bits >>= w
+            row += 1
+
+    @Contract.on
+    def erase_bits(self, bits: int) -> None:
+        """Стирает все ячейки битового множества (бит row * width + col) за один проход.
+        Предусловие: все биты в пределах поля -- проверяется один раз для всего множества."""
+        self._check_bits(bits)
+        self._write_bits(bits, NonStoneValues.EMPTY)
+
+    @Contract.on
+    def erase_many(self, mask: Mask) -> None:
+        self._write_bits(self._mask_bits(mask), NonStoneValues.EMPTY)
+
+    @Contract.on
+    def set_many(self, mask: Mask, stone: StoneFull) -> None:
+        self.check_pre(stone in StoneFull, "Неверное значение камня")
+        self._write_bits(self._mask_bits(mask), stone)
+
+    @Contract.on
+    def copy_region(self, source: Cells, mask: Mask) -> None:
+        self.check_pre(source.width.value == self.width.value and source.height.value == self.height.value,
+                       "Размеры полей должны совпадать")
+        self._write_bits(self._mask_bits(mask), NonStoneValues.EMPTY, source)
+
     @Contract.on
     def from_raw(self, stone_strings: list[str]):
         h = self.height.value
         w = self.width.value
-        # проверили размеры
-        self.check_pre(len(stone_strings) == h, "Неверное количество строк")
-        self.check_pre(all(len(stone_strings[i]) == w for i in range(h)), "Неверная длина строк")
-        self.check_pre(all(stone_strings[i][j] in StoneFull for i in range(h) for j in range(w)),\
-                       "Неверные значения символов в строках")
+        # проверили размеры до записи: при ошибке поле (и выданные представления) не меняется
+        if len(stone_strings) != h:
+            return self.fail_pre("Неверное количество строк")
+        if not all(len(stone_strings[i]) == w for i in range(h)):
+            return self.fail_pre("Неверная длина строк")
+        if not all(stone_strings[i][j] in StoneFull for i in range(h) for j in range(w)):
+            return self.fail_pre("Неверные значения символов в строках")
         for row in range(h):
+            cells_row = self._own_row(row)
             for col in range(w):
-                self._cells[row][col] = stone_strings[row][col]
+                cells_row[col] = stone_strings[row][col]
+                self._set_code(row * w + col, stone_strings[row][col])
+
+    # === БАЙТОВОЕ ПРЕДСТАВЛЕНИЕ ===
+    def _set_code(self, index: int, value: str) -> None:
+        """Обновляет код ячейки index и one-hot плоскости (без проверок, для внутренних индексов)."""
+        old, new = self._codes[index], STONE_CODES[value]
+        if old == new:
+            return
+        self._own_buffers()
+        size = len(self._codes)
+        if old:
+            self._planes[(old - 1) * size + index] = 0
+        if new:
+            self._planes[(new - 1) * size + index] = 1
+        self._codes[index] = new
+
+    def _buffer_views(self) -> tuple:
+        if self._views is None:
+            self._own_buffers()
+            h, w = self.height.value, self.width.value
+            self._views = (memoryview(self._codes).toreadonly().cast("B", (h, w)),
+                           memoryview(self._planes).toreadonly().cast("B", (len(STONES), h, w)))
+        return self._views
+
+    def codes_view(self) -> memoryview:
+        """Коды камней (STONE_CODES), uint8 формы (height, width), строка 0 -- нижняя.
+        Только для чтения, без копирования: представление видит последующие изменения поля."""
+        return self._buffer_views()[0]
+
+    def one_hot_view(self) -> memoryview:
+        """One-hot плоскости камней, uint8 формы (len(STONES), height, width): плоскость i -- камень STONES[i].
+        Только для чтения, без копирования, как codes_view."""
+        return self._buffer_views()[1]
+
+    def __buffer__(self, flags: int) -> memoryview:
+        """Буферный протокол (Python 3.12+): memoryview(cells), numpy.asarray(cells) и т. п. -- коды камней."""
+        return self.codes_view()
+
+    def row_values(self, row: int) -> tuple:
+        """Значения строки row слева направо (без проверок, для внутренних индексов поля)."""
+        return tuple(self._cells[row])
+
+    def col_values(self, col: int) -> tuple:
+        """Значения столбца col снизу вверх (без проверок, для внутренних индексов поля)."""
+        return tuple(cells_row[col] for cells_row in self._cells)
+
+    def to_raw(self) -> list[str]:
+        """Обратная к from_raw операция: список строк поля снизу вверх."""
+        return ["".join(row) for row in self._cells]
     
     def __str__(self) -> str:
         w = self._rect.width.value
@@ -238,12 +437,14 @@ class BonusChest(IBonusChest, Contract):
     @Contract.on
     def use_bonus(self, bonus: Bonus) -> None:
         self.check_pre(self._di[bonus] > 0, "Нельзя использовать бонус, которого нет")
+        self._own()
         old_count = self._di[bonus]
         self._di[bonus] -= 1
         self.check_post(self._di[bonus] == old_count - 1, "Количество бонусов должно уменьшиться на 1")
         
     @Contract.on
     def add_bonus(self, bonus: Bonus) -> None:
+        self._own()
         old_count = self._di[bonus]
         self._di[bonus] += 1
         self.check_post(self._di[bonus] == old_count + 1, "Количество бонусов должно увеличиться на 1")
@@ -251,9 +452,29 @@ class BonusChest(IBonusChest, Contract):
     @Contract.on
     def reset(self) -> None:
         self._di: TypedDict[Bonus, PositiveInt] = {bonus: 0 for bonus in Bonus}
+        self._di_owned = True
         self.check_post(all(count == 0 for count in self._di.values()), 
                        "Все бонусы должны быть сброшены до нуля")
         
+    def _own(self) -> None:
+        """Копирование при записи: словарь после fork общий до первого изменения."""
+        if not self._di_owned:
+            self._di = dict(self._di)
+            self._di_owned = True
+
+    def fork(self) -> BonusChest:
+        """Дешевая копия сундука: словарь копируется только при записи."""
+        other = copy(self)
+        self._di_owned = False
+        other._di_owned = False
+        return other
+
+    def restore(self, snapshot: BonusChest) -> None:
+        """Возвращает содержимое снимка (снимок -- fork этого сундука)."""
+        self._di = snapshot._di
+        self._di_owned = False
+        snapshot._di_owned = False
+
     def __repr__(self) -> str:
         return str(self)
     
@@ -291,6 +512,17 @@ class Statistics(IStatistics, Contract):
     def increase_scores(self, count: PositiveInt) -> None:
         """Увеличивает количество очков."""
         self._scores = self._scores + count
+
+    def fork(self) -> Statistics:
+        """Дешевая копия статистики: очки не изменяются на месте, сундук -- копия при записи."""
+        other = copy(self)
+        other._used_bonus_chest = self._used_bonus_chest.fork()
+        return other
+
+    def restore(self, snapshot: Statistics) -> None:
+        """Возвращает счетчики снимка (снимок -- fork этой статистики)."""
+        self._scores = snapshot._scores
+        self._used_bonus_chest.restore(snapshot._used_bonus_chest)
     
     # === ЗАПРОСЫ ===
     @Contract.on
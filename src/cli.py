@@ -1,12 +1,13 @@
 from __future__ import annotations
-from typing import List
+from typing import Dict, List, Tuple
 from contract import Contract
 from base import Printer
 from simple_game import SimpleGame
+from renderer import BoardRenderer
 from commands import (
     Command, GameCommand, EraseAllCommand, AutoSwapCommand,
     SwapCommand, EraseRowCommand, EraseColCommand, SwapBonusCommand,
-    EraseCrossCommand, ShuffleCommand, RestartCommand, BrushCommand
+    EraseCrossCommand, ShuffleCommand, RestartCommand, BrushCommand, HintsCommand
 )
 
 CLIArgs = List[str]
@@ -75,6 +76,7 @@ class CLIBase:
     MSG_HELP_COMMAND = "  Показать справку: help (h, ?)"
     MSG_EXIT_COMMAND = "  Выйти из игры: exit (quit, q)"
     MSG_INVALID_COMMAND = "Неверный формат команды. Введите 'help' для справки."
+    MSG_BOARD = "Board"
     
     # Словарь алиасов команд
     COMMAND_ALIASES = {
@@ -89,6 +91,7 @@ class CLIBase:
         'b': 'brush',
         'sw': 'switch',
         'a': 'auto_swap',
+        'hi': 'hints',
         # Алиасы для встроенных команд CLI
         'h': 'help',
         '?': 'help',
@@ -106,7 +109,8 @@ class CLIBase:
         'erase_cross': EraseCrossCommand(),
         'shuffle': ShuffleCommand(),
         'brush': BrushCommand(),
-        'restart': RestartCommand()        
+        'restart': RestartCommand(),
+        'hints': HintsCommand()
     }
  
     CLI_COMMANDS = {
@@ -118,49 +122,96 @@ class CLIBase:
 class GameCLI(Contract, CLIBase):
     """Интерфейс командной строки для игры."""
     
-    def __init__(self, game: SimpleGame) -> None:
+    def __init__(self, game: SimpleGame, renderer: BoardRenderer | None = None) -> None:
         super().__init__()
         self._is_running = True
         self._game: SimpleGame = game
+        self._renderer = renderer if renderer is not None else BoardRenderer()
+        self._rect = game._game_board._board.rect
+        self._game.set_step_listener(self._render_step)
     
+    # отрисовка: игра сама ничего не печатает
+    def _render(self, title: str) -> None:
+        """Кадр: заголовок и вся игра (поле, сундук, статистика)."""
+        self._renderer.render(title + "\n" + str(self._game))
+
+    def _render_step(self, step: str, board: 'Board') -> None:
+        """Печать промежуточного шага поля (если включена печать подшагов)."""
+        if Printer.is_steps_on():
+            self._render(step)
+
+    def _render_move(self) -> None:
+        """Печать поля после хода (если включена печать поля)."""
+        if Printer.is_board_on():
+            self._render(self.MSG_BOARD)
+
     def stop(self):
         self._is_running = False
+        self._renderer.close()
     
     def _resolve_command_name(self, command_name: str) -> str:
         """Преобразует алиас в полное имя команды."""
         return self.COMMAND_ALIASES.get(command_name, command_name)
+
+    @classmethod
+    def _dispatch_table(cls) -> Dict[str, Tuple[str, Command, bool]]:
+        """Таблица разбора, собирается один раз на класс:
+        имя или алиас -> (полное имя, команда, игровая ли команда)."""
+        table = cls.__dict__.get("_DISPATCH")
+        if table is None:
+            table = {}
+            for commands, is_game in ((cls.CLI_COMMANDS, False), (cls.GAME_COMMANDS, True)):
+                for name, command in commands.items():
+                    table[name] = (name, command, is_game)
+            for alias, name in cls.COMMAND_ALIASES.items():
+                if name in table:
+                    table[alias] = table[name]
+            cls._DISPATCH = table
+        return table
     
     @Contract.on
     def execute(self, command_line: str) -> None:
         """Выполняет команду из строки."""
-        parts = command_line.strip().split()
-        self.check_pre(len(parts) > 0, self.MSG_INVALID_COMMAND)
+        parts = command_line.split()
+        if not parts:
+            return self.fail_pre(self.MSG_INVALID_COMMAND)
         
-        command_name = parts[0].lower()
+        command_name = parts[0]
         args = parts[1:]
         
-        # Преобразуем алиас в полное имя команды
-        resolved_name = self._resolve_command_name(command_name)
+        # одно обращение к таблице; к нижнему регистру приводим только при промахе
+        table = self._dispatch_table()
+        entry = table.get(command_name)
+        if entry is None:
+            entry = table.get(command_name.lower())
+        if entry is None:
+            print(self.MSG_UNKNOWN_COMMAND.format(command_name.lower()))
+            return
+        resolved_name, command, is_game = entry
         
         # Проверяем CLI команды
-        if resolved_name in self.CLI_COMMANDS:
-            cli_command = self.CLI_COMMANDS[resolved_name]
+        if not is_game:
+            cli_command = command
             cli_command.deserialize(args)
-            self.check_pre(cli_command.is_OK, self.MSG_SERIALIZATION_ERROR.format(resolved_name,args))
+            if not cli_command.is_OK:
+                return self.fail_pre(self.MSG_SERIALIZATION_ERROR.format(resolved_name,args))
             self.accept(cli_command)
             return
         
-        # Проверяем игровые команды
-        if resolved_name in self.GAME_COMMANDS:
-            game_command: Command = self.GAME_COMMANDS[resolved_name]
-            game_command.deserialize(args)
-            self.check_pre(game_command.is_OK, self.MSG_SERIALIZATION_ERROR.format(resolved_name,args))
-            self._game.accept(game_command)
-            if not self._game.is_OK:
-                print(self._game.message)
+        # Игровые команды: координаты разбираются и проверяются по полю один раз
+        game_command: Command = command
+        game_command.deserialize(args, self._rect)
+        if not game_command.is_OK:
+            return self.fail_pre(self.MSG_SERIALIZATION_ERROR.format(resolved_name,args))
+        last_result = self._game.last_result
+        self._game.accept(game_command)
+        # статус игры -- итог последнего хода: после подсказок он прежний, печатать его нельзя
+        if not game_command.IS_MOVE:
             return
-        
-        print(self.MSG_UNKNOWN_COMMAND.format(command_name))
+        if not self._game.is_OK:
+            print(self._game.message)
+        elif self._game.last_result is not last_result:
+            self._render_move()
     
     def accept(self, command: CLICommand) -> None:
         """Принять команду."""
@@ -168,15 +219,17 @@ class GameCLI(Contract, CLIBase):
     
     def run_interactive(self) -> None:
         """Запускает интерактивный режим."""
+        self._render(self.MSG_BOARD)
         print(self.MSG_WELCOME)
-        print(self._game)
         while self._is_running:
             command_line = input("> ")
             self.execute(command_line)
+            if self.is_ERR:
+                print(self.message)
             if self._game.is_gameover:
+                self._render(self.MSG_GAME_OVER)
                 print(self.MSG_GAME_OVER)
-                print(self._game)
-                self._is_running = False
+                self.stop()
                 input("Нажмите Enter для выхода")
                 
             
@@ -1,8 +1,10 @@
 from enum import StrEnum
-from typing import TypedDict, List, Tuple, Dict, Sequence, Collection, Set
+import random
+from typing import TypedDict, List, Tuple, Dict, Sequence, Collection, Set, Callable, Iterable, Optional
 from copy import deepcopy
 from contract import Contract
-from base import HEIGHT, WIDTH, PositiveInt, RowInt, ColInt, ColIntExt, RowIntExt, Bonus, EraseMaskBonus, Rect, MAIN_RECT, RC, RCExt, TupleInt2, MAIN_RECT_RAW
+from bounded import BoundedIntArray
+from base import HEIGHT, WIDTH, PositiveInt, RowInt, ColInt, ColIntExt, RowIntExt, Bonus, EraseMaskBonus, Rect, MAIN_RECT, RC, RCExt, TupleInt2, MAIN_RECT_RAW, NonStoneValues, Stone
 
 # === ВСПОМОГАТЕЛЬНЫЕ КЛАССЫ ===
 RCExtCollection = Collection[RCExt]
@@ -39,8 +41,19 @@ class Mask(Contract):
         return self
         
     def from_raw(self, pivot_raw: TupleInt2, mask_raw: MaskRaw):
-        rc_pivot = RC(RowIntExt(pivot_raw[0]),ColIntExt(pivot_raw[1]))
-        rc_ext_collection = [RCExt(RowIntExt(tuple_int2[0]), ColIntExt(tuple_int2[1])) for tuple_int2 in mask_raw]
+        offsets = mask_offsets(mask_raw)
+        if offsets is not None:
+            # смещения проверены пачкой: дальше только сдвиг и отсечение по полю
+            rows, cols = offsets
+            pivot_row, pivot_col = pivot_raw
+            height, width = self._rect.height.value, self._rect.width.value
+            self._rc_set = {RC(RowInt.of(pivot_row + d_row), ColInt.of(pivot_col + d_col))
+                            for d_row, d_col in zip(rows, cols)
+                            if 0 <= pivot_row + d_row < height and 0 <= pivot_col + d_col < width}
+            return self
+        rc_pivot = RC(RowIntExt.of(pivot_raw[0]),ColIntExt.of(pivot_raw[1]))
+        # генераторы, а не списки: промежуточные RCExt не копятся в памяти
+        rc_ext_collection = (RCExt(RowIntExt.of(tuple_int2[0]), ColIntExt.of(tuple_int2[1])) for tuple_int2 in mask_raw)
         rc_ext_collection = filter(lambda rc_ext: rc_ext.is_OK, rc_ext_collection)
         self._rc_set = set(\
             filter(\
@@ -54,6 +67,143 @@ class Mask(Contract):
         
     def __str__(self):
         return " ".join(str(rc.raw_repr) for rc in self)
+
+
+class LazyMask(Mask):
+    """Маска-представление: ячейки выдаются генератором source по требованию.
+    Множество строится только при необходимости (по умолчанию -- для len и in),
+    а если заданы contains и length, то и они работают без материализации.
+    Предполагается только чтение; изменяющие методы Mask сначала материализуют множество."""
+    def __init__(self, source: Callable[[], Iterable[RC]],
+                 contains: Optional[Callable[[RC], bool]] = None,
+                 length: Optional[Callable[[], int]] = None):
+        Contract.__init__(self)
+        self._rect = MAIN_RECT
+        self._source = source
+        self._contains = contains
+        self._length = length
+        self._materialized: Optional[RCSet] = None
+
+    @property
+    def _rc_set(self) -> RCSet:
+        if self._materialized is None:
+            self._materialized = set(self._source())
+        return self._materialized
+
+    @_rc_set.setter
+    def _rc_set(self, rc_set: RCSet) -> None:
+        self._materialized = set(rc_set)
+        self._contains = None
+        self._length = None
+
+    @property
+    def is_materialized(self) -> bool:
+        return self._materialized is not None
+
+    def __len__(self):
+        if self._materialized is None and self._length is not None:
+            return self._length()
+        return len(self._rc_set)
+
+    def __contains__(self, rc: RC) -> bool:
+        if self._materialized is None and self._contains is not None:
+            return self._contains(rc)
+        return rc in self._rc_set
+
+    def __iter__(self):
+        if self._materialized is None:
+            return iter(self._source())
+        return iter(self._materialized)
+
+
+class BitMask(Mask):
+    """Маска на целочисленном битовом множестве размера Rect: ячейке (row, col)
+    соответствует бит row * width + col. Объединение, пересечение и разность --
+    одна операция над int, длина -- popcount, перебор -- только по поднятым битам."""
+    def __init__(self, bits: int = 0, rect: Rect = MAIN_RECT):
+        Contract.__init__(self)
+        self._rect = rect
+        self._width = rect.width.value
+        self._full = (1 << (rect.width.value * rect.height.value)) - 1
+        self._bits = bits & self._full
+
+    @classmethod
+    def from_rcs(cls, rcs: Iterable[RC], rect: Rect = MAIN_RECT) -> "BitMask":
+        w = rect.width.value
+        bits = 0
+        for rc in rcs:
+            if rc.is_OK and rc in rect:
+                bits |= 1 << (rc.row.value * w + rc.col.value)
+        return cls(bits, rect)
+
+    @classmethod
+    def from_mask(cls, mask: Mask, rect: Rect = MAIN_RECT) -> "BitMask":
+        if isinstance(mask, BitMask) and mask._rect is rect:
+            return mask
+        return cls.from_rcs(mask, rect)
+
+    @property
+    def bits(self) -> int:
+        return self._bits
+
+    @property
+    def popcount(self) -> int:
+        return self._bits.bit_count()
+
+    def _index(self, rc: RC) -> int:
+        return rc.row.value * self._width + rc.col.value
+
+    @property
+    def _rc_set(self) -> RCSet:
+        return set(self)
+
+    @_rc_set.setter
+    def _rc_set(self, rc_set: RCSet) -> None:
+        self._bits = BitMask.from_rcs(rc_set, self._rect).bits
+
+    def __len__(self):
+        return self._bits.bit_count()
+
+    def __contains__(self, rc: RC) -> bool:
+        return rc in self._rect and bool(self._bits >> self._index(rc) & 1)
+
+    def __iter__(self):
+        bits = self._bits
+        w = self._width
+        while bits:
+            low = bits & -bits
+            index = low.bit_length() - 1
+            yield RC(RowInt.of(index // w), ColInt.of(index % w))
+            bits ^= low
+
+    def _other_bits(self, other: Mask) -> int:
+        return BitMask.from_mask(other, self._rect).bits
+
+    def __or__(self, other: Mask) -> "BitMask":
+        return BitMask(self._bits | self._other_bits(other), self._rect)
+
+    def __and__(self, other: Mask) -> "BitMask":
+        return BitMask(self._bits & self._other_bits(other), self._rect)
+
+    def __sub__(self, other: Mask) -> "BitMask":
+        return BitMask(self._bits & ~self._other_bits(other), self._rect)
+
+    def union(self, other: Mask) -> "BitMask":
+        return self | other
+
+    def intersection(self, other: Mask) -> "BitMask":
+        return self & other
+
+    def difference(self, other: Mask) -> "BitMask":
+        return self - other
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, BitMask):
+            return self._bits == other._bits and self._width == other._width
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((self._bits, self._width))
         
 COMBINATIONS: Dict[str, MaskRaw] = {
     "T1": ((-2, 0), (-1, 0), (0,0), (1, 0), (2,0), (0,1), (0,2)),
@@ -72,6 +222,53 @@ COMBINATIONS: Dict[str, MaskRaw] = {
     "FIVE_2": ((0, -1), (0, 0), (0, 1), (0, 2), (0, 3))
 }
 
+# смещения масок пачками: строки -- в границах RowIntExt, столбцы -- в границах ColIntExt,
+# проверка -- один min/max на пачку; для COMBINATIONS и ERASE_BONUS_MASKS пачки готовятся при загрузке
+OffsetArrays = Tuple[BoundedIntArray, BoundedIntArray]
+_MASK_OFFSETS: Dict[int, Tuple[MaskRaw, OffsetArrays]] = {}
+
+def _offset_arrays(mask_raw: MaskRaw) -> OffsetArrays:
+    return RowIntExt.array(d_row for d_row, _ in mask_raw), ColIntExt.array(d_col for _, d_col in mask_raw)
+
+def mask_offsets(mask_raw: MaskRaw) -> Optional[OffsetArrays]:
+    """Смещения маски, проверенные пачкой; None, если хоть одно вне границ."""
+    cached = _MASK_OFFSETS.get(id(mask_raw))
+    if cached is not None and cached[0] is mask_raw:
+        return cached[1]
+    rows, cols = _offset_arrays(mask_raw)
+    return (rows, cols) if rows.is_OK and cols.is_OK else None
+
+def _register_offsets(mask_raw: MaskRaw) -> None:
+    rows, cols = _offset_arrays(mask_raw)
+    if not (rows.is_OK and cols.is_OK):
+        raise ValueError(f"Смещения маски {mask_raw} вне границ")
+    _MASK_OFFSETS[id(mask_raw)] = (mask_raw, (rows, cols))
+
+for _combination in COMBINATIONS.values():
+    _register_offsets(_combination)
+
+# Серии одинаковых камней от ячейки: (влево, вправо, вниз, вверх), саму ячейку не считаем.
+# Вниз -- к строке 0, вверх -- к большим номерам строк.
+RunLengths = Tuple[int, int, int, int]
+
+def combination_runs(combination: MaskRaw) -> RunLengths:
+    """Какие серии нужны опорной ячейке, чтобы в ней была комбинация.
+    Каждая комбинация -- "звезда" из отрезков, выходящих из опорной ячейки по строке и столбцу,
+    поэтому она целиком задается длинами четырех лучей."""
+    cells = set(combination)
+    runs = [0, 0, 0, 0]
+    for d_row, d_col in combination:
+        if d_row != 0 and d_col != 0:
+            raise ValueError(f"Комбинация {combination} не лежит на строке и столбце опорной ячейки")
+        for i, (step, along) in enumerate(((-1, d_col), (1, d_col), (-1, d_row), (1, d_row))):
+            if along * step > 0:
+                runs[i] = max(runs[i], along * step)
+    # лучи должны быть сплошными, иначе серий недостаточно
+    for length, (d_row, d_col) in zip(runs, ((0, -1), (0, 1), (-1, 0), (1, 0))):
+        if any((d_row * k, d_col * k) not in cells for k in range(1, length + 1)):
+            raise ValueError(f"Комбинация {combination} с разрывом")
+    return tuple(runs)
+
 ERASE_BONUS_MASKS: Dict[EraseMaskBonus, MaskRaw] = {
     EraseMaskBonus.ROW: [(0, col) for col in range(-WIDTH, WIDTH)],  # Вся строка
     EraseMaskBonus.COL: [(row, 0) for row in range(-HEIGHT, HEIGHT)],  # Весь столбец
@@ -79,6 +276,197 @@ ERASE_BONUS_MASKS: Dict[EraseMaskBonus, MaskRaw] = {
     EraseMaskBonus.ALL: [(row, col) for row in range(-HEIGHT, HEIGHT) for col in range(-WIDTH, WIDTH)]  # Все ячейки поля
 }
 
+for _bonus_mask in ERASE_BONUS_MASKS.values():
+    _register_offsets(_bonus_mask)
+
+# те же маски бонусов в виде битовых множеств для поля MAIN_RECT:
+# (часть, сдвигаемая на строку опорной ячейки, часть, сдвигаемая на столбец, неподвижная часть)
+_ROW0_BITS = (1 << WIDTH) - 1
+_COL0_BITS = sum(1 << (row * WIDTH) for row in range(HEIGHT))
+_ALL_BITS = (1 << (WIDTH * HEIGHT)) - 1
+ERASE_BONUS_BITS: Dict[EraseMaskBonus, Tuple[int, int, int]] = {
+    EraseMaskBonus.ROW: (_ROW0_BITS, 0, 0),
+    EraseMaskBonus.COL: (0, _COL0_BITS, 0),
+    EraseMaskBonus.CROSS: (_ROW0_BITS, _COL0_BITS, 0),
+    EraseMaskBonus.ALL: (0, 0, _ALL_BITS)
+}
+
+def erase_bonus_bitmask(bonus: EraseMaskBonus, pivot_raw: TupleInt2) -> BitMask:
+    """Маска бонуса стирания с опорной ячейкой pivot_raw -- два сдвига вместо перебора ячеек."""
+    row_bits, col_bits, fixed_bits = ERASE_BONUS_BITS[bonus]
+    row, col = pivot_raw
+    return BitMask((row_bits << (row * WIDTH)) | (col_bits << col) | fixed_bits)
+
+# === ЛИНИИ НА "СЫРОМ" ПОЛЕ ===
+# Любая комбинация из COMBINATIONS содержит прямую линию из MIN_LINE одинаковых камней,
+# поэтому "на поле есть комбинация" <=> "на поле есть линия из MIN_LINE камней".
+# Функции ниже работают со списком строк поля grid[row][col] без масок и RC --
+# для массовых проверок (перемешивание, генерация, поиск ходов).
+MIN_LINE = 3
+RawGrid = List[List[str]]
+SwapRaw = Tuple[TupleInt2, TupleInt2]
+
+def run_length(grid: RawGrid, row: int, col: int, d_row: int, d_col: int) -> int:
+    """Количество таких же камней, как в (row, col), подряд в направлении (d_row, d_col), не считая саму ячейку."""
+    value = grid[row][col]
+    if value == NonStoneValues.EMPTY:
+        return 0
+    h, w = len(grid), len(grid[0])
+    ans = 0
+    row, col = row + d_row, col + d_col
+    while 0 <= row < h and 0 <= col < w and grid[row][col] == value:
+        ans += 1
+        row, col = row + d_row, col + d_col
+    return ans
+
+def has_line_at(grid: RawGrid, row: int, col: int) -> bool:
+    """Проходит ли через ячейку линия из MIN_LINE одинаковых камней."""
+    if grid[row][col] == NonStoneValues.EMPTY:
+        return False
+    horizontal = run_length(grid, row, col, 0, -1) + 1 + run_length(grid, row, col, 0, 1)
+    if horizontal >= MIN_LINE:
+        return True
+    vertical = run_length(grid, row, col, -1, 0) + 1 + run_length(grid, row, col, 1, 0)
+    return vertical >= MIN_LINE
+
+def swap_forms_line(grid: RawGrid, rc1: TupleInt2, rc2: TupleInt2) -> bool:
+    """Появится ли линия через одну из ячеек после обмена (поле после проверки не меняется)."""
+    (r1, c1), (r2, c2) = rc1, rc2
+    grid[r1][c1], grid[r2][c2] = grid[r2][c2], grid[r1][c1]
+    ans = has_line_at(grid, r1, c1) or has_line_at(grid, r2, c2)
+    grid[r1][c1], grid[r2][c2] = grid[r2][c2], grid[r1][c1]
+    return ans
+
+def iter_swaps_raw(grid: RawGrid, rows: range | None = None, cols: range | None = None):
+    """Перебирает обмены соседних непустых разных камней, после которых появляется линия.
+    rows/cols ограничивают первую ячейку обмена (вторая -- справа или сверху от нее)."""
+    h, w = len(grid), len(grid[0])
+    rows = range(h) if rows is None else range(max(rows.start, 0), min(rows.stop, h))
+    cols = range(w) if cols is None else range(max(cols.start, 0), min(cols.stop, w))
+    for row in rows:
+        for col in cols:
+            value = grid[row][col]
+            if value == NonStoneValues.EMPTY:
+                continue
+            for neighbour in ((row, col + 1), (row + 1, col)):
+                n_row, n_col = neighbour
+                if n_row >= h or n_col >= w:
+                    continue
+                other = grid[n_row][n_col]
+                if other == NonStoneValues.EMPTY or other == value:
+                    continue
+                if swap_forms_line(grid, (row, col), neighbour):
+                    yield ((row, col), neighbour)
+
+def has_line(grid: RawGrid) -> bool:
+    """Есть ли на поле хотя бы одна линия (а значит и комбинация)."""
+    return any(has_line_at(grid, row, col) for row in range(len(grid)) for col in range(len(grid[0])))
+
+def is_line_free_placement(grid: RawGrid, row: int, col: int, value: str) -> bool:
+    """Не замкнет ли value линию с двумя соседями слева или снизу.
+    При заполнении поля снизу вверх слева направо этого достаточно, чтобы линий не было вовсе."""
+    if value == NonStoneValues.EMPTY:
+        return True
+    if col >= 2 and grid[row][col - 1] == value and grid[row][col - 2] == value:
+        return False
+    if row >= 2 and grid[row - 1][col] == value and grid[row - 2][col] == value:
+        return False
+    return True
+
+# комбинации в порядке поиска get_rc_combination_mask: сначала длинные
+COMBINATIONS_BY_SIZE: Tuple[MaskRaw, ...] = tuple(sorted(COMBINATIONS.values(), key=len, reverse=True))
+# те же комбинации вместе с нужными длинами серий
+COMBINATION_RUNS: Tuple[Tuple[MaskRaw, RunLengths], ...] = tuple(
+    (combination, combination_runs(combination)) for combination in COMBINATIONS_BY_SIZE)
+# все смещения в COMBINATIONS лежат на одной строке или одном столбце с опорной ячейкой,
+# поэтому опорная ячейка любой комбинации, содержащей (row, col), -- не дальше PIVOT_REACH по прямой
+PIVOT_REACH = max(abs(d) for combination in COMBINATIONS.values() for offset in combination for d in offset)
+
+def combination_at_raw(grid: RawGrid, row: int, col: int) -> MaskRaw:
+    """То же, что GameBoard.get_rc_combination_mask, на "сыром" поле: клетки самой длинной
+    комбинации с опорной ячейкой (row, col) или пустой кортеж."""
+    value = grid[row][col]
+    if value == NonStoneValues.EMPTY:
+        return ()
+    h, w = len(grid), len(grid[0])
+    for combination in COMBINATIONS_BY_SIZE:
+        cells = tuple((row + d_row, col + d_col) for d_row, d_col in combination)
+        if all(0 <= r < h and 0 <= c < w and grid[r][c] == value for r, c in cells):
+            return cells
+    return ()
+
+def longest_combination_raw(grid: RawGrid, around: Optional[Iterable[TupleInt2]] = None) -> MaskRaw:
+    """Самая длинная комбинация на поле. Если задан around -- только комбинации,
+    которые могут содержать эти ячейки (опорные ячейки на одной прямой в пределах PIVOT_REACH)."""
+    h, w = len(grid), len(grid[0])
+    if around is None:
+        pivots = ((row, col) for row in range(h) for col in range(w))
+    else:
+        pivots = set()
+        for row, col in around:
+            for k in range(-PIVOT_REACH, PIVOT_REACH + 1):
+                pivots.add((row + k, col))
+                pivots.add((row, col + k))
+        pivots = sorted((r, c) for r, c in pivots if 0 <= r < h and 0 <= c < w)
+    ans: MaskRaw = ()
+    for row, col in pivots:
+        cells = combination_at_raw(grid, row, col)
+        if len(cells) > len(ans):
+            ans = cells
+    return ans
+
+# обмен (a, b) "видит" ячейку p, только если p лежит не дальше чем в MIN_LINE - 1 от a или b,
+# поэтому изменение p влияет лишь на обмены с первой ячейкой в окне этого радиуса
+SWAP_INFLUENCE_RADIUS = MIN_LINE
+
+def _count_swaps_around(grid: RawGrid, row: int, col: int) -> int:
+    r = SWAP_INFLUENCE_RADIUS
+    return sum(1 for _ in iter_swaps_raw(grid, range(row - r, row + r + 1), range(col - r, col + r + 1)))
+
+def generate_playable_grid(height: int, width: int, min_swaps: int = 1,
+                           rng: random.Random | None = None,
+                           stones: Sequence[str] = tuple(Stone)) -> Tuple[RawGrid, int]:
+    """Случайное поле без комбинаций и (по возможности) хотя бы с min_swaps ходами обменом.
+
+    Без циклов с повторными попытками, за O(height * width):
+    1. заполняем снизу вверх, слева направо, выбирая камень, который не замыкает линию
+       с двумя соседями слева или снизу -- так линий не появится вовсе;
+    2. если ходов меньше min_swaps, один раз проходим по полю и "подсаживаем" ходы:
+       меняем камень, если это не создает линию и увеличивает число ходов в окрестности.
+    Возвращает поле и итоговое количество ходов (оно может быть меньше min_swaps,
+    если поле слишком мало).
+    Нужно хотя бы 3 разных камня: соседи слева и снизу запрещают не больше двух,
+    с меньшим набором ячейке может не остаться камня -- тогда ValueError."""
+    if len(set(stones)) < 3:
+        raise ValueError(f"Для поля без линий нужно хотя бы 3 разных камня, получено {len(set(stones))}")
+    rng = random.Random() if rng is None else rng
+    grid: RawGrid = [[NonStoneValues.EMPTY] * width for _ in range(height)]
+    for row in range(height):
+        for col in range(width):
+            allowed = [stone for stone in stones if is_line_free_placement(grid, row, col, stone)]
+            grid[row][col] = rng.choice(allowed)
+
+    swaps_count = sum(1 for _ in iter_swaps_raw(grid))
+    for row in range(height):
+        for col in range(width):
+            if swaps_count >= min_swaps:
+                return grid, swaps_count
+            old_value = grid[row][col]
+            before = _count_swaps_around(grid, row, col)
+            for stone in rng.sample(list(stones), len(stones)):
+                if stone == old_value:
+                    continue
+                grid[row][col] = stone
+                if has_line_at(grid, row, col):
+                    continue
+                after = _count_swaps_around(grid, row, col)
+                if after > before:
+                    swaps_count += after - before
+                    break
+            else:
+                grid[row][col] = old_value
+    return grid, swaps_count
+
 if __name__ == "__main__":
         rc_set = {
             RC(RowInt(7), ColInt(7))  # близко к границе
@@ -1,9 +1,10 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Tuple
 from contract import Contract
 from combinations import RC
-from base import RowInt, ColInt
+from base import RowInt, ColInt, Rect, MAIN_RECT
 from simple_game import SimpleGame, SimpleGameFactory
+from game_board import GameBoardSettings
 
 # Добавить определение типа:
 CLIArgs = List[str]
@@ -23,6 +24,30 @@ class GameCommand(Command):
     description = "Абстрактная игровая команда."
     ERR_INVALID_ARGS_COUNT = "Неверное число аргументов"
     ERR_INVALID_ARGS_TYPE = "Неверный тип аргументов"
+    ERR_ARGS_OUT_OF_RANGE = "Координаты вне поля"
+    # имена полей-координат в порядке аргументов; "row..." -- строка, остальные -- столбец
+    ARGS: Tuple[str, ...] = ()
+    # ход меняет игру и ее статус; остальные команды (подсказки) статус игры не трогают
+    IS_MOVE = True
+
+    @Contract.on
+    def deserialize(self, args: CLIArgs, rect: Rect = MAIN_RECT) -> None:
+        """Разбирает аргументы сразу в целые координаты и проверяет их по полю rect пачкой:
+        строки и столбцы -- каждые одним min/max. После успешного разбора координаты корректны,
+        и visit их больше не проверяет."""
+        if len(args) != len(self.ARGS):
+            return self.fail_pre(self.ERR_INVALID_ARGS_COUNT)
+        # только ASCII-цифры: isdigit пропускает "²", на котором int падает
+        if not all(arg.isascii() and arg.isdigit() for arg in args):
+            return self.fail_pre(self.ERR_INVALID_ARGS_TYPE)
+        values = [int(arg) for arg in args]
+        rows = RowInt.array(value for name, value in zip(self.ARGS, values) if name.startswith("row"))
+        cols = ColInt.array(value for name, value in zip(self.ARGS, values) if not name.startswith("row"))
+        if not (rows.is_OK and cols.is_OK) or \
+                (rows and rows.high >= rect.height.value) or (cols and cols.high >= rect.width.value):
+            return self.fail_pre(self.ERR_ARGS_OUT_OF_RANGE)
+        for name, value in zip(self.ARGS, values):
+            setattr(self, name, value)
     
     @abstractmethod
     def visit(self, game: SimpleGame) -> None:  # Исправлено: было visit
@@ -36,6 +61,7 @@ class SwapCommand(GameCommand):
     # Сообщения об ошибках
     ERR_INVALID_ARGS_COUNT = "Команда swap требует 4 аргумента: swap <row1> <col1> <row2> <col2>"
     ERR_INVALID_ARGS_TYPE = "Все аргументы команды swap должны быть числами"
+    ARGS = ("row1", "col1", "row2", "col2")
     
     def __init__(self):
         super().__init__()
@@ -44,16 +70,8 @@ class SwapCommand(GameCommand):
         self.row2 = None
         self.col2 = None
     
-    @Contract.on
-    def deserialize(self, args: CLIArgs) -> None:
-        self.check_pre(len(args) == 4, self.ERR_INVALID_ARGS_COUNT)
-        self.row1 = int(args[0])
-        self.col1 = int(args[1])
-        self.row2 = int(args[2])
-        self.col2 = int(args[3])
-        
     def visit(self, game: SimpleGame) -> None:
-        game.smart_swap_move(RC(RowInt(self.row1), ColInt(self.col1)), RC(RowInt(self.row2), ColInt(self.col2)))
+        game.smart_swap_move(RC(RowInt.of(self.row1), ColInt.of(self.col1)), RC(RowInt.of(self.row2), ColInt.of(self.col2)))
 
 class EraseAllCommand(GameCommand):
     """Команда удаления всех элементов."""
@@ -66,11 +84,6 @@ class EraseAllCommand(GameCommand):
         super().__init__()
 
     
-    @Contract.on
-    def deserialize(self, args: CLIArgs) -> None:
-        self.check_pre(len(args) == 0, self.ERR_INVALID_ARGS_COUNT)
-        
-    
     def visit(self, game: SimpleGame) -> None:
         game.erase_all_move()
 
@@ -82,19 +95,15 @@ class EraseRowCommand(GameCommand):
     # Сообщения об ошибках
     ERR_INVALID_ARGS_COUNT = "Команда erase_row требует 1 аргумент: erase_row <row>"
     ERR_INVALID_ARGS_TYPE = "Аргумент команды erase_row должен быть числом"
+    ARGS = ("row",)
     
     def __init__(self):
         super().__init__()
         self.row = None
     
-    @Contract.on
-    def deserialize(self, args: CLIArgs) -> None:
-        self.check_pre(len(args) == 1 and args[0].isdigit(), self.ERR_INVALID_ARGS_COUNT)
-        self.row = int(args[0])
-    
     @Contract.on
     def visit(self, game: SimpleGame) -> None:  
-        game.erase_row_move(RC(RowInt(self.row), ColInt(0)))
+        game.erase_row_move(RC(RowInt.of(self.row), ColInt.of(0)))
 
 
 class EraseColCommand(GameCommand):
@@ -105,19 +114,15 @@ class EraseColCommand(GameCommand):
     # Сообщения об ошибках
     ERR_INVALID_ARGS_COUNT = "Команда erase_col требует 1 аргумент: erase_col <col>"
     ERR_INVALID_ARGS_TYPE = "Аргумент команды erase_col должен быть числом"
+    ARGS = ("col",)
     
     def __init__(self):
         super().__init__()
         self.col = None
     
-    @Contract.on
-    def deserialize(self, args: CLIArgs) -> None:
-        self.check_pre(len(args) == 1 and args[0].isdigit(), self.ERR_INVALID_ARGS_COUNT)
-        self.col = int(args[0])
-    
     @Contract.on
     def visit(self, game: SimpleGame) -> None:
-        game.erase_col_move(RC(RowInt(0), ColInt(self.col)))
+        game.erase_col_move(RC(RowInt.of(0), ColInt.of(self.col)))
 
 class EraseCrossCommand(GameCommand):
     """Команда удаления креста."""
@@ -126,24 +131,18 @@ class EraseCrossCommand(GameCommand):
     # Сообщения об ошибках
     ERR_INVALID_ARGS_COUNT = "Команда erase_cross требует 2 аргумента: erase_cross <row> <col>"
     ERR_INVALID_ARGS_TYPE = "Аргументы команды erase_cross должны быть числами"
+    ARGS = ("row", "col")
     @Contract.on
     def visit(self, game: SimpleGame) -> None:
-        game.erase_cross_move(RC(RowInt(self.row), ColInt(self.col)))
+        game.erase_cross_move(RC(RowInt.of(self.row), ColInt.of(self.col)))
     
     def __init__(self):
         super().__init__()
         self.row = None
         self.col = None
     
-    @Contract.on
-    def deserialize(self, args: CLIArgs) -> None:
-        self.check_pre(len(args) == 2, self.ERR_INVALID_ARGS_COUNT)
-        self.check_pre(args[0].isdigit() and args[1].isdigit(), self.ERR_INVALID_ARGS_TYPE)
-        self.row = int(args[0])
-        self.col = int(args[1])
-        
     def visit(self, game: SimpleGame) -> None:
-        return game.erase_cross_move(RC(RowInt(self.row), ColInt(self.col)))
+        return game.erase_cross_move(RC(RowInt.of(self.row), ColInt.of(self.col)))
 
 class ShuffleCommand(GameCommand):
     """Команда перемешивания поля."""
@@ -153,10 +152,6 @@ class ShuffleCommand(GameCommand):
     # Сообщения об ошибках
     ERR_INVALID_ARGS_COUNT = "Команда shuffle не принимает аргументов"
     
-    @Contract.on
-    def deserialize(self, args: CLIArgs) -> None:
-        self.check_pre(len(args) == 0, self.ERR_INVALID_ARGS_COUNT)
-    
     @Contract.on
     def visit(self, game: SimpleGame) -> None:
         game.shuffle_move()
@@ -170,10 +165,6 @@ class RestartCommand(GameCommand):
     # Сообщения об ошибках
     ERR_INVALID_ARGS_COUNT = "Команда restart не принимает аргументов"
     
-    @Contract.on
-    def deserialize(self, args: CLIArgs) -> None:
-        self.check_pre(len(args) == 0, self.ERR_INVALID_ARGS_COUNT)
-    
     @Contract.on
     def visit(self, game: SimpleGame) -> None:
         game.from_other(SimpleGameFactory.create_game())
@@ -185,6 +176,7 @@ class SwapBonusCommand(GameCommand):
     # Сообщения об ошибках
     ERR_INVALID_ARGS_COUNT = "Команда swap_bonus требует 4 аргумента: swap_bonus <row1> <col1> <row2> <col2>"
     ERR_INVALID_ARGS_TYPE = "Все аргументы команды swap_bonus должны быть числами"
+    ARGS = ("row1", "col1", "row2", "col2")
     
     def __init__(self):
         super().__init__()
@@ -193,17 +185,9 @@ class SwapBonusCommand(GameCommand):
         self.row2 = None
         self.col2 = None
     
-    def deserialize(self, args: CLIArgs) -> None:
-        self.check_pre(len(args) == 4, self.ERR_INVALID_ARGS_COUNT)
-        self.check_pre(args[0].isdigit() and args[1].isdigit() and args[2].isdigit() and args[3].isdigit(), self.ERR_INVALID_ARGS_TYPE)
-        self.row1 = int(args[0])
-        self.col1 = int(args[1])
-        self.row2 = int(args[2])
-        self.col2 = int(args[3])
-    
     @Contract.on
     def visit(self, game: SimpleGame) -> None:
-        game.swap_bonus_move(RC(RowInt(self.row1), ColInt(self.col1)), RC(RowInt(self.row2), ColInt(self.col2)))
+        game.swap_bonus_move(RC(RowInt.of(self.row1), ColInt.of(self.col1)), RC(RowInt.of(self.row2), ColInt.of(self.col2)))
 
 class BrushCommand(GameCommand):
     description = "Команда удаления по цвету камня: brush <row> <col>"
@@ -211,17 +195,11 @@ class BrushCommand(GameCommand):
     # Сообщения об ошибках
     ERR_INVALID_ARGS_COUNT = "Команда brush требует 2 аргумента: brush <row> <col>"
     ERR_INVALID_ARGS_TYPE = "Все аргументы команды brush должны быть числами"
-    
-    @Contract.on
-    def deserialize(self, args: CLIArgs) -> None:
-        self.check_pre(len(args) == 2, self.ERR_INVALID_ARGS_COUNT)
-        self.check_pre(args[0].isdigit() and args[1].isdigit(), self.ERR_INVALID_ARGS_TYPE)
-        self.row = int(args[0])
-        self.col = int(args[1])
+    ARGS = ("row", "col")
     
     @Contract.on
     def visit(self, game: SimpleGame) -> None:
-        game.brush_move(RC(RowInt(self.row), ColInt(self.col)))
+        game.brush_move(RC(RowInt.of(self.row), ColInt.of(self.col)))
 
 class AutoSwapCommand(GameCommand):
     """Команда автоматического хода обменом"""
@@ -231,9 +209,23 @@ class AutoSwapCommand(GameCommand):
     ERR_INVALID_ARGS_COUNT = "Команда auto_swap не принимает аргументов"
     
     @Contract.on
-    def deserialize(self, args: CLIArgs) -> None:
-        self.check_pre(len(args) == 0, self.ERR_INVALID_ARGS_COUNT)
+    def visit(self, game: SimpleGame) -> None:
+        game.auto_swap_move()
+
+class HintsCommand(GameCommand):
+    """Команда подсказки: показывает возможные ходы обменом."""
+    description = "Показать возможные ходы обменом: hints"
+    
+    # Сообщения об ошибках
+    ERR_INVALID_ARGS_COUNT = "Команда hints не принимает аргументов"
+    MSG_NO_HINTS = "Ходов обменом нет"
+    IS_MOVE = False
     
     @Contract.on
     def visit(self, game: SimpleGame) -> None:
-        game.auto_swap_move()
\ No newline at end of file
+        hints = game.hints()
+        if not hints:
+            print(GameBoardSettings.SWAP_HINT_PREFIX + self.MSG_NO_HINTS)
+        for rc1, rc2 in hints:
+            (row1, col1), (row2, col2) = rc1.raw_repr, rc2.raw_repr
+            print(GameBoardSettings.SWAP_HINT_PREFIX + f"swap {row1} {col1} {row2} {col2}")
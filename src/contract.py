@@ -1,5 +1,6 @@
 from enum import Enum, StrEnum
-from typing import Callable
+from functools import wraps
+from typing import Callable, Dict, NamedTuple
 
 class ContractStatus(StrEnum):
     NIL = "NIL"
@@ -25,8 +26,25 @@ class ContractStatus(StrEnum):
 декоратор как раз нужен, чтобы ловить эти исключения и изменять по ним соответствующие статусы
 (ERR для пред- и пост-условий, WARN для предупреждений)
 
-Задел на будущее -- восстановление структуры после непройденного пост-условия
-(абстрактный метод _repar_post)
+Режим без исключений -- для горячих путей, где неуспех ожидаем (перебор ходов, разбор координат):
+    if not condition:
+        return self.fail_pre(message)
+fail_pre / fail_post / fail_warn сразу ставят статус и сообщение (те же, что дал бы декоратор по исключению)
+и возвращают FAILED; декоратор, получив FAILED, статус не трогает, а наружу возвращает None.
+Исключение не создается и не раскручивается -- а is_OK / is_ERR / message ведут себя так же
+
+Режимы проверки (ContractMonitor.set_mode) -- для боевого запуска, где платить за каждую проверку дорого:
+    - FULL -- все условия проверяются (по умолчанию)
+    - SAMPLED -- условия проверяются на доле rate вызовов каждого метода, остальные идут быстрым путем:
+      check_pre / check_post / check_warn ничего не делают
+    - OFF -- условия не проверяются совсем
+Независимо от режима на каждый метод под @Contract.on ведутся счетчики: вызовы, проверенные вызовы и
+нарушения по статусам (WARN, ERR, BROKEN) -- ContractMonitor.counters() / violations()
+Условия, без которых продолжать нельзя при любом режиме (правила игры, разбор ввода, неуспех вложенного шага),
+пишутся через fail_* -- они выполняются всегда
+
+Восстановление структуры после ошибки посреди метода -- метод _repair_post
+(вызывается при любом непройденном условии; для ходов игры -- откат по журналу изменений, см. GameBoard)
 В общем случае можно предложить полную резервную копию завернуть в отдельный декоратор, и в случае 
 неуспешного прохождения пост-условия восстанавливаться из нее
 
@@ -66,7 +84,115 @@ class ContractErrPostException(ContractErrException):
         return "Contract postcondition error: " + self._message
 
 
+class _Failed:
+    """Маркер "условие не выполнено, статус уже выставлен" (см. Contract.fail_pre)."""
+    __slots__ = ()
+
+    def __bool__(self) -> bool:
+        return False
+
+    def __repr__(self) -> str:
+        return "FAILED"
+
+FAILED = _Failed()
+
+
+class ContractMode(StrEnum):
+    FULL = "FULL"
+    SAMPLED = "SAMPLED"
+    OFF = "OFF"
+
+
+class MethodCounters(NamedTuple):
+    """Счетчики одного метода: вызовы, полностью проверенные вызовы, нарушения по статусам."""
+    calls: int
+    checked: int
+    warn: int
+    err: int
+    broken: int
+
+    @property
+    def violations(self) -> int:
+        return self.warn + self.err + self.broken
+
+
+class _MethodStats:
+    """Изменяемые счетчики метода (заводятся при декорировании, живут в замыкании)."""
+    __slots__ = ("calls", "checked", "budget", "by_status")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.calls = 0
+        self.checked = 0
+        self.budget = 0.0
+        self.by_status = {ContractStatus.WARN: 0, ContractStatus.ERR: 0, ContractStatus.BROKEN: 0}
+
+    def sample(self, rate: float) -> bool:
+        """Равномерная выборка: ровно доля rate вызовов метода проверяется полностью."""
+        self.budget += rate
+        if self.budget >= 1.0:
+            self.budget -= 1.0
+            return True
+        return False
+
+    def snapshot(self) -> MethodCounters:
+        by_status = self.by_status
+        return MethodCounters(self.calls, self.checked, by_status[ContractStatus.WARN],
+                              by_status[ContractStatus.ERR], by_status[ContractStatus.BROKEN])
+
+
+class ContractMonitor:
+    """Режим проверки контрактов и счетчики нарушений по методам (общие на процесс)."""
+    _mode: ContractMode = ContractMode.FULL
+    _rate: float = 1.0
+    # проверяются ли условия в текущем вызове (для вложенных вызовов -- сохраняется и восстанавливается)
+    checking: bool = True
+    _stats: Dict[str, _MethodStats] = {}
+
+    @classmethod
+    def set_mode(cls, mode: ContractMode, rate: float = 1.0) -> None:
+        """Переключить режим; rate -- доля проверяемых вызовов для SAMPLED (от 0 до 1)."""
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError("rate must be in [0, 1]")
+        cls._mode = ContractMode(mode)
+        cls._rate = rate
+        cls.checking = cls._mode == ContractMode.FULL
+
+    @classmethod
+    def mode(cls) -> ContractMode:
+        return cls._mode
+
+    @classmethod
+    def rate(cls) -> float:
+        return cls._rate
+
+    @classmethod
+    def _register(cls, name: str) -> _MethodStats:
+        return cls._stats.setdefault(name, _MethodStats())
+
+    @classmethod
+    def counters(cls) -> Dict[str, MethodCounters]:
+        """Счетчики всех вызывавшихся методов (имя -- квалифицированное имя метода)."""
+        return {name: stats.snapshot() for name, stats in cls._stats.items() if stats.calls}
+
+    @classmethod
+    def violations(cls) -> Dict[str, MethodCounters]:
+        """Только методы, у которых были нарушения."""
+        return {name: counters for name, counters in cls.counters().items() if counters.violations}
+
+    @classmethod
+    def reset_counters(cls) -> None:
+        for stats in cls._stats.values():
+            stats.reset()
+
+
 class Contract:
+    # слоты не мешают наследникам без __slots__ (у них будет __dict__),
+    # но позволяют легким наследникам (BoundedInt) обходиться без него
+    __slots__ = ("_status", "_message")
+
     def __init__(self):
         self._reset()
 
@@ -75,6 +201,8 @@ class Contract:
         self._message = "NIL"
     
     def _check(self, condition: bool, exception: ContractException):
+        if not ContractMonitor.checking:
+            return
         if not condition:
             raise exception
         
@@ -90,34 +218,80 @@ class Contract:
     def check_post(self, condition: bool, message: str = ''):
         self._check(condition, ContractErrPostException(message))
 
+    # === ПРОВЕРКИ БЕЗ ИСКЛЮЧЕНИЙ ===
+    # только внутри методов под @Contract.on: результат нужно вернуть из метода (return self.fail_pre(...))
+    def _fail(self, status: ContractStatus, message: str) -> _Failed:
+        if status != ContractStatus.WARN:
+            self._repair_post()
+        self._status = status
+        self._message = message
+        return FAILED
+
+    def fail_warn(self, message: str = '') -> _Failed:
+        return self._fail(ContractStatus.WARN, "Contract warning: " + message)
+
+    def fail_pre(self, message: str = '') -> _Failed:
+        return self._fail(ContractStatus.ERR, "Contract precondition error: " + message)
+
+    def fail_post(self, message: str = '') -> _Failed:
+        return self._fail(ContractStatus.BROKEN, "Contract postcondition error: " + message)
+
     @property
     def message(self):
         return self._message
     
+    def _call(self, func, args, kwargs):
+        ans = None
+        try:
+            ans = func(self, *args, **kwargs)
+            if ans is FAILED:
+                return None
+            self._message = "OK"
+            self._status = ContractStatus.OK
+        except ContractWarningException as err:
+            self._message = str(err) 
+            self._status = ContractStatus.WARN
+        except ContractErrPreException as ex:
+            self._repair_post()
+            self._message = str(ex) 
+            self._status = ContractStatus.ERR
+        except ContractErrPostException as err:
+            self._repair_post()
+            self._message = str(err) 
+            self._status = ContractStatus.BROKEN
+        except:
+            self._repair_post()
+            self._message = "UNKNOWN contract error"
+            self._status = ContractStatus.BROKEN
+        return ans
+
     def on(func):
-        def inner(self, *args, **kwargs): 
-            ans = None
-            try:
-                ans = func(self, *args, **kwargs)
-                self._message = "OK"
-                self._status = ContractStatus.OK
-            except ContractWarningException as err:
-                self._message = str(err) 
-                self._status = ContractStatus.WARN
-            except ContractErrPreException as ex:
-                self._message = str(ex) 
-                self._status = ContractStatus.ERR
-            except ContractErrPostException as err:
-                self._repair_post()
-                self._message = str(err) 
-                self._status = ContractStatus.BROKEN
-            except:
-                self._message = "UNKNOWN contract error"
-                self._status = ContractStatus.BROKEN
+        stats = ContractMonitor._register(func.__qualname__)
+
+        @wraps(func)
+        def inner(self, *args, **kwargs):
+            stats.calls += 1
+            mode = ContractMonitor._mode
+            if mode == ContractMode.FULL:
+                stats.checked += 1
+                ans = Contract._call(self, func, args, kwargs)
+            else:
+                outer = ContractMonitor.checking
+                checking = mode == ContractMode.SAMPLED and stats.sample(ContractMonitor._rate)
+                stats.checked += checking
+                ContractMonitor.checking = checking
+                try:
+                    ans = Contract._call(self, func, args, kwargs)
+                finally:
+                    ContractMonitor.checking = outer
+            if self._status != ContractStatus.OK:
+                stats.by_status[self._status] += 1
             return ans
         return inner
 
     def _repair_post(self):
+        """Восстановление после ошибки посреди метода: непройденное пост-условие или
+        предусловие, проверенное уже после части изменений. По умолчанию ничего не делает."""
         pass
 
     @property
@@ -1,25 +1,45 @@
-from sqlite3 import Row
-from typing import Callable, Tuple
+from typing import Callable, Tuple, Dict, Iterator, List, Optional, NamedTuple
 
-from base import MAIN_RECT, WIDTH, HEIGHT, Stone, NonStoneValues, EraseMaskBonus, Stone, R, C, Bonus, RowInt, ColInt, Rect, PositiveInt, StoneFull, PrinterConstants, Printer
-from bounded import T
+from base import MAIN_RECT, WIDTH, HEIGHT, Stone, NonStoneValues, EraseMaskBonus, Stone, R, C, Bonus, RowInt, ColInt, Rect, PositiveInt, StoneFull, TupleInt2
+from bounded import T, BoundedIntArray
 from cells import Cells, BonusChest, Statistics
-from combinations import RC, Mask, COMBINATIONS, ERASE_BONUS_MASKS
+from combinations import (
+    RC, Mask, LazyMask, BitMask, RawGrid, SwapRaw,
+    RunLengths, COMBINATION_RUNS,
+    iter_swaps_raw, is_line_free_placement, generate_playable_grid, has_line, has_line_at,
+    longest_combination_raw, erase_bonus_bitmask
+)
 from contract import Contract
-from random import shuffle
-from copy import deepcopy, copy
-import random
+from copy import copy
+from rng import GameRng
 
 '''
 Реализует запросы и команды "среднего" уровня над Cells
 С использованием Масок, без прямого доступа
 '''
 
+# слушатель шагов поля: имя шага ("erase", "drop", "shuffle", "fill line") и само поле
+StepListener = Callable[[str, "Board"], None]
+# изменение поля: (ячейка, новое значение) для каждой изменившейся ячейки
+BoardDelta = Tuple[Tuple[TupleInt2, StoneFull], ...]
+
 class Board(Contract):
-    """Игровое поле с базовыми операциями над ячейками."""
+    """Игровое поле с базовыми операциями над ячейками.
+    Поле ничего не печатает: о каждом шаге оно сообщает слушателю (если он задан)."""
+    # сколько раз пробуем построить "играбельную" перестановку, прежде чем сдаться
+    SHUFFLE_MAX_ATTEMPTS = 32
+
     @Contract.on
-    def __init__(self):
-        self._cells = Cells(MAIN_RECT)
+    def __init__(self, rect: Rect = MAIN_RECT, rng: Optional[GameRng] = None):
+        self._cells = Cells(rect)
+        self._rng = rng if rng is not None else GameRng()
+        self._last_shuffle_attempts = 0
+        self._version = 0
+        self._region_cache: Dict[str, Tuple[int, LazyMask]] = {}
+        self._step_listener: Optional[StepListener] = None
+        # журнал хода: (биты ячеек, прежнее значение), None -- журнал не ведется
+        self._journal: Optional[List[Tuple[int, StoneFull]]] = None
+        self._rebuild_stone_index()
         self.check_post(self._cells.is_OK, "cells must be OK")
          
     # ЗАПРОСЫ
@@ -43,15 +63,22 @@ class Board(Contract):
         return f"\nBoard:\ncells=\n{self._cells}"
 
     def find_by_value(self, value: Stone) -> Mask:
-        """Находит все ячейки с заданным значением."""
-        rc_set = [rc for rc in self.rect if self._cells[rc] == value]
-        return Mask(rc_set)
+        """Находит все ячейки с заданным значением (по индексу, за размер результата)."""
+        return BitMask(self._stone_index.get(value, 0), self.rect)
     
     def find_equals(self, rc: RC) -> Mask:
         """Находит все ячейки с тем же значением, что и у заданной"""
         value = self._cells[rc]
         return self.find_by_value(value)
 
+    def stone_count(self, value: StoneFull) -> int:
+        """Количество ячеек с заданным значением."""
+        return self._stone_index.get(value, 0).bit_count()
+
+    def stone_histogram(self) -> Dict[Stone, int]:
+        """Гистограмма камней на поле (без пустых ячеек)."""
+        return {stone: self.stone_count(stone) for stone in Stone}
+
     @Contract.on
     def cells_are_equal(self, mask: Mask) -> bool:
         """Проверяет, что все ячейки маски равны друг другу."""
@@ -65,99 +92,446 @@ class Board(Contract):
         """Проверяет, что в маске есть пустые ячейки."""
         return any([self.is_empty_cell(rc) for rc in set(mask)])
     
+    def to_raw(self) -> RawGrid:
+        """Копия поля в виде grid[row][col] для массовых проверок."""
+        return [list(row) for row in self._cells.to_raw()]
+
+    def codes_view(self) -> memoryview:
+        """Коды камней поля без копирования, только для чтения (см. Cells.codes_view)."""
+        return self._cells.codes_view()
+
+    def one_hot_view(self) -> memoryview:
+        """One-hot плоскости камней поля без копирования, только для чтения (см. Cells.one_hot_view)."""
+        return self._cells.one_hot_view()
+
+    @property
+    def last_shuffle_attempts(self) -> int:
+        """Сколько попыток понадобилось последнему shuffle_playable."""
+        return self._last_shuffle_attempts
+
     def is_empty_cell(self, rc: RC) -> bool:
         """Проверяет, что ячейка пуста."""
         return self._cells[rc] == NonStoneValues.EMPTY
     
+    @property
+    def version(self) -> int:
+        """Номер версии поля: увеличивается при каждом изменении ячеек."""
+        return self._version
+
+    def _bits_view(self, bits: int) -> LazyMask:
+        """Ленивая маска над снимком битовой маски: перебор по требованию,
+        len и in -- без построения множества."""
+        w = self.width.value
+        return LazyMask(
+            source=lambda: self._rcs_from_bits(bits),
+            contains=lambda rc: rc in self.rect and bool(bits >> (rc.row.value * w + rc.col.value) & 1),
+            length=bits.bit_count)
+
+    def _cached_region(self, name: str, bits_getter: Callable[[], int]) -> LazyMask:
+        """Представление области, общее для всех запросов в пределах одной версии поля."""
+        cached = self._region_cache.get(name)
+        if cached is None or cached[0] != self._version:
+            cached = (self._version, self._bits_view(bits_getter()))
+            self._region_cache[name] = cached
+        return cached[1]
+
     @property
     def empty_cells(self) -> Mask:
-        """Возвращает маску всех пустых ячеек."""
-        ans = set(filter(lambda rc: self.is_empty_cell(rc), self.rect))
-        return Mask(ans)
+        """Возвращает маску всех пустых ячеек (ленивое представление, только для чтения)."""
+        return self._cached_region("empty", lambda: self._stone_index[NonStoneValues.EMPTY])
     
     @property
     def non_empty_cells(self) -> Mask:
-        """Возвращает маску всех непустых ячеек."""
-        ans = set(filter(lambda rc: not self.is_empty_cell(rc), self.rect))
-        return Mask(ans)
+        """Возвращает маску всех непустых ячеек (ленивое представление, только для чтения)."""
+        full_bits = (1 << (self.width.value * self.height.value)) - 1
+        return self._cached_region("non_empty", lambda: full_bits & ~self._stone_index[NonStoneValues.EMPTY])
+
+    # ИНДЕКС КАМНЕЙ
+    # для каждого значения (камни + пустая ячейка) храним битовую маску позиций:
+    # бит row * width + col поднят, если в ячейке лежит это значение
+    def _rc_bit(self, rc: RC) -> int:
+        return 1 << (rc.row.value * self.width.value + rc.col.value)
+
+    def _rcs_from_bits(self, bits: int) -> Iterator[RC]:
+        """Перебирает координаты поднятых битов -- за количество битов, а не размер поля."""
+        w = self.width.value
+        while bits:
+            low = bits & -bits
+            index = low.bit_length() - 1
+            yield RC(RowInt.of(index // w), ColInt.of(index % w))
+            bits ^= low
+
+    def _rebuild_stone_index(self) -> None:
+        """Полностью перестраивает индекс по текущему содержимому Cells."""
+        self._touch()
+        self._reset_runs()
+        self._stone_index: Dict[StoneFull, int] = {value: 0 for value in StoneFull}
+        for rc in self.rect:
+            value = self._cells[rc]
+            self._stone_index[value] = self._stone_index.get(value, 0) | self._rc_bit(rc)
+        h, w = self.height.value, self.width.value
+        self._col_masks = tuple(sum(1 << (row * w + col) for row in range(h)) for col in range(w))
+        self._refresh_occupancy()
+
+    def _touch(self) -> None:
+        """Отмечает изменение поля: все закэшированные представления устаревают."""
+        self._version += 1
+
+    # ЗАПОЛНЕННОСТЬ
+    # число пустых ячеек, пустые ячейки по столбцам и высота столбца -- номер нижней пустой ячейки
+    # (столбец сплошной до этой строки; h -- пустых нет). Все берется из битов пустых ячеек в индексе:
+    # одиночная запись пересчитывает свой столбец, массовая -- все столбцы, без обхода клеток
+    def _refresh_column(self, col: int) -> None:
+        col_empty = self._stone_index[NonStoneValues.EMPTY] & self._col_masks[col]
+        self._col_empty[col] = col_empty.bit_count()
+        self._heights[col] = ((col_empty & -col_empty).bit_length() - 1) // self.width.value \
+            if col_empty else self.height.value
+
+    def _refresh_occupancy(self) -> None:
+        w = self.width.value
+        self._col_empty = [0] * w
+        self._heights = [0] * w
+        for col in range(w):
+            self._refresh_column(col)
+        self._empty_count = sum(self._col_empty)
+
+    @property
+    def empty_count(self) -> int:
+        """Число пустых ячеек -- O(1)."""
+        return self._empty_count
+
+    @property
+    def column_heights(self) -> Tuple[int, ...]:
+        """Высота каждого столбца: сколько ячеек от нижней подряд заполнено."""
+        return tuple(self._heights)
+
+    def is_column_settled(self, col: int) -> bool:
+        """Столбец не нуждается в падении: выше его высоты только пустые ячейки."""
+        return self._heights[col] + self._col_empty[col] == self.height.value
+
+    # СЕРИИ
+    # для каждой строки -- (серии влево, серии вправо), для каждого столбца -- (вниз, вверх);
+    # измененные строки и столбцы пересчитываются лениво, при первом обращении к сериям
+    @staticmethod
+    def _line_runs(values: tuple) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+        """Серии одинаковых непустых камней назад и вперед вдоль линии."""
+        n = len(values)
+        back, forward = [0] * n, [0] * n
+        for i in range(1, n):
+            if values[i] == values[i - 1] and values[i] != NonStoneValues.EMPTY:
+                back[i] = back[i - 1] + 1
+        for i in range(n - 2, -1, -1):
+            if values[i] == values[i + 1] and values[i] != NonStoneValues.EMPTY:
+                forward[i] = forward[i + 1] + 1
+        return tuple(back), tuple(forward)
+
+    def _reset_runs(self) -> None:
+        h, w = self.height.value, self.width.value
+        empty_runs = (0,) * w
+        self._row_runs = [(empty_runs, empty_runs)] * h
+        self._col_runs = [((0,) * h, (0,) * h)] * w
+        self._dirty_rows = set(range(h))
+        self._dirty_cols = set(range(w))
+
+    def _refresh_runs(self) -> None:
+        if self._dirty_rows:
+            for row in self._dirty_rows:
+                self._row_runs[row] = self._line_runs(self._cells.row_values(row))
+            self._dirty_rows = set()
+        if self._dirty_cols:
+            for col in self._dirty_cols:
+                self._col_runs[col] = self._line_runs(self._cells.col_values(col))
+            self._dirty_cols = set()
+
+    def run_lengths(self, rc: RC) -> RunLengths:
+        """Серии одинаковых камней от ячейки: (влево, вправо, вниз, вверх), без самой ячейки."""
+        return self.run_lengths_raw(rc.row.value, rc.col.value)
+
+    def run_lengths_raw(self, row: int, col: int) -> RunLengths:
+        self._refresh_runs()
+        left, right = self._row_runs[row]
+        down, up = self._col_runs[col]
+        return left[col], right[col], down[row], up[row]
 
     # КОМАНДЫ
     def _update_rc(self, rc: RC, new_value: Stone) -> None:
-        """Обновляет элемент на доске."""
+        """Обновляет элемент на доске. Все изменения Cells идут через этот метод."""
+        old_value = self._cells[rc]
         self._cells[rc] = new_value
+        if not self._cells.is_OK or old_value == new_value:
+            return
+        self._touch()
+        self._dirty_rows.add(rc.row.value)
+        self._dirty_cols.add(rc.col.value)
+        bit = self._rc_bit(rc)
+        if self._journal is not None:
+            self._journal.append((bit, old_value))
+        self._stone_index[old_value] &= ~bit
+        self._stone_index[new_value] = self._stone_index.get(new_value, 0) | bit
+        if old_value == NonStoneValues.EMPTY or new_value == NonStoneValues.EMPTY:
+            self._empty_count += 1 if new_value == NonStoneValues.EMPTY else -1
+            self._refresh_column(rc.col.value)
     
     def swap(self, rc1: RC, rc2: RC) -> None:
         """Меняет местами два элемента на доске."""
-        self._cells[rc2], self._cells[rc1] = self._cells[rc1], self._cells[rc2]
+        value1, value2 = self._cells[rc1], self._cells[rc2]
+        self._update_rc(rc2, value1)
+        self._update_rc(rc1, value2)
         self.check_post(self._cells.is_OK)
     
-    @Printer.on("erase", Printer.PRINT_STEPS_FLAG)
+    @property
+    def rng(self) -> GameRng:
+        """Случайность поля: пополнение и перемешивание."""
+        return self._rng
+
+    def set_rng(self, rng: GameRng) -> None:
+        self._rng = rng
+
+    def set_step_listener(self, listener: Optional[StepListener]) -> None:
+        """Задает слушателя шагов (None -- шаги никуда не сообщаются)."""
+        self._step_listener = listener
+
+    def _emit(self, step: str) -> None:
+        if self._step_listener is not None:
+            self._step_listener(step, self)
+
+    # ЖУРНАЛ
+    # пока журнал ведется, каждое изменение записывает только прежние значения измененных ячеек
+    # (по битовым множествам из индекса), так что откат стоит столько же, сколько само изменение
+    @property
+    def is_journaling(self) -> bool:
+        return self._journal is not None
+
+    def begin_journal(self) -> None:
+        """Начинает журнал изменений (прежний журнал отбрасывается)."""
+        self._journal = []
+
+    def commit_journal(self) -> None:
+        """Принимает изменения и прекращает журнал."""
+        self._journal = None
+
+    def rollback_journal(self) -> None:
+        """Возвращает поле к началу журнала и прекращает журнал."""
+        journal, self._journal = self._journal, None
+        for bits, value in reversed(journal or ()):
+            self.update_mask(BitMask(bits, self.rect), value)
+
+    def _journal_bits(self, bits: int) -> None:
+        if self._journal is None:
+            return
+        for value, value_bits in self._stone_index.items():
+            changed = value_bits & bits
+            if changed:
+                self._journal.append((changed, value))
+
+    def index_snapshot(self) -> Dict[StoneFull, int]:
+        """Снимок индекса камней (несколько int) -- для delta_since."""
+        return dict(self._stone_index)
+
+    def delta_since(self, snapshot: Dict[StoneFull, int]) -> BoardDelta:
+        """Ячейки, изменившиеся после снимка, с новыми значениями (по битам индекса, без обхода поля)."""
+        changed = 0
+        for value, bits in self._stone_index.items():
+            changed |= bits ^ snapshot.get(value, 0)
+        w = self.width.value
+        delta = []
+        for value, bits in self._stone_index.items():
+            bits &= changed
+            while bits:
+                low = bits & -bits
+                index = low.bit_length() - 1
+                delta.append(((index // w, index % w), value))
+                bits ^= low
+        delta.sort()
+        return tuple(delta)
+
+    def _mark_dirty(self, bits: int) -> None:
+        """Строки и столбцы ячеек bits -- к пересчету серий."""
+        w = self.width.value
+        while bits:
+            low = bits & -bits
+            row, col = divmod(low.bit_length() - 1, w)
+            self._dirty_rows.add(row)
+            self._dirty_cols.add(col)
+            bits ^= low
+
     def erase_mask(self, mask: Mask) -> None:
-        """Удаляет элементы с доски по маске."""
-        for rc in mask:
-            self._cells.erase_rc(rc)
+        """Удаляет элементы с доски по маске: одна массовая операция над Cells и индексом."""
+        bitmask = BitMask.from_mask(mask, self.rect)
+        self._journal_bits(bitmask.bits)
+        self._cells.erase_many(bitmask)
+        if not self._cells.is_OK or bitmask.bits == 0:
+            return
+        self._touch()
+        self._mark_dirty(bitmask.bits)
+        for value in self._stone_index:
+            self._stone_index[value] &= ~bitmask.bits
+        self._stone_index[NonStoneValues.EMPTY] |= bitmask.bits
+        self._refresh_occupancy()
+        self._emit("erase")
 
     def update_mask(self, mask: Mask, new_value: Stone) -> None:
-        """Обновляет все ячейки маски заданным значением."""
-        for rc in mask:
-            self._cells[rc] = new_value
+        """Обновляет все ячейки маски заданным значением: одна массовая операция над Cells и индексом."""
+        bitmask = BitMask.from_mask(mask, self.rect)
+        self._journal_bits(bitmask.bits)
+        self._cells.set_many(bitmask, new_value)
+        if not self._cells.is_OK or bitmask.bits == 0:
+            return
+        self._touch()
+        self._mark_dirty(bitmask.bits)
+        for value in self._stone_index:
+            self._stone_index[value] &= ~bitmask.bits
+        self._stone_index[new_value] = self._stone_index.get(new_value, 0) | bitmask.bits
+        self._refresh_occupancy()
+
+    def copy_region(self, other: "Board", mask: Mask) -> None:
+        """Копирует ячейки маски из другого поля того же размера."""
+        bitmask = BitMask.from_mask(mask, self.rect)
+        self._journal_bits(bitmask.bits)
+        self._cells.copy_region(other._cells, bitmask)
+        if not self._cells.is_OK or bitmask.bits == 0:
+            return
+        self._touch()
+        self._mark_dirty(bitmask.bits)
+        for value in self._stone_index:
+            self._stone_index[value] = (self._stone_index[value] & ~bitmask.bits) | \
+                (other._stone_index.get(value, 0) & bitmask.bits)
+        self._refresh_occupancy()
     
     def _drop_column(self, col: ColInt) -> None:
-        """Сдвигает все элементы вниз в столбце, пустые ячейки поднимаются наверх."""
+        """Сдвигает все элементы вниз в столбце, пустые ячейки поднимаются наверх.
+        Ниже высоты столбца все заполнено -- начинаем с нее."""
         h = self.height.value
-        new_col = [NonStoneValues.EMPTY] * h
-        old_col = [self._cells[RC(RowInt(row), col)] for row in range(h)]
-        new_col_index = 0
-        for value in old_col:
-            if value != NonStoneValues.EMPTY:
-                new_col[new_col_index] = value
-                new_col_index += 1
-        for row in range(h):
-            self._update_rc(RC(RowInt(row), col), new_col[row])
+        start = self._heights[col.value]
+        stones = [value for value in self._cells.col_values(col.value)[start:] if value != NonStoneValues.EMPTY]
+        new_col = stones + [NonStoneValues.EMPTY] * (h - start - len(stones))
+        for row in range(start, h):
+            self._update_rc(RC(RowInt.of(row), col), new_col[row - start])
     
-    @Printer.on("drop", Printer.PRINT_STEPS_FLAG)
     def drop_all(self):
-        """Сдвигает все элементы вниз во всех столбцах."""
+        """Сдвигает все элементы вниз во всех столбцах; улегшиеся столбцы пропускаются."""
         for col in range(self.width.value):
-            self._drop_column(ColInt(col))   
+            if not self.is_column_settled(col):
+                self._drop_column(ColInt.of(col))
+        self._emit("drop")
 
-    @Printer.on("shuffle", Printer.PRINT_STEPS_FLAG)
     def shuffle(self):
         """Перемешивает все элементы на доске."""
         values = [self._cells[rc] for rc in self.rect]
-        shuffle(values)
+        self._rng.shuffle.shuffle(values)
         for i, rc in enumerate(self.rect):
-            self._cells[rc] = values[i]
+            self._update_rc(rc, values[i])
+        self._emit("shuffle")
     
+    def _try_place_permutation(self, values: list) -> RawGrid | None:
+        """Одна попытка: раскладывает values по полю снизу вверх, слева направо,
+        на каждом шаге выбирая случайный оставшийся камень, который не замыкает линию
+        с двумя соседями слева или снизу. None -- если зашли в тупик."""
+        h, w = self.height.value, self.width.value
+        counts: Dict[str, int] = {}
+        for value in values:
+            counts[value] = counts.get(value, 0) + 1
+        grid: RawGrid = [[NonStoneValues.EMPTY] * w for _ in range(h)]
+        for row in range(h):
+            for col in range(w):
+                allowed = [value for value, count in counts.items()
+                           if count > 0 and is_line_free_placement(grid, row, col, value)]
+                if not allowed:
+                    return None
+                value = self._rng.shuffle.choices(allowed, weights=[counts[v] for v in allowed])[0]
+                counts[value] -= 1
+                grid[row][col] = value
+        return grid
+
+    @Contract.on
+    def shuffle_playable(self, max_attempts: int | None = None) -> None:
+        """Перемешивает камни так, чтобы на поле не было готовых комбинаций
+        и был хотя бы один ход обменом.
+        Каждая попытка -- O(клеток); число попыток ограничено max_attempts и
+        сохраняется в last_shuffle_attempts. Если ни одна попытка не удалась,
+        остается обычная перестановка и статус WARN."""
+        max_attempts = self.SHUFFLE_MAX_ATTEMPTS if max_attempts is None else max_attempts
+        values = [value for row in self._cells.to_raw() for value in row]
+        grid = None
+        self._last_shuffle_attempts = 0
+        while self._last_shuffle_attempts < max_attempts:
+            self._last_shuffle_attempts += 1
+            candidate = self._try_place_permutation(values)
+            if candidate is not None and next(iter_swaps_raw(candidate), None) is not None:
+                grid = candidate
+                break
+        found = grid is not None
+        if not found:
+            self._rng.shuffle.shuffle(values)
+            w = self.width.value
+            grid = [values[row * w:(row + 1) * w] for row in range(self.height.value)]
+        for rc in self.rect:
+            self._update_rc(rc, grid[rc.row.value][rc.col.value])
+        self._emit("shuffle")
+        self.check_warn(found, "Не удалось получить перемешивание с ходом и без комбинаций")
+
+    @Contract.on
+    def generate_playable(self, min_swaps: int = 1, seed: int | None = None) -> None:
+        """Заполняет поле случайными камнями без комбинаций и хотя бы с min_swaps ходами обменом.
+        Одинаковый seed дает одинаковое поле; без seed используется поток начального поля (layout) rng поля.
+        Поток перемешивания не используется: иначе перемешивания при том же зерне повторяли бы генерацию.
+        Если столько ходов на поле не помещается -- статус WARN."""
+        self.check_pre(min_swaps >= 0, "min_swaps must be non-negative")
+        rng = self._rng.layout if seed is None else GameRng(seed).layout
+        grid, swaps_count = generate_playable_grid(self.height.value, self.width.value, min_swaps, rng)
+        self.from_raw(["".join(row) for row in grid])
+        self.check_warn(swaps_count >= min_swaps, "Не удалось разместить нужное количество ходов")
+
     def fill_empty_random(self):
         """Заполняет пустые ячейки случайными элементами."""
-        for rc in self.empty_cells:
-            self._update_rc(rc, random.choice(list(Stone)))
+        empty = list(self.empty_cells)
+        for rc, stone in zip(empty, self._rng.stones(len(empty))):
+            self._update_rc(rc, stone)
 
-    @Printer.on("fill line", Printer.PRINT_STEPS_FLAG)
     def fill_first_empty_layer_random(self):
         """Заполняет первую пустую ячейку в каждом столбце случайными элементами."""
-        for col in range(self.width.value):
-            for row in range(self.height.value):
-                if self.is_empty_cell(RC(RowInt(row), ColInt(col))):
-                    self._update_rc(RC(RowInt(row), ColInt(col)), random.choice(list(Stone)))
-                    break
+        h = self.height.value
+        targets = [RC(RowInt.of(row), ColInt.of(col)) for col, row in enumerate(self._heights) if row < h]
+        for rc, stone in zip(targets, self._rng.stones(len(targets))):
+            self._update_rc(rc, stone)
+        self._emit("fill line")
 
     def duplicate_rc(self, rc: RC, mask: Mask):
         """Дублирует элемент по всей маске."""
         value = self._cells[rc]
         self._update_mask(mask, value)
         
+    def fork(self) -> "Board":
+        """Дешевая копия поля: ячейки копируются построчно при записи, индекс -- несколько int.
+        Слушатель шагов не копируется: развилки считаются молча.
+        Случайность копируется: развилка пополняется так же, как оригинал."""
+        other = copy(self)
+        other._step_listener = None
+        other._journal = None
+        other._rng = self._rng.fork()
+        other._cells = self._cells.fork()
+        other._stone_index = dict(self._stone_index)
+        other._col_empty = list(self._col_empty)
+        other._heights = list(self._heights)
+        other._row_runs = list(self._row_runs)
+        other._col_runs = list(self._col_runs)
+        other._dirty_rows = set(self._dirty_rows)
+        other._dirty_cols = set(self._dirty_cols)
+        other._region_cache = dict(self._region_cache)
+        return other
+
     def reset(self) -> None:
         """Сбрасывает поле."""
         self._cells.clear()
+        self._rebuild_stone_index()
     
     @Contract.on
     def from_raw(self, stones_strings: list[str]):
-        new_cells = Cells(self.rect)
-        new_cells.from_raw(stones_strings)
-        self.check_pre(new_cells.is_OK, "Ошибка при создании Cells из массива строк")
-        self._cells = new_cells
+        # строки загружаются в те же Cells: codes_view/one_hot_view, взятые раньше, остаются действительными
+        self._cells.from_raw(stones_strings)
+        if not self._cells.is_OK:
+            return self.fail_pre("Ошибка при создании Cells из массива строк")
+        self._rebuild_stone_index()
         
     def __str__(self):
         ans = str(self._cells)
@@ -176,6 +550,29 @@ class GameBoardSettings:
     SCORES_PER_STONE = PositiveInt(50)
     SWAP_HINT_PREFIX = "Hint: "
 
+class MovePreview(NamedTuple):
+    """Возможный ход и его немедленный результат (без каскада).
+    bonus -- None для обычного хода обменом;
+    cells -- аргументы хода: ячейки обмена, опорная ячейка бонуса или пусто;
+    erase_size -- сколько ячеек будет стерто сразу; score_delta -- сколько очков это даст."""
+    bonus: Optional[Bonus]
+    cells: Tuple[TupleInt2, ...]
+    erase_size: int
+    score_delta: int
+
+class MoveResult(NamedTuple):
+    """Итог хода: стертые ячейки по всем шагам (включая каскад), число раундов каскада
+    (сколько раз стабилизация поля находила и стирала комбинацию) и прирост очков."""
+    erased: Tuple[TupleInt2, ...]
+    cascade_rounds: int
+    score_delta: int
+
+class CascadeStep(NamedTuple):
+    """Один раунд каскада: kind -- "erase" (стерли комбинацию и уронили камни) или "fill"
+    (пополнили нижние пустые ячейки столбцов); delta -- изменение поля за раунд."""
+    kind: str
+    delta: BoardDelta
+
 # первичные связи между полем, сундуком и статистикой (учет очков)
 # атомарные игровые механики
 
@@ -188,6 +585,13 @@ class GameBoard(Contract, GameBoardSettings):
         self._board = board
         self._chest = bonus_chest
         self._statistics = statistics
+        # кэш ходов обменом: (поле, версия поля, ходы)
+        self._swaps_cache: Optional[Tuple[Board, int, Tuple[SwapRaw, ...], frozenset]] = None
+        # учет текущего хода (см. begin_move / end_move)
+        self._move_erased: List[TupleInt2] = []
+        self._move_rounds = 0
+        self._move_start_scores = 0
+        self._move_snapshot: Optional[Tuple[BonusChest, Statistics]] = None
 
     # ЗАПРОСЫ
     @property
@@ -201,44 +605,168 @@ class GameBoard(Contract, GameBoardSettings):
         return self._board.height
 
     def has_empty_cells(self) -> bool:
-        return len(self._board.empty_cells) > 0
+        return self._board.empty_count > 0
+
+    def codes_view(self) -> memoryview:
+        """Коды камней поля без копирования, только для чтения (см. Cells.codes_view)."""
+        return self._board.codes_view()
+
+    def one_hot_view(self) -> memoryview:
+        """One-hot плоскости камней поля без копирования, только для чтения (см. Cells.one_hot_view)."""
+        return self._board.one_hot_view()
 
     def get_rc_combination_mask(self, rc: RC) -> Mask:
-        """Возвращает маску комбинации для заданной ячейки."""
-        # сортируем, чтобы не находил маленькую комбинацию перед большей
-        combination_values_sorted = sorted(COMBINATIONS.values(), key=len, reverse=True)
-        for combination in combination_values_sorted:
-            mask = Mask().from_raw(pivot_raw=rc.raw_repr, mask_raw=combination)
-            if len(mask) != len(combination):
-                continue
-            
-            are_equal = self._board.cells_are_equal(mask)
-            has_empty = self._board.has_empty_cell(mask)
-            if are_equal and not has_empty:
-                return mask
+        """Возвращает маску комбинации для заданной ячейки.
+        Комбинация определяется по сериям ячейки (Board.run_lengths), без построения масок:
+        берем первую (самую длинную) из COMBINATION_RUNS, которой хватает серий."""
+        return self._combination_at(rc.row.value, rc.col.value)
+
+    def _combination_at(self, row: int, col: int) -> Mask:
+        left, right, down, up = self._board.run_lengths_raw(row, col)
+        if left + right < 2 and down + up < 2:
+            return Mask()
+        for combination, (need_left, need_right, need_down, need_up) in COMBINATION_RUNS:
+            if left >= need_left and right >= need_right and down >= need_down and up >= need_up:
+                return Mask().from_raw(pivot_raw=(row, col), mask_raw=combination)
         return Mask()
 
     def is_chest_empty(self) -> bool:
         return all([self._chest.get_bonus_count(bonus) == 0 for bonus in Bonus])
     
+    def _compute_swaps_raw(self) -> Tuple[SwapRaw, ...]:
+        """Все ходы обменом на текущем поле.
+        Обычно на поле нет готовых линий -- тогда ход обменом корректен, только если
+        линия появляется через одну из двух ячеек. Если линии уже есть, проверяем
+        честно: после обмена на поле должна остаться или появиться линия."""
+        grid = self._board.to_raw()
+        if not has_line(grid):
+            return tuple(iter_swaps_raw(grid))
+        ans = []
+        h, w = len(grid), len(grid[0])
+        for row in range(h):
+            for col in range(w):
+                for n_row, n_col in ((row, col + 1), (row + 1, col)):
+                    if n_row >= h or n_col >= w:
+                        continue
+                    if NonStoneValues.EMPTY in (grid[row][col], grid[n_row][n_col]):
+                        continue
+                    grid[row][col], grid[n_row][n_col] = grid[n_row][n_col], grid[row][col]
+                    if has_line(grid):
+                        ans.append(((row, col), (n_row, n_col)))
+                    grid[row][col], grid[n_row][n_col] = grid[n_row][n_col], grid[row][col]
+        return tuple(ans)
+
+    def _swaps_raw(self) -> Tuple[Tuple[SwapRaw, ...], frozenset]:
+        """Ходы обменом, вычисленные один раз на версию поля."""
+        cache = self._swaps_cache
+        if cache is None or cache[0] is not self._board or cache[1] != self._board.version:
+            swaps = self._compute_swaps_raw()
+            cache = (self._board, self._board.version, swaps, frozenset(swaps))
+            self._swaps_cache = cache
+        return cache[2], cache[3]
+
+    @property
+    def legal_swaps(self) -> List[Tuple[RC, RC]]:
+        """Все корректные ходы обменом (каждая пара один раз)."""
+        swaps, _ = self._swaps_raw()
+        return [(RC(RowInt.of(r1), ColInt.of(c1)), RC(RowInt.of(r2), ColInt.of(c2)))
+                for (r1, c1), (r2, c2) in swaps]
+
+    @property
+    def legal_swap_arrays(self) -> Tuple[BoundedIntArray, BoundedIntArray]:
+        """Ходы обменом пачкой: строки (RowInt) и столбцы (ColInt) ячеек, по две на ход;
+        view(2) -- таблица ходов без копирования."""
+        swaps, _ = self._swaps_raw()
+        rows = RowInt.array(row for pair in swaps for row, _ in pair)
+        cols = ColInt.array(col for pair in swaps for _, col in pair)
+        return rows, cols
+
     @property
     def has_smart_swap(self) -> bool:
-        for rc1 in self._board.non_empty_cells:
-            for rc2 in self._board.non_empty_cells:
-                if self.is_smart_swap_correct(rc1, rc2):
-                    return True
-        return False
+        swaps, _ = self._swaps_raw()
+        return len(swaps) > 0
     
     @Contract.on
     def find_smart_swap(self) -> Tuple[RC, RC]:
-        self.check_pre(self.has_smart_swap) 
-        for rc1 in self._board.non_empty_cells:
-            for rc2 in self._board.non_empty_cells:
-                if self.is_smart_swap_correct(rc1, rc2):
-                    return (rc1, rc2)
-        self.check_post(False, "Ходов обмена нет, но эта функция не должна это проверять!")
-        return None, None
+        if not self.has_smart_swap:
+            return self.fail_pre()
+        return self.legal_swaps[0]
     
+    def _swap_preview_raw(self, grid: RawGrid, rc1: TupleInt2, rc2: TupleInt2, board_has_line: bool) -> int:
+        """Размер комбинации, которая будет стерта сразу после обмена (поле не меняется).
+        На поле без линий ищем только вокруг двух ячеек обмена."""
+        (r1, c1), (r2, c2) = rc1, rc2
+        grid[r1][c1], grid[r2][c2] = grid[r2][c2], grid[r1][c1]
+        if board_has_line:
+            size = len(longest_combination_raw(grid))
+        elif has_line_at(grid, r1, c1) or has_line_at(grid, r2, c2):
+            size = len(longest_combination_raw(grid, (rc1, rc2)))
+        else:
+            size = 0
+        grid[r1][c1], grid[r2][c2] = grid[r2][c2], grid[r1][c1]
+        return size
+
+    def _bonus_preview(self, bonus: Bonus, cells: Tuple[TupleInt2, ...], erase_size: int) -> MovePreview:
+        return MovePreview(bonus, cells, erase_size,
+                           self.BONUS_SCORES.value + self.SCORES_PER_STONE.value * erase_size)
+
+    def legal_moves(self, swap_bonus_filter: bool = False) -> List[MovePreview]:
+        """Все возможные ходы за один проход: обмены и применения бонусов из сундука,
+        с немедленным результатом каждого. Все ходы считаются на одном снимке поля,
+        без копирования игры на каждый ход.
+        Для бонуса SWAP перечисляются все пары, которые принимает swap (обе ячейки не пусты),
+        в том числе с erase_size 0; swap_bonus_filter -- только пары, после обмена которых
+        сразу есть что стереть."""
+        grid = self._board.to_raw()
+        h, w = len(grid), len(grid[0])
+        board_has_line = has_line(grid)
+        per_stone = self.SCORES_PER_STONE.value
+        moves: List[MovePreview] = []
+
+        swaps, _ = self._swaps_raw()
+        for rc1, rc2 in swaps:
+            size = self._swap_preview_raw(grid, rc1, rc2, board_has_line)
+            moves.append(MovePreview(None, (rc1, rc2), size, per_stone * size))
+
+        if self.can_use_bonus(Bonus.ROW):
+            for row in range(h):
+                size = erase_bonus_bitmask(EraseMaskBonus.ROW, (row, 0)).popcount
+                moves.append(self._bonus_preview(Bonus.ROW, ((row, 0),), size))
+        if self.can_use_bonus(Bonus.COL):
+            for col in range(w):
+                size = erase_bonus_bitmask(EraseMaskBonus.COL, (0, col)).popcount
+                moves.append(self._bonus_preview(Bonus.COL, ((0, col),), size))
+        if self.can_use_bonus(Bonus.CROSS):
+            for row in range(h):
+                for col in range(w):
+                    size = erase_bonus_bitmask(EraseMaskBonus.CROSS, (row, col)).popcount
+                    moves.append(self._bonus_preview(Bonus.CROSS, ((row, col),), size))
+        if self.can_use_bonus(Bonus.ALL):
+            size = erase_bonus_bitmask(EraseMaskBonus.ALL, (0, 0)).popcount
+            moves.append(self._bonus_preview(Bonus.ALL, (), size))
+        if self.can_use_bonus(Bonus.BRUSH):
+            for stone in Stone:
+                stone_mask = self._board.find_by_value(stone)
+                if not stone_mask.is_empty:
+                    pivot = next(iter(stone_mask)).raw_repr
+                    moves.append(self._bonus_preview(Bonus.BRUSH, (pivot,), len(stone_mask)))
+        if self.can_use_bonus(Bonus.SHUFFLE):
+            moves.append(self._bonus_preview(Bonus.SHUFFLE, (), 0))
+        if self.can_use_bonus(Bonus.SWAP):
+            cells = [(row, col) for row in range(h) for col in range(w)
+                     if grid[row][col] != NonStoneValues.EMPTY]
+            # обмен одинаковых камней поле не меняет: стирается только то, что уже было
+            same_size = len(longest_combination_raw(grid)) if board_has_line else 0
+            for i, rc1 in enumerate(cells):
+                for rc2 in cells[i + 1:]:
+                    if grid[rc1[0]][rc1[1]] == grid[rc2[0]][rc2[1]]:
+                        size = same_size
+                    else:
+                        size = self._swap_preview_raw(grid, rc1, rc2, board_has_line)
+                    if size > 0 or not swap_bonus_filter:
+                        moves.append(self._bonus_preview(Bonus.SWAP, (rc1, rc2), size))
+        return moves
+
     def has_combination(self, rc: RC) -> bool:
         """Проверяет наличие комбинации в заданной ячейке."""
         return not self.get_rc_combination_mask(rc).is_empty
@@ -246,9 +774,10 @@ class GameBoard(Contract, GameBoardSettings):
     def find_combination_mask(self) -> Mask:
         """Находит самую длинную комбинацию на поле."""
         ans = Mask()
-        for rc in self._board.non_empty_cells:
-            mask = self.get_rc_combination_mask(rc)
-            ans = mask if len(ans) < len(mask) else ans
+        for row in range(self._board.height.value):
+            for col in range(self._board.width.value):
+                mask = self._combination_at(row, col)
+                ans = mask if len(ans) < len(mask) else ans
         return ans
     
     def can_use_bonus(self, bonus: Bonus) -> bool:
@@ -267,35 +796,50 @@ class GameBoard(Contract, GameBoardSettings):
             return False
         if abs(rc1.row.value - rc2.row.value) + abs(rc1.col.value - rc2.col.value) != 1:
             return False
-        
-        board_copy = deepcopy(self)
-        board_copy._board.swap(rc1, rc2)
-        mask = board_copy.find_combination_mask()
-        return not mask.is_empty
+        _, swaps_set = self._swaps_raw()
+        return (rc1.raw_repr, rc2.raw_repr) in swaps_set or (rc2.raw_repr, rc1.raw_repr) in swaps_set
     
     @Contract.on
     def brush_mask(self, rc: RC) -> Mask:
         """Применяет кисть - стирает элементы того же цвета"""
-        self.check_pre(not self._board.is_empty_cell(rc), "Нельзя удалять пустую ячейку")
+        if self._board.is_empty_cell(rc):
+            return self.fail_pre("Нельзя удалять пустую ячейку")
         return self._board.find_equals(rc)
     
     # === КОМАНДЫ ===
     
     def process(self):
+        """Каскад целиком: падение, стирание комбинаций и пополнение, пока поле не устоится."""
+        for _ in self.cascade():
+            pass
+
+    def cascade(self) -> Iterator[CascadeStep]:
+        """Каскад по раундам: генератор отдает управление после каждого раунда
+        (стирание с падением или пополнение) вместе с изменением поля за раунд.
+        Начальное падение входит в первый раунд. Порядок раундов тот же, что у process."""
+        snapshot = self._board.index_snapshot()
         self.drop()
         combination_mask: Mask = self.find_combination_mask()
         while len(combination_mask) > 0 or self.has_empty_cells():
-            while len(combination_mask) > 0:
+            if len(combination_mask) > 0:
+                if self.in_move:  # MoveResult.cascade_rounds -- только раунды этого хода
+                    self._move_rounds += 1
                 self.erase_mask(combination_mask)
                 self.drop()
-                combination_mask = self.find_combination_mask()
-            self.fill_line()
+                kind = "erase"
+            else:
+                self.fill_line()
+                kind = "fill"
             combination_mask = self.find_combination_mask()
+            delta = self._board.delta_since(snapshot)
+            snapshot = self._board.index_snapshot()
+            yield CascadeStep(kind, delta)
                 
     @Contract.on
     def use_bonus(self, bonus: Bonus) -> None:
         """Использует бонус и начисляет очки."""
-        self.check_pre(self.can_use_bonus(bonus), "Невозможно использовать бонус " + str(bonus))
+        if not self.can_use_bonus(bonus):
+            return self.fail_pre("Невозможно использовать бонус " + str(bonus))
         self._chest.use_bonus(bonus)
         self._statistics.increase_scores(self.BONUS_SCORES)
         self._statistics.use_bonus(bonus)
@@ -309,25 +853,76 @@ class GameBoard(Contract, GameBoardSettings):
     def erase_mask(self, mask: Mask) -> None:
         """Удаляет маску, начисляет очки, роняет камни и заполняет верхний ряд."""
         self._board.erase_mask(mask)  # стерли
+        if self.in_move:  # учет только внутри хода: вне хода список рос бы без конца
+            self._move_erased.extend(rc.raw_repr for rc in mask)
         scores = PositiveInt(self.SCORES_PER_STONE.value * len(mask))  # посчитали очки
         self._statistics.increase_scores(scores)  # увеличили счёт
         
     @Contract.on
     def swap(self, rc1: RC, rc2: RC) -> None:
         """Меняет местами два элемента с проверкой корректности."""
-        self.check_pre(self.is_swap_correct(rc1, rc2), "Некорректный обмен")
+        if not self.is_swap_correct(rc1, rc2):
+            return self.fail_pre("Некорректный обмен")
         self._board.swap(rc1, rc2)
     
     @Contract.on
     def smart_swap(self, rc1: RC, rc2: RC) -> None:
         """Умный обмен двух элементов с проверкой корректности."""
-        self.check_pre(self.is_smart_swap_correct(rc1, rc2), "Некорректный умный обмен")
+        if not self.is_smart_swap_correct(rc1, rc2):
+            return self.fail_pre("Некорректный умный обмен")
         self._board.swap(rc1, rc2)
             
     def shuffle(self) -> None:
-        """Перемешивает все элементы на поле."""
-        self._board.shuffle()
+        """Перемешивает все элементы на поле: без готовых комбинаций и с хотя бы одним ходом."""
+        self._board.shuffle_playable()
+
+    # ХОД КАК ТРАНЗАКЦИЯ
+    # поле ведет журнал измененных ячеек, сундук и статистика запоминаются копиями при записи --
+    # откат стоит столько, сколько изменилось за ход, а не размер поля
+    @property
+    def in_move(self) -> bool:
+        return self._move_snapshot is not None
+
+    def begin_move(self) -> None:
+        """Начинает ход: учет стертых ячеек, раундов каскада и очков, журнал для отката."""
+        self._move_erased = []
+        self._move_rounds = 0
+        self._move_start_scores = self._statistics.get_scores().value
+        self._board.begin_journal()
+        self._move_snapshot = (self._chest.fork(), self._statistics.fork())
+
+    def end_move(self) -> MoveResult:
+        """Принимает ход; итог хода с момента begin_move."""
+        self._board.commit_journal()
+        self._move_snapshot = None
+        return MoveResult(tuple(self._move_erased), self._move_rounds,
+                          self._statistics.get_scores().value - self._move_start_scores)
+
+    def rollback_move(self) -> None:
+        """Отменяет начатый ход: поле, сундук и статистика -- как до begin_move."""
+        if self._move_snapshot is None:
+            return
+        chest, statistics = self._move_snapshot
+        self._move_snapshot = None
+        self._board.rollback_journal()
+        self._chest.restore(chest)
+        self._statistics.restore(statistics)
+        self._move_erased = []
+        self._move_rounds = 0
+
+    def _repair_post(self):
+        self.rollback_move()
     
+    def fork(self) -> "GameBoard":
+        """Дешевая развилка состояния: поле, сундук и статистика копируются только при записи."""
+        other = copy(self)
+        other._board = self._board.fork()
+        other._chest = self._chest.fork()
+        other._statistics = self._statistics.fork()
+        other._move_erased = list(self._move_erased)
+        other._move_snapshot = None
+        return other
+
     def reset(self) -> None:
         """Сбрасывает игру."""
         super()._reset()
@@ -0,0 +1,80 @@
+from __future__ import annotations
+import sys
+from typing import List, Optional, TextIO
+
+
+class BoardRenderer:
+    """Вывод кадров (поле, сундук, статистика) в консоль.
+
+    Если поток -- терминал, кадр закрепляется вверху экрана, а ниже него
+    (в области прокрутки) идут приглашение и сообщения. Последний кадр хранится,
+    и при следующем выводе перерисовываются только изменившиеся строки.
+    Если поток не терминал (файл, канал) -- каждый кадр выводится целиком.
+    """
+    CSI = "\x1b["
+    SAVE_CURSOR = "\x1b7"
+    RESTORE_CURSOR = "\x1b8"
+    CLEAR_SCREEN = CSI + "2J" + CSI + "H"
+    CLEAR_LINE = CSI + "2K"
+    RESET_SCROLL_REGION = CSI + "r"
+
+    def __init__(self, stream: Optional[TextIO] = None, incremental: Optional[bool] = None):
+        self._stream = stream if stream is not None else sys.stdout
+        if incremental is None:
+            isatty = getattr(self._stream, "isatty", None)
+            incremental = bool(isatty and isatty())
+        self._incremental = incremental
+        self._last_frame: List[str] = []
+
+    @property
+    def is_incremental(self) -> bool:
+        return self._incremental
+
+    @property
+    def last_frame(self) -> List[str]:
+        return list(self._last_frame)
+
+    def _move_to(self, line: int) -> str:
+        return f"{self.CSI}{line + 1};1H"
+
+    def _full_frame(self, lines: List[str]) -> str:
+        """Полная перерисовка: кадр вверху экрана, ниже -- область прокрутки."""
+        out = [self.RESET_SCROLL_REGION, self.CLEAR_SCREEN]
+        out.append("\n".join(lines))
+        out.append(f"{self.CSI}{len(lines) + 1}r")
+        out.append(self._move_to(len(lines)))
+        return "".join(out)
+
+    def _changed_rows(self, lines: List[str]) -> str:
+        """Только изменившиеся строки, курсор возвращается на место."""
+        out = []
+        for i, (old, new) in enumerate(zip(self._last_frame, lines)):
+            if old != new:
+                out.append(self._move_to(i) + self.CLEAR_LINE + new)
+        if not out:
+            return ""
+        return self.SAVE_CURSOR + "".join(out) + self.RESTORE_CURSOR
+
+    def render(self, frame: str) -> None:
+        """Выводит кадр (многострочную строку)."""
+        lines = frame.rstrip("\n").split("\n")
+        if not self._incremental:
+            self._stream.write("\n".join(lines) + "\n")
+        elif len(lines) != len(self._last_frame):
+            self._stream.write(self._full_frame(lines))
+        else:
+            self._stream.write(self._changed_rows(lines))
+        self._stream.flush()
+        self._last_frame = lines
+
+    def invalidate(self) -> None:
+        """Забыть последний кадр: следующий будет выведен целиком."""
+        self._last_frame = []
+
+    def close(self) -> None:
+        """Вернуть терминалу обычную прокрутку."""
+        if self._incremental and self._last_frame:
+            # курсор -- в самый низ экрана, под накопленные сообщения
+            self._stream.write(self.RESET_SCROLL_REGION + f"{self.CSI}999;1H" + "\n")
+            self._stream.flush()
+        self.invalidate()
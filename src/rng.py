@@ -0,0 +1,92 @@
+from __future__ import annotations
+import random
+from copy import copy
+from typing import Dict, List, Set, Tuple
+from base import Stone
+
+
+class GameRng:
+    """Случайность одной игры: отдельные потоки для пополнения поля (refill),
+    перемешивания (shuffle), раздачи бонусов (bonus) и начального поля (layout).
+
+    Потоки выводятся из одного зерна, поэтому одинаковое зерно -- одинаковая игра,
+    а расход одного потока не сдвигает остальные. Глобальный модуль random не используется,
+    так что параллельные симуляции друг другу не мешают.
+    Камни для пополнения генерируются пачками: буфер байтов-номеров камня в STONES.
+    """
+    STONES: Tuple[Stone, ...] = tuple(Stone)
+    STONE_BUFFER_SIZE = 256
+    # layout выводится последним: прежние потоки при том же зерне не меняются
+    STREAMS: Tuple[str, ...] = ("refill", "shuffle", "bonus", "layout")
+
+    def __init__(self, seed: int | None = None):
+        root = random.Random(seed)
+        self._seed = seed
+        self._streams: Dict[str, random.Random] = {name: random.Random(root.getrandbits(64)) for name in self.STREAMS}
+        self._owned: Set[str] = set(self.STREAMS)
+        self._stone_buffer = b""
+        self._stone_pos = 0
+
+    # === КОПИРОВАНИЕ ПРИ ОБРАЩЕНИИ ===
+    # после fork потоки общие у обеих копий; поток копируется (getstate/setstate) при первом обращении к нему
+    def _stream(self, name: str) -> random.Random:
+        stream = self._streams[name]
+        if name not in self._owned:
+            stream = random.Random()
+            stream.setstate(self._streams[name].getstate())
+            self._streams[name] = stream
+            self._owned.add(name)
+        return stream
+
+    @property
+    def refill(self) -> random.Random:
+        return self._stream("refill")
+
+    @property
+    def shuffle(self) -> random.Random:
+        return self._stream("shuffle")
+
+    @property
+    def bonus(self) -> random.Random:
+        return self._stream("bonus")
+
+    @property
+    def layout(self) -> random.Random:
+        return self._stream("layout")
+
+    @property
+    def seed(self) -> int | None:
+        return self._seed
+
+    def _refill_stone_buffer(self) -> None:
+        self._stone_buffer = bytes(self.refill.choices(range(len(self.STONES)), k=self.STONE_BUFFER_SIZE))
+        self._stone_pos = 0
+
+    def next_stone(self) -> Stone:
+        """Следующий камень для пополнения поля."""
+        if self._stone_pos >= len(self._stone_buffer):
+            self._refill_stone_buffer()
+        stone = self.STONES[self._stone_buffer[self._stone_pos]]
+        self._stone_pos += 1
+        return stone
+
+    def stones(self, count: int) -> List[Stone]:
+        """count камней для пополнения подряд (срезами буфера, а не по одному)."""
+        ans: List[Stone] = []
+        stones = self.STONES
+        while len(ans) < count:
+            if self._stone_pos >= len(self._stone_buffer):
+                self._refill_stone_buffer()
+            end = min(len(self._stone_buffer), self._stone_pos + count - len(ans))
+            ans.extend(stones[index] for index in self._stone_buffer[self._stone_pos:end])
+            self._stone_pos = end
+        return ans
+
+    def fork(self) -> GameRng:
+        """Независимая копия с тем же будущим: развилка игры повторяет случайность оригинала.
+        O(1): потоки копируются только при первом обращении (в копии или в оригинале)."""
+        other = copy(self)
+        other._streams = dict(self._streams)
+        self._owned = set()
+        other._owned = set()
+        return other
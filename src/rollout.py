@@ -0,0 +1,94 @@
+"""Оценка ходов (в первую очередь бонусов) методом Монте-Карло.
+
+Для каждого хода-кандидата играется много коротких "слепых" партий с разными
+зернами пополнения поля (у каждой партии своя GameRng, глобальный random не трогается); результат -- средний итоговый счет и доверительный интервал.
+Партии разных кандидатов разносятся по процессам.
+"""
+from __future__ import annotations
+import random
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist, fmean, stdev
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from game_board import MovePreview
+from simple_game import SimpleGame, SimpleGameFactory, GameState
+
+
+class RolloutEstimate(NamedTuple):
+    """Оценка хода: средний итоговый счет и границы доверительного интервала."""
+    move: MovePreview
+    mean: float
+    low: float
+    high: float
+    samples: int
+
+
+def play_rollout(state: GameState, move: MovePreview, seed: int, horizon: int) -> int:
+    """Одна партия: ход-кандидат, затем до horizon случайных ходов обменом.
+    Пополнение поля и выбор ходов зависят только от seed. Возвращает итоговый счет."""
+    rng = random.Random(seed)
+    game = SimpleGameFactory.create_from_state(state, seed)
+    game.play(move)
+    for step in range(horizon):
+        swaps = game.hints()
+        if not swaps:
+            break
+        game.smart_swap_move(*rng.choice(swaps))
+    return game.scores
+
+
+def _run_rollouts(state: GameState, move: MovePreview, seeds: Sequence[int], horizon: int) -> List[int]:
+    """Пачка партий для одного кандидата."""
+    return [play_rollout(state, move, seed, horizon) for seed in seeds]
+
+
+class RolloutEvaluator:
+    """Оценщик ходов по случайным партиям.
+    rollouts -- партий на кандидата, horizon -- ходов обменом после кандидата,
+    workers -- число процессов (1 -- в текущем процессе), confidence -- уровень интервала.
+    Все кандидаты играются на одних и тех же зернах, поэтому их оценки сравнимы
+    при меньшем числе партий."""
+    DEFAULT_ROLLOUTS = 64
+    DEFAULT_HORIZON = 10
+    DEFAULT_CONFIDENCE = 0.95
+
+    def __init__(self, rollouts: int = DEFAULT_ROLLOUTS, horizon: int = DEFAULT_HORIZON,
+                 workers: Optional[int] = None, seed: int = 0, confidence: float = DEFAULT_CONFIDENCE):
+        if rollouts < 1 or horizon < 0 or not 0 < confidence < 1:
+            raise ValueError("Некорректные параметры оценщика")
+        self._rollouts = rollouts
+        self._horizon = horizon
+        self._workers = workers
+        self._seed = seed
+        self._z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+    @property
+    def seeds(self) -> Tuple[int, ...]:
+        return tuple(self._seed * self._rollouts + i for i in range(self._rollouts))
+
+    def _estimate(self, move: MovePreview, scores: List[int]) -> RolloutEstimate:
+        mean = fmean(scores)
+        half = self._z * stdev(scores) / len(scores) ** 0.5 if len(scores) > 1 else 0.0
+        return RolloutEstimate(move, mean, mean - half, mean + half, len(scores))
+
+    def evaluate(self, game: SimpleGame, moves: Optional[Sequence[MovePreview]] = None) -> List[RolloutEstimate]:
+        """Оценки ходов в порядке убывания среднего счета.
+        По умолчанию оцениваются все применения бонусов из game.legal_moves(), для SWAP --
+        только пары, которые сразу что-то стирают (каждый ход -- это rollouts партий)."""
+        if moves is None:
+            moves = [move for move in game.legal_moves(swap_bonus_filter=True) if move.bonus is not None]
+        state = game.to_state()
+        seeds = self.seeds
+        if self._workers == 1:
+            results = [_run_rollouts(state, move, seeds, self._horizon) for move in moves]
+        else:
+            with ProcessPoolExecutor(max_workers=self._workers) as executor:
+                futures = [executor.submit(_run_rollouts, state, move, seeds, self._horizon) for move in moves]
+                results = [future.result() for future in futures]
+        estimates = [self._estimate(move, scores) for move, scores in zip(moves, results)]
+        return sorted(estimates, key=lambda estimate: estimate.mean, reverse=True)
+
+    def best_move(self, game: SimpleGame, moves: Optional[Sequence[MovePreview]] = None) -> Optional[RolloutEstimate]:
+        """Ход с наибольшим средним счетом или None, если оценивать нечего."""
+        estimates = self.evaluate(game, moves)
+        return estimates[0] if estimates else None
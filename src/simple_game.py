@@ -1,18 +1,38 @@
 from __future__ import annotations
-from random import random, choice, randint
-from copy import deepcopy
-from typing import Callable
-from game_board import GameBoard, Bonus, EraseMaskBonus, ERASE_BONUS_MASKS, Board
-from combinations import RC, Mask
-from contract import Contract
-from base import RowInt, ColInt, Printer, PrinterConstants
+from random import randint
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Tuple
+from game_board import GameBoard, Bonus, EraseMaskBonus, Board, MovePreview, MoveResult, StepListener
+from combinations import RC, erase_bonus_bitmask
+from contract import Contract, ContractErrPreException, ContractErrPostException
+from base import RowInt, ColInt, PositiveInt
 from cells import BonusChest, Statistics
+from rng import GameRng
+
+# сырое состояние игры: строки поля, число бонусов каждого типа (в порядке Bonus), очки
+GameState = Tuple[Tuple[str, ...], Tuple[int, ...], int]
 
 class SimpleGame(Contract):
-    """Игровая логика с ходами и бонусами."""
+    """Игровая логика с ходами и бонусами.
+    Игра ничего не печатает: ход возвращает MoveResult, а промежуточные шаги поля
+    получает слушатель (set_step_listener). Отрисовка -- дело интерфейса."""
+    # ходы с бонусами по типу бонуса (для GameBoard.legal_moves)
+    BONUS_MOVES: Dict[Bonus, str] = {
+        Bonus.ROW: "erase_row_move",
+        Bonus.COL: "erase_col_move",
+        Bonus.ALL: "erase_all_move",
+        Bonus.CROSS: "erase_cross_move",
+        Bonus.BRUSH: "brush_move",
+        Bonus.SWAP: "swap_bonus_move",
+        Bonus.SHUFFLE: "shuffle_move",
+    }
+
     def __init__(self, game_board: GameBoard):
+        super().__init__()
         self._game_board = game_board
         self._is_print_substeps = False
+        self._step_listener: Optional[StepListener] = None
+        self._last_result: Optional[MoveResult] = None
         
     # запросы
     # TODO -- тоже криво, по уму нужно General и Any
@@ -20,81 +40,119 @@ class SimpleGame(Contract):
     def is_print_substeps(self) -> bool:
         return self._is_print_substeps
         
+    @property
+    def last_result(self) -> Optional[MoveResult]:
+        """Итог последнего успешного хода."""
+        return self._last_result
+
     # КОМАНДЫ
+    def set_step_listener(self, listener: Optional[StepListener]) -> None:
+        """Слушатель промежуточных шагов поля (стирание, падение, заполнение, перемешивание)."""
+        self._step_listener = listener
+        self._game_board._board.set_step_listener(listener)
+
     def set_is_print_substeps(self, value: bool):
         """Устанавливает значение для печати подшагов при стабилизации."""
         self._is_print_substeps = value
         
     def from_other(self, other: SimpleGame):
-        self._game_board = deepcopy(other._game_board)
+        self._game_board = other._game_board.fork()
         self._is_print_substeps = other._is_print_substeps
+        self._game_board._board.set_step_listener(self._step_listener)
+        self._last_result = None
+
+    def _finish_move(self) -> MoveResult:
+        self._last_result = self._game_board.end_move()
+        return self._last_result
+
+    def _check_step(self) -> None:
+        """Шаг хода на GameBoard не удался -- ход прерывается (и откатывается в _repair_post).
+        Это ход выполнения, а не проверка контракта: работает во всех режимах ContractMonitor."""
+        game_board = self._game_board
+        if game_board.is_OK:
+            return
+        # сообщение GameBoard уже с префиксом статуса: передаем исходный текст, префикс добавит исключение
+        exception = ContractErrPostException if game_board.is_BROKEN else ContractErrPreException
+        message = game_board.message
+        prefix = str(exception())
+        raise exception(message[len(prefix):] if message.startswith(prefix) else message)
+
+    def _repair_post(self):
+        """Ход прерван посреди изменений: поле, сундук и статистика возвращаются к началу хода."""
+        self._game_board.rollback_move()
     
    
     def bonus_move(bonus: Bonus):
         """Декоратор для ходов с использованием бонусов."""
         def decorator(func: Callable) -> Callable:
             @Contract.on
+            @wraps(func)
             def inner(self, *args, **kwargs):
-                self.check_pre(self._game_board.can_use_bonus(bonus), f"Нет бонусов {bonus}")
-                self._game_board.use_bonus(bonus)  
-                result = func(self, *args, **kwargs)
+                if not self._game_board.can_use_bonus(bonus):
+                    return self.fail_pre(f"Нет бонусов {bonus}")
+                self._game_board.begin_move()
+                self._game_board.use_bonus(bonus)
+                self._check_step()
+                func(self, *args, **kwargs)
+                self._check_step()
                 self._game_board.process()
-                print("current:\n",self._game_board, sep="")
-                return result
+                return self._finish_move()
             return inner
         return decorator
     
     @Contract.on
-    @Printer.on("Board", PrinterConstants.PRINT_BOARD_FLAG)
-    def smart_swap_move(self, rc1: RC, rc2: RC) -> None:
+    def smart_swap_move(self, rc1: RC, rc2: RC) -> MoveResult:
         """Ход обмена двух элементов."""
-        is_correct = self._game_board.is_smart_swap_correct(rc1, rc2)
-        self.check_pre(is_correct, f"Некорректный ход обмена {rc1} {rc2}")
+        if not self._game_board.is_smart_swap_correct(rc1, rc2):
+            return self.fail_pre(f"Некорректный ход обмена {rc1} {rc2}")
+        self._game_board.begin_move()
         self._game_board.smart_swap(rc1, rc2)
+        self._check_step()
         self._game_board.process()
+        return self._finish_move()
     
     @Contract.on
-    @Printer.on("Board", PrinterConstants.PRINT_BOARD_FLAG)
-    def auto_swap_move(self) -> None:
+    def auto_swap_move(self) -> MoveResult:
         """Автоматический ход обменом."""
-        self.check_pre(self._game_board.has_smart_swap, "Нет возможных ходов обмена")
+        if not self._game_board.has_smart_swap:
+            return self.fail_pre("Нет возможных ходов обмена")
         rc1, rc2 = self._game_board.find_smart_swap()
+        self._game_board.begin_move()
         self._game_board.smart_swap(rc1, rc2)
+        self._check_step()
         self._game_board.process()
+        return self._finish_move()
 
     @bonus_move(Bonus.ROW)
     def erase_row_move(self, rc: RC) -> None:
         """Ход удаления строки."""
-        mask_raw = ERASE_BONUS_MASKS[EraseMaskBonus.ROW]
-        mask = Mask().from_raw(rc.raw_repr, mask_raw)
+        mask = erase_bonus_bitmask(EraseMaskBonus.ROW, rc.raw_repr)
         self._game_board.erase_mask(mask)
 
     @bonus_move(Bonus.COL)
     def erase_col_move(self, rc: RC) -> None:
         """Ход удаления столбца."""
-        mask_raw = ERASE_BONUS_MASKS[EraseMaskBonus.COL]
-        mask = Mask().from_raw(rc.raw_repr, mask_raw)
+        mask = erase_bonus_bitmask(EraseMaskBonus.COL, rc.raw_repr)
         self._game_board.erase_mask(mask)
 
     @bonus_move(Bonus.ALL)
     def erase_all_move(self) -> None:
         """Ход удаления всего поля."""
-        mask_raw = ERASE_BONUS_MASKS[EraseMaskBonus.ALL]
-        mask = Mask().from_raw((0, 0), mask_raw)
+        mask = erase_bonus_bitmask(EraseMaskBonus.ALL, (0, 0))
         self._game_board.erase_mask(mask)
 
     @bonus_move(Bonus.CROSS)
     def erase_cross_move(self, rc: RC) -> None:
         """Ход удаления креста (строка + столбец)."""
-        mask_raw = ERASE_BONUS_MASKS[EraseMaskBonus.CROSS]
-        mask = Mask()
-        mask.from_raw(rc.raw_repr, mask_raw)
+        mask = erase_bonus_bitmask(EraseMaskBonus.CROSS, rc.raw_repr)
         self._game_board.erase_mask(mask)
 
     @bonus_move(Bonus.BRUSH)
     def brush_move(self, rc: RC) -> None:
         """Ход кисти."""
         mask = self._game_board.brush_mask(rc)
+        # неудача brush_mask уже закрыла журнал хода (GameBoard._repair_post): дальше писать нельзя
+        self._check_step()
         self._game_board.erase_mask(mask)
 
     @bonus_move(Bonus.SWAP)
@@ -109,8 +167,34 @@ class SimpleGame(Contract):
     
     @property
     def is_gameover(self) -> bool:
-        return not self._game_board.has_smart_swap and self._game_board.is_chest_empty
+        return not self._game_board.has_smart_swap and self._game_board.is_chest_empty()
+
+    def hints(self) -> List[Tuple[RC, RC]]:
+        """Подсказки: все возможные ходы обменом (из кэша поля)."""
+        return self._game_board.legal_swaps
     
+    def legal_moves(self, swap_bonus_filter: bool = False) -> List[MovePreview]:
+        """Все возможные ходы (обмены и бонусы) с немедленным результатом (см. GameBoard.legal_moves)."""
+        return self._game_board.legal_moves(swap_bonus_filter)
+
+    def play(self, move: MovePreview) -> Optional[MoveResult]:
+        """Сделать ход из перечня legal_moves."""
+        rcs = [RC(RowInt(row), ColInt(col)) for row, col in move.cells]
+        if move.bonus is None:
+            return self.smart_swap_move(*rcs)
+        return getattr(self, self.BONUS_MOVES[move.bonus])(*rcs)
+
+    @property
+    def scores(self) -> int:
+        return self._game_board._statistics.get_scores().value
+
+    def to_state(self) -> GameState:
+        """Сырое состояние игры (можно передать в другой процесс)."""
+        chest = self._game_board._chest
+        return (tuple(self._game_board._board.to_raw()),
+                tuple(chest.get_bonus_count(bonus) for bonus in Bonus),
+                self.scores)
+
     def accept(self, command: 'GameCommand') -> None:
         """Принять команду."""
         command.visit(self)
@@ -124,10 +208,53 @@ class SimpleGame(Contract):
 
 class SimpleGameFactory:
     """Фабрика для создания игровых компонентов."""
+    START_BONUS_COUNT = 15
+    START_MIN_SWAPS = 3
+    
+    @staticmethod
+    def create_game(seed: int | None = None) -> SimpleGame:
+        """игра по умолчанию: случайное поле без комбинаций, с ходами, и 15 случайных бонусов"""
+        return SimpleGameFactory.create_random_game(seed)
+
+    @staticmethod
+    def create_random_game(seed: int | None = None, min_swaps: int = START_MIN_SWAPS) -> SimpleGame:
+        """Случайная игра; одинаковый seed -- одинаковые поле, сундук и пополнение поля."""
+        rng = GameRng(seed)
+        board = Board(rng=rng)
+        # поле -- из потока layout того же rng: второй GameRng(seed) не нужен
+        board.generate_playable(min_swaps)
+        bonus_chest = SimpleGameFactory._random_chest(rng)
+        statistics = Statistics()
+        game_board = GameBoard(board, bonus_chest, statistics)
+        return SimpleGame(game_board)
     
     @staticmethod
-    def create_game() -> SimpleGame:
-        """игра по умолчанию"""
+    def _random_chest(rng: GameRng) -> BonusChest:
+        """Сундук из START_BONUS_COUNT случайных бонусов (поток бонусов rng)."""
+        bonuses = list(Bonus)
+        bonus_chest = BonusChest()
+        for i in range(SimpleGameFactory.START_BONUS_COUNT):
+            bonus_chest.add_bonus(rng.bonus.choice(bonuses))
+        return bonus_chest
+
+    @staticmethod
+    def create_from_state(state: GameState, seed: int | None = None) -> SimpleGame:
+        """Игра из сырого состояния SimpleGame.to_state; seed задает дальнейшее пополнение поля."""
+        rows, bonus_counts, scores = state
+        board = Board(rng=GameRng(seed))
+        board.from_raw(list(rows))
+        bonus_chest = BonusChest()
+        for bonus, count in zip(Bonus, bonus_counts):
+            for i in range(count):
+                bonus_chest.add_bonus(bonus)
+        statistics = Statistics()
+        if scores > 0:
+            statistics.increase_scores(PositiveInt(scores))
+        return SimpleGame(GameBoard(board, bonus_chest, statistics))
+
+    @staticmethod
+    def create_test_game() -> SimpleGame:
+        """для тестов: фиксированное поле"""
         initian_cells = [
             "ABCDEABC",
             "BCDEABCD",
@@ -138,19 +265,13 @@ class SimpleGameFactory:
             "CDCDCDCD",
             "DCDCDCDC"            
         ]
-        board = Board()
+        rng = GameRng()
+        board = Board(rng=rng)
         board.from_raw(initian_cells)
-        bonus_chest = BonusChest()
-        for i in range(15):
-            bonus_chest.add_bonus(choice(list(Bonus)))
+        bonus_chest = SimpleGameFactory._random_chest(rng)
         statistics = Statistics()
         game_board = GameBoard(board, bonus_chest, statistics)
         return SimpleGame(game_board)
-    
-    @staticmethod
-    def create_test_game() -> SimpleGame:
-        """для тестов"""
-        return SimpleGameFactory.create_game()
 
 
     @staticmethod
@@ -195,6 +316,7 @@ if __name__ == "__main__":
     game_board = GameBoard(board, bonus_chest, statistics)
     game = SimpleGame(game_board)
     game.set_is_print_substeps(True)
+    game.set_step_listener(lambda step, board: print("\n" + step, board, sep="\n"))
     rc_list = [RC(RowInt(randint(0, board.height.value - 1)), ColInt(randint(0, board.width.value - 1))) for _ in range(6)] 
     
     print("\nbrush -> " + str(rc_list[0].raw_repr))
@@ -0,0 +1,332 @@
+"""Много игр сразу: поля N игр -- один тензор (N, H, W), ходы и каскады -- векторно.
+
+Правила те же, что у GameBoard: комбинации -- COMBINATION_RUNS (из COMBINATIONS),
+бонусы стирания -- ERASE_BONUS_MASKS, каскад -- как в GameBoard.process
+(падение, стирание самой длинной комбинации, пополнение нижних пустых ячеек столбцов).
+Отличается только источник случайности: пополнение и перемешивание берутся из одного
+генератора numpy на все игры, а не из GameRng каждой игры.
+
+numpy -- необязательная зависимость: модуль импортируется и без него,
+а VectorEngine без numpy не создается (ImportError).
+"""
+from __future__ import annotations
+from typing import Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy нужен только этому модулю
+    np = None
+
+from base import HEIGHT, WIDTH, Stone, NonStoneValues, Bonus, EraseMaskBonus
+from combinations import COMBINATION_RUNS, ERASE_BONUS_MASKS, MaskRaw
+from game_board import Board, GameBoardSettings
+from simple_game import GameState
+
+MSG_NO_NUMPY = "VectorEngine требует numpy (pip install numpy)"
+
+
+class VectorEngine(GameBoardSettings):
+    """N независимых игр в виде структуры массивов.
+
+    boards -- (N, H, W) uint8: 0 -- пустая ячейка, i + 1 -- камень STONES[i]; строка 0 -- нижняя.
+    chests -- (N, len(BONUSES)) число бонусов каждого типа, scores -- (N,) счет.
+    Ходы принимают вектор игр (bool-маска длины N) и массивы аргументов;
+    игры, для которых ход некорректен, не меняются -- ход возвращает маску примененных."""
+    STONES: Tuple[Stone, ...] = tuple(Stone)
+    BONUSES: Tuple[Bonus, ...] = tuple(Bonus)
+    EMPTY = 0
+    # значение рамки поля: не равно ни одному камню и пустой ячейке
+    PAD = 255
+    SHUFFLE_MAX_ATTEMPTS = Board.SHUFFLE_MAX_ATTEMPTS
+
+    def __init__(self, count: int, height: int = HEIGHT, width: int = WIDTH, seed: Optional[int] = None):
+        if np is None:
+            raise ImportError(MSG_NO_NUMPY)
+        self._height, self._width = height, width
+        self.boards = np.zeros((count, height, width), dtype=np.uint8)
+        self.chests = np.zeros((count, len(self.BONUSES)), dtype=np.int32)
+        self.scores = np.zeros(count, dtype=np.int64)
+        self.rounds = np.zeros(count, dtype=np.int32)
+        self._rng = np.random.default_rng(seed)
+        self._build_tables()
+
+    # === ТАБЛИЦЫ ПРАВИЛ ===
+    def _mask_table(self, masks: Sequence[MaskRaw]) -> np.ndarray:
+        """(len(masks), H*W опорных ячеек, H*W ячеек): ячейки маски при каждой опорной ячейке,
+        обрезанные по полю (как Mask.from_raw)."""
+        h, w = self._height, self._width
+        table = np.zeros((len(masks), h * w, h * w), dtype=bool)
+        for k, mask_raw in enumerate(masks):
+            for row in range(h):
+                for col in range(w):
+                    for d_row, d_col in mask_raw:
+                        r, c = row + d_row, col + d_col
+                        if 0 <= r < h and 0 <= c < w:
+                            table[k, row * w + col, r * w + c] = True
+        return table
+
+    def _build_tables(self) -> None:
+        self._combination_cells = self._mask_table([combination for combination, _ in COMBINATION_RUNS])
+        self._combination_sizes = np.array([len(combination) for combination, _ in COMBINATION_RUNS], dtype=np.int32)
+        # (K, 4): нужные серии влево, вправо, вниз, вверх
+        self._combination_runs = np.array([runs for _, runs in COMBINATION_RUNS], dtype=np.int8)
+        self._erase_bonuses = tuple(EraseMaskBonus)
+        self._erase_bonus_cells = self._mask_table([ERASE_BONUS_MASKS[bonus] for bonus in self._erase_bonuses])
+
+    # === ЗАГРУЗКА И ВЫГРУЗКА ===
+    @property
+    def count(self) -> int:
+        return self.boards.shape[0]
+
+    def load_state(self, index: int, state: GameState) -> None:
+        """Игра index из сырого состояния SimpleGame.to_state."""
+        rows, bonus_counts, scores = state
+        codes = {NonStoneValues.EMPTY.value: self.EMPTY}
+        codes.update({stone.value: i + 1 for i, stone in enumerate(self.STONES)})
+        self.boards[index] = [[codes[value] for value in row] for row in rows]
+        self.chests[index] = bonus_counts
+        self.scores[index] = scores
+        self.rounds[index] = 0
+
+    def to_state(self, index: int) -> GameState:
+        """Сырое состояние игры index (для SimpleGameFactory.create_from_state)."""
+        values = (NonStoneValues.EMPTY.value,) + tuple(stone.value for stone in self.STONES)
+        rows = tuple([values[code] for code in row] for row in self.boards[index].tolist())
+        return rows, tuple(self.chests[index].tolist()), int(self.scores[index])
+
+    def _games(self, games: Optional[np.ndarray]) -> np.ndarray:
+        return np.ones(self.count, dtype=bool) if games is None else np.asarray(games, dtype=bool)
+
+    def _cells_arg(self, games: np.ndarray, rows, cols) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Координаты ячеек по играм: маска игр, где ячейка в пределах поля, и сами координаты,
+        обнуленные в остальных играх (индексировать ими безопасно)."""
+        rows = np.broadcast_to(np.asarray(rows, dtype=np.intp), games.shape)
+        cols = np.broadcast_to(np.asarray(cols, dtype=np.intp), games.shape)
+        inside = games & (rows >= 0) & (rows < self._height) & (cols >= 0) & (cols < self._width)
+        return inside, np.where(inside, rows, 0), np.where(inside, cols, 0)
+
+    # === СЕРИИ И КОМБИНАЦИИ ===
+    # функции над произвольной пачкой полей (n, H, W): каскад работает только с еще не устоявшимися играми
+    def _run_lengths(self, boards: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        h, w = self._height, self._width
+        # равенство с соседом справа / сверху (и ячейка не пустая)
+        eq_h = (boards[:, :, 1:] == boards[:, :, :-1]) & (boards[:, :, 1:] != self.EMPTY)
+        eq_v = (boards[:, 1:, :] == boards[:, :-1, :]) & (boards[:, 1:, :] != self.EMPTY)
+        left = np.zeros(boards.shape, dtype=np.int8)
+        right = np.zeros(boards.shape, dtype=np.int8)
+        down = np.zeros(boards.shape, dtype=np.int8)
+        up = np.zeros(boards.shape, dtype=np.int8)
+        for col in range(1, w):
+            left[:, :, col] = (left[:, :, col - 1] + 1) * eq_h[:, :, col - 1]
+        for col in range(w - 2, -1, -1):
+            right[:, :, col] = (right[:, :, col + 1] + 1) * eq_h[:, :, col]
+        for row in range(1, h):
+            down[:, row, :] = (down[:, row - 1, :] + 1) * eq_v[:, row - 1, :]
+        for row in range(h - 2, -1, -1):
+            up[:, row, :] = (up[:, row + 1, :] + 1) * eq_v[:, row, :]
+        return left, right, down, up
+
+    def run_lengths(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Серии одинаковых непустых камней от каждой ячейки: влево, вправо, вниз, вверх (как Board.run_lengths)."""
+        return self._run_lengths(self.boards)
+
+    def _find_combinations(self, boards: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        count = boards.shape[0]
+        left, right, down, up = self._run_lengths(boards)
+        # первая подходящая комбинация ячейки (самая длинная): проход по COMBINATION_RUNS с конца
+        kinds = np.zeros(boards.shape, dtype=np.int8)
+        sizes = np.zeros(boards.shape, dtype=np.int8)
+        for k in range(len(self._combination_sizes) - 1, -1, -1):
+            need_left, need_right, need_down, need_up = self._combination_runs[k].tolist()
+            fits = (left >= need_left) & (right >= need_right) & (down >= need_down) & (up >= need_up)
+            kinds[fits] = k
+            sizes[fits] = self._combination_sizes[k]
+        sizes = sizes.reshape(count, -1)
+        pivots = sizes.argmax(axis=1)
+        games = np.arange(count)
+        found = sizes[games, pivots] > 0
+        cells = self._combination_cells[kinds.reshape(count, -1)[games, pivots], pivots] & found[:, None]
+        return found, cells.reshape(boards.shape)
+
+    def find_combinations(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Самая длинная комбинация каждой игры (как GameBoard.find_combination_mask):
+        при равных длинах -- с первой опорной ячейкой по строкам снизу вверх.
+        Возвращает (есть ли комбинация (N,), ее ячейки (N, H, W))."""
+        return self._find_combinations(self.boards)
+
+    # === ШАГИ КАСКАДА ===
+    def _dropped(self, boards: np.ndarray) -> np.ndarray:
+        order = np.argsort(boards == self.EMPTY, axis=1, kind="stable")
+        return np.take_along_axis(boards, order, axis=1)
+
+    def _filled(self, boards: np.ndarray) -> np.ndarray:
+        empty = boards == self.EMPTY
+        has_empty = empty.any(axis=1)  # (n, W)
+        rows = empty.argmax(axis=1)[:, None, :]  # нижняя пустая ячейка столбца
+        stones = self._rng.integers(1, len(self.STONES) + 1, size=has_empty.shape, dtype=np.uint8)
+        current = np.take_along_axis(boards, rows, axis=1)[:, 0, :]
+        np.put_along_axis(boards, rows, np.where(has_empty, stones, current)[:, None, :], axis=1)
+        return boards
+
+    def drop(self, games: Optional[np.ndarray] = None) -> None:
+        """Падение камней во всех столбцах выбранных игр (порядок камней сохраняется)."""
+        games = self._games(games)
+        if games.any():
+            self.boards[games] = self._dropped(self.boards[games])
+
+    def fill_line(self, games: Optional[np.ndarray] = None) -> None:
+        """Случайный камень в нижнюю пустую ячейку каждого столбца (как Board.fill_first_empty_layer_random)."""
+        games = self._games(games)
+        if games.any():
+            self.boards[games] = self._filled(self.boards[games])
+
+    def erase(self, cells: np.ndarray, games: Optional[np.ndarray] = None) -> None:
+        """Стирает ячейки (N, H, W) выбранных игр и начисляет очки за каждую ячейку (как GameBoard.erase_mask)."""
+        cells = cells & self._games(games)[:, None, None]
+        self.boards[cells] = self.EMPTY
+        self.scores += self.SCORES_PER_STONE.value * cells.sum(axis=(1, 2))
+
+    def process(self, games: Optional[np.ndarray] = None) -> None:
+        """Каскад до устойчивого поля во всех выбранных играх сразу -- тот же порядок раундов, что у GameBoard.process.
+        Каждый раунд обрабатывает только еще не устоявшиеся игры.
+        rounds -- сколько раз за каскад стиралась комбинация."""
+        index = np.flatnonzero(self._games(games))
+        self.rounds[index] = 0
+        if index.size:
+            self.boards[index] = self._dropped(self.boards[index])
+        while index.size:
+            boards = self.boards[index]
+            found, cells = self._find_combinations(boards)
+            filling = ~found & (boards == self.EMPTY).any(axis=(1, 2))
+            boards[cells] = self.EMPTY
+            self.scores[index] += self.SCORES_PER_STONE.value * cells.sum(axis=(1, 2))
+            self.rounds[index] += found
+            if found.any():
+                boards[found] = self._dropped(boards[found])
+            if filling.any():
+                boards[filling] = self._filled(boards[filling])
+            self.boards[index] = boards
+            index = index[found | filling]
+
+    # === ХОДЫ ===
+    def legal_swaps(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Ходы обменом на устойчивом поле (как iter_swaps_raw): соседние непустые разные камни,
+        после обмена через одну из ячеек проходит линия.
+        (N, H, W-1) -- обмен (r, c) с (r, c+1); (N, H-1, W) -- обмен (r, c) с (r+1, c)."""
+        h, w = self._height, self._width
+        padded = np.pad(self.boards, ((0, 0), (3, 3), (3, 3)), constant_values=self.PAD)
+
+        def at(d_row: int, d_col: int, rows: int, cols: int) -> np.ndarray:
+            return padded[:, 3 + d_row:3 + d_row + rows, 3 + d_col:3 + d_col + cols]
+
+        def line(value, d_row, d_col, rows, cols, along_row: bool, back: bool) -> np.ndarray:
+            """Линия через ячейку (d_row, d_col), куда переехал value: пара соседей по направлению
+            обмена (только с дальней стороны) или по поперечному направлению (с любой стороны)."""
+            def eq(a_row, a_col):
+                return at(d_row + a_row, d_col + a_col, rows, cols) == value
+            step = -1 if back else 1
+            if along_row:
+                straight = eq(0, step) & eq(0, 2 * step)
+                before, after = eq(-1, 0), eq(1, 0)
+                across = (after & eq(2, 0)) | (before & (eq(-2, 0) | after))
+            else:
+                straight = eq(step, 0) & eq(2 * step, 0)
+                before, after = eq(0, -1), eq(0, 1)
+                across = (after & eq(0, 2)) | (before & (eq(0, -2) | after))
+            return straight | across
+
+        ans = []
+        for along_row, rows, cols, d_row, d_col in ((True, h, w - 1, 0, 1), (False, h - 1, w, 1, 0)):
+            first = at(0, 0, rows, cols)
+            second = at(d_row, d_col, rows, cols)
+            valid = (first != self.EMPTY) & (second != self.EMPTY) & (first != second)
+            # second переезжает в первую ячейку, first -- во вторую
+            forms = line(second, 0, 0, rows, cols, along_row, back=True) | \
+                line(first, d_row, d_col, rows, cols, along_row, back=False)
+            ans.append(valid & forms)
+        return ans[0], ans[1]
+
+    def has_smart_swap(self) -> np.ndarray:
+        horizontal, vertical = self.legal_swaps()
+        return horizontal.any(axis=(1, 2)) | vertical.any(axis=(1, 2))
+
+    def is_gameover(self) -> np.ndarray:
+        """Как SimpleGame.is_gameover: нет ходов обменом и сундук пуст."""
+        return ~self.has_smart_swap() & (self.chests.sum(axis=1) == 0)
+
+    def _swap_cells(self, games: np.ndarray, rows1, cols1, rows2, cols2) -> None:
+        index = np.flatnonzero(games)
+        rows1, cols1, rows2, cols2 = (np.asarray(a)[index] for a in (rows1, cols1, rows2, cols2))
+        first = self.boards[index, rows1, cols1].copy()
+        self.boards[index, rows1, cols1] = self.boards[index, rows2, cols2]
+        self.boards[index, rows2, cols2] = first
+
+    def swap_move(self, rows1, cols1, rows2, cols2, games: Optional[np.ndarray] = None) -> np.ndarray:
+        """Ход обменом соседних ячеек (как SimpleGame.smart_swap_move); возвращает маску сделанных ходов."""
+        games = self._games(games)
+        games, rows1, cols1 = self._cells_arg(games, rows1, cols1)
+        games, rows2, cols2 = self._cells_arg(games, rows2, cols2)
+        h, w = self._height, self._width
+        low_row, low_col = np.minimum(rows1, rows2), np.minimum(cols1, cols2)
+        horizontal_pair = (rows1 == rows2) & (np.abs(cols1 - cols2) == 1)
+        vertical_pair = (cols1 == cols2) & (np.abs(rows1 - rows2) == 1)
+        horizontal, vertical = self.legal_swaps()
+        games_index = np.arange(self.count)
+        # clip -- только для таблицы другой ориентации, ее значение отсекает *_pair
+        ok_h = horizontal[games_index, np.clip(low_row, 0, h - 1), np.clip(low_col, 0, w - 2)] & horizontal_pair
+        ok_v = vertical[games_index, np.clip(low_row, 0, h - 2), np.clip(low_col, 0, w - 1)] & vertical_pair
+        applied = games & (ok_h | ok_v)
+        self._swap_cells(applied, rows1, cols1, rows2, cols2)
+        self.process(applied)
+        return applied
+
+    def _use_bonus(self, bonus: Bonus, games: np.ndarray) -> np.ndarray:
+        k = self.BONUSES.index(bonus)
+        games = games & (self.chests[:, k] > 0)
+        self.chests[games, k] -= 1
+        self.scores[games] += self.BONUS_SCORES.value
+        return games
+
+    def bonus_move(self, bonus: Bonus, rows=None, cols=None, rows2=None, cols2=None,
+                   games: Optional[np.ndarray] = None) -> np.ndarray:
+        """Ход с бонусом (как ходы SimpleGame с бонусами): бонус списывается, поле меняется, каскад.
+        Аргументы -- опорная ячейка (rows, cols), для SWAP еще и вторая ячейка (rows2, cols2).
+        Возвращает маску сделанных ходов."""
+        games = self._games(games)
+        games_index = np.arange(self.count)
+        # ALL и SHUFFLE опорной ячейки не используют; остальным нужна ячейка в пределах поля
+        if bonus in (Bonus.ALL, Bonus.SHUFFLE) or rows is None or cols is None:
+            rows = cols = 0
+        games, rows, cols = self._cells_arg(games, rows, cols)
+        pivot_values = self.boards[games_index, rows, cols]
+        if bonus == Bonus.BRUSH:
+            games = games & (pivot_values != self.EMPTY)
+        if bonus == Bonus.SWAP:
+            games, rows2, cols2 = self._cells_arg(games, rows2, cols2)
+            games = games & (pivot_values != self.EMPTY) & (self.boards[games_index, rows2, cols2] != self.EMPTY)
+        games = self._use_bonus(bonus, games)
+        if bonus in self._erase_bonuses:
+            table = self._erase_bonus_cells[self._erase_bonuses.index(bonus)]
+            cells = table[rows * self._width + cols].reshape(self.boards.shape)
+            self.erase(cells, games)
+        elif bonus == Bonus.BRUSH:
+            self.erase(self.boards == pivot_values[:, None, None], games)
+        elif bonus == Bonus.SWAP:
+            self._swap_cells(games, rows, cols, rows2, cols2)
+        elif bonus == Bonus.SHUFFLE:
+            self.shuffle(games)
+        self.process(games)
+        return games
+
+    def shuffle(self, games: Optional[np.ndarray] = None) -> None:
+        """Перемешивание (как Board.shuffle_playable): случайные перестановки, пока на поле есть линии
+        или нет хода обменом; после SHUFFLE_MAX_ATTEMPTS попыток остается последняя перестановка."""
+        pending = self._games(games).copy()
+        shape = self.boards.shape
+        for _ in range(self.SHUFFLE_MAX_ATTEMPTS):
+            if not pending.any():
+                return
+            flat = self.boards[pending].reshape(int(pending.sum()), -1)
+            self.boards[pending] = self._rng.permuted(flat, axis=1).reshape((-1,) + shape[1:])
+            found, _ = self.find_combinations()
+            pending &= found | ~self.has_smart_swap()
@@ -0,0 +1,165 @@
+"""Пачка игр как среда для обучения агентов: reset(seeds) / step(actions).
+
+Поверх VectorEngine: все игры пачки ходят одновременно, наблюдения -- one-hot плоскости
+камней в одном заранее выделенном буфере (обновляется на месте, без копий),
+маски допустимых действий, награды -- прирост счета (как в Statistics), конец -- is_gameover.
+
+Кодировка действий (сплошная нумерация, границы -- в VectorEnv.action_slices):
+    SWAP_H  -- обмен (r, c) с (r, c+1), индекс r * (W-1) + c
+    SWAP_V  -- обмен (r, c) с (r+1, c), индекс r * W + c
+    ROW     -- бонус строки, индекс r
+    COL     -- бонус столбца, индекс c
+    CROSS   -- бонус креста, индекс r * W + c
+    ALL     -- бонус всего поля
+    BRUSH   -- кисть по камню STONES[i] (опорная ячейка -- первая с этим камнем), индекс i
+    SHUFFLE -- перемешивание
+    SWAP    -- бонус обмена любых двух ячеек i < j (номер ячейки r * W + c), пары по порядку
+"""
+from __future__ import annotations
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
+
+from base import HEIGHT, WIDTH, Bonus
+from simple_game import SimpleGameFactory
+from vector_engine import VectorEngine, np
+
+
+class EnvStep(NamedTuple):
+    """Итог шага: наблюдения (N, len(STONES), H, W) -- общий буфер среды, маски действий (N, A),
+    награды (N,), конец игры (N,)."""
+    observations: "np.ndarray"
+    legal: "np.ndarray"
+    rewards: "np.ndarray"
+    dones: "np.ndarray"
+
+
+class VectorEnv:
+    """Среда из count игр одного размера (H, W)."""
+
+    def __init__(self, count: int, height: int = HEIGHT, width: int = WIDTH, seed: Optional[int] = None):
+        self._engine = VectorEngine(count, height, width, seed)
+        self._height, self._width = height, width
+        self._slices = self._action_slices()
+        self._action_count = max(end for _, end in self._slices.values())
+        cells = height * width
+        first, second = np.triu_indices(cells, k=1)
+        self._swap_pairs = (first, second)
+        self._stone_codes = np.arange(1, len(VectorEngine.STONES) + 1, dtype=np.uint8)[None, :, None, None]
+        self._planes = np.zeros((count, len(VectorEngine.STONES), height, width), dtype=bool)
+        self._legal = np.zeros((count, self._action_count), dtype=bool)
+        self._dones = np.zeros(count, dtype=bool)
+
+    def _action_slices(self) -> Dict[str, Tuple[int, int]]:
+        h, w = self._height, self._width
+        sizes = (("SWAP_H", h * (w - 1)), ("SWAP_V", (h - 1) * w),
+                 (Bonus.ROW.value, h), (Bonus.COL.value, w), (Bonus.CROSS.value, h * w), (Bonus.ALL.value, 1),
+                 (Bonus.BRUSH.value, len(VectorEngine.STONES)), (Bonus.SHUFFLE.value, 1),
+                 (Bonus.SWAP.value, h * w * (h * w - 1) // 2))
+        slices, start = {}, 0
+        for name, size in sizes:
+            slices[name] = (start, start + size)
+            start += size
+        return slices
+
+    @property
+    def action_slices(self) -> Dict[str, Tuple[int, int]]:
+        """Границы [начало, конец) действий каждого вида."""
+        return dict(self._slices)
+
+    @property
+    def action_count(self) -> int:
+        return self._action_count
+
+    @property
+    def engine(self) -> VectorEngine:
+        return self._engine
+
+    @property
+    def count(self) -> int:
+        return self._engine.count
+
+    @property
+    def observations(self) -> "np.ndarray":
+        """One-hot плоскости камней: тот же буфер после каждого шага (копируйте, если нужно сохранить)."""
+        return self._planes
+
+    # === СОСТОЯНИЕ ===
+    def reset(self, seeds: Sequence[int]) -> EnvStep:
+        """Новые игры: поле и сундук -- как у SimpleGameFactory.create_random_game(seed)."""
+        if len(seeds) != self.count:
+            raise ValueError(f"нужно {self.count} зерен, получено {len(seeds)}")
+        for i, seed in enumerate(seeds):
+            self._engine.load_state(i, SimpleGameFactory.create_random_game(seed=seed).to_state())
+        return self._observe(np.zeros(self.count, dtype=np.int64))
+
+    def _observe(self, rewards: "np.ndarray") -> EnvStep:
+        engine = self._engine
+        np.equal(engine.boards[:, None, :, :], self._stone_codes, out=self._planes)
+        self._dones[:] = engine.is_gameover()
+        self._update_legal()
+        return EnvStep(self._planes, self._legal, rewards, self._dones)
+
+    def _update_legal(self) -> None:
+        engine = self._engine
+        legal = self._legal
+        count = self.count
+        horizontal, vertical = engine.legal_swaps()
+        slices = self._slices
+        legal[:, slice(*slices["SWAP_H"])] = horizontal.reshape(count, -1)
+        legal[:, slice(*slices["SWAP_V"])] = vertical.reshape(count, -1)
+        has = {bonus: engine.chests[:, i] > 0 for i, bonus in enumerate(VectorEngine.BONUSES)}
+        for bonus in (Bonus.ROW, Bonus.COL, Bonus.CROSS, Bonus.ALL, Bonus.SHUFFLE):
+            legal[:, slice(*slices[bonus.value])] = has[bonus][:, None]
+        legal[:, slice(*slices[Bonus.BRUSH.value])] = self._planes.any(axis=(2, 3)) & has[Bonus.BRUSH][:, None]
+        flat = engine.boards.reshape(count, -1)
+        first, second = self._swap_pairs
+        # как GameBoard.swap / legal_moves: любые две непустые ячейки, в том числе с одинаковыми камнями
+        legal[:, slice(*slices[Bonus.SWAP.value])] = \
+            (flat[:, first] != VectorEngine.EMPTY) & (flat[:, second] != VectorEngine.EMPTY) & has[Bonus.SWAP][:, None]
+        legal[self._dones] = False
+
+    # === ШАГ ===
+    def step(self, actions: Sequence[int]) -> EnvStep:
+        """Один ход в каждой игре. Недопустимое действие (и любое действие в законченной игре)
+        ничего не меняет и дает нулевую награду."""
+        engine = self._engine
+        w = self._width
+        count = self.count
+        actions = np.asarray(actions, dtype=np.int64)
+        games_index = np.arange(count)
+        valid = (actions >= 0) & (actions < self._action_count)
+        valid[valid] &= self._legal[games_index[valid], actions[valid]]
+        before = engine.scores.copy()
+        zeros = np.zeros(count, dtype=np.intp)
+
+        def local(name: str) -> Tuple["np.ndarray", "np.ndarray"]:
+            start, end = self._slices[name]
+            mask = valid & (actions >= start) & (actions < end)
+            return mask, np.where(mask, actions - start, 0)
+
+        swap_h, index_h = local("SWAP_H")
+        swap_v, index_v = local("SWAP_V")
+        if (swap_h | swap_v).any():
+            rows1 = np.where(swap_h, index_h // (w - 1), index_v // w)
+            cols1 = np.where(swap_h, index_h % (w - 1), index_v % w)
+            engine.swap_move(rows1, cols1, rows1 + swap_v, cols1 + swap_h, games=swap_h | swap_v)
+
+        flat = engine.boards.reshape(count, -1)
+        first, second = self._swap_pairs
+        for bonus in (Bonus.ROW, Bonus.COL, Bonus.CROSS, Bonus.ALL, Bonus.BRUSH, Bonus.SHUFFLE, Bonus.SWAP):
+            games, index = local(bonus.value)
+            if not games.any():
+                continue
+            if bonus == Bonus.ROW:
+                cells = index * w
+            elif bonus == Bonus.COL or bonus == Bonus.CROSS:
+                cells = index
+            elif bonus == Bonus.BRUSH:
+                cells = (flat == (index + 1).astype(np.uint8)[:, None]).argmax(axis=1)
+            elif bonus == Bonus.SWAP:
+                cells = first[index]
+            else:
+                cells = zeros
+            others = second[index] if bonus == Bonus.SWAP else zeros
+            engine.bonus_move(bonus, rows=cells // w, cols=cells % w, rows2=others // w, cols2=others % w,
+                              games=games)
+        return self._observe(engine.scores - before)
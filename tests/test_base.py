@@ -142,6 +142,19 @@ class TestRC:
         assert rc1 == rc2
         assert rc1 != rc3
 
+    def test_rc_invalid_without_exception(self, monkeypatch):
+        # Неверные координаты: статус ERR, сообщение как у исключения, но исключение не создается
+        from contract import ContractErrPreException
+        def forbidden(*args, **kwargs):
+            raise AssertionError("исключение не должно создаваться")
+        monkeypatch.setattr(ContractErrPreException, "__init__", forbidden)
+        rc = RC(RowInt(100), ColInt(2))
+        assert rc.is_ERR
+        assert rc.message == "Contract precondition error: row and col must be correct"
+        rc = RC(RowInt(1), ColInt(2))
+        rc.from_raw(1, 200)
+        assert rc.is_ERR and rc.raw_repr == (1, 2)
+
 
 # Тесты для класса Rect
 class TestRect:
@@ -132,6 +132,53 @@ class TestBoundedIntOperations:
         assert result.is_ERR
 
 
+class TestBoundedIntFastPath:
+    def test_slots(self, simple_bounded_type):
+        # экземпляры без __dict__
+        assert not hasattr(simple_bounded_type(5), "__dict__")
+
+    def test_cached_instances(self, simple_bounded_type):
+        a = simple_bounded_type.of(5)
+        assert a is simple_bounded_type.of(5)
+        assert a.is_OK and a.is_frozen
+        # у каждого типа свой кэш
+        other_type = BoundedInt.create_bounded_type(0, 10, "OtherBoundedInt")
+        assert other_type.of(5) is not a
+        # обычный конструктор по-прежнему дает изменяемый экземпляр
+        assert not simple_bounded_type(5).is_frozen
+
+    def test_cached_out_of_bounds(self, simple_bounded_type):
+        assert simple_bounded_type.of(11).is_ERR
+        assert simple_bounded_type.of(11) is not simple_bounded_type.of(11)
+
+    def test_frozen_is_immutable(self, simple_bounded_type):
+        a = simple_bounded_type.of(5)
+        with pytest.raises(AttributeError):
+            a.value = 6
+        assert a.value == 5 and a.is_OK
+
+    def test_arithmetic_is_mutable(self, simple_bounded_type):
+        """Результат арифметики -- новый изменяемый экземпляр, даже если операнды из кэша."""
+        a = simple_bounded_type.of(2)
+        for result in (a + a, a * a, a - simple_bounded_type.of(1)):
+            assert not result.is_frozen
+            result.value += 1
+            assert result.is_OK
+        total = a + a
+        assert total is not a + a
+        total.value = 9
+        assert simple_bounded_type.of(4).value == 4
+
+    def test_copy(self, simple_bounded_type):
+        from copy import deepcopy
+        a = simple_bounded_type.of(5)
+        assert deepcopy(a) is a
+        b = simple_bounded_type(5)
+        b_copy = deepcopy(b)
+        b_copy.value = 6
+        assert b.value == 5 and b_copy.value == 6
+
+
 class TestBoundedIntFactory:
     def test_create_bounded_type(self):
         # Проверка создания нового типа
@@ -169,6 +216,37 @@ class TestBoundedIntFactory:
         assert neg_instance.is_ERR
 
 
+class TestBoundedIntArray:
+    def test_bulk_validation(self, negative_bounded_type):
+        # Пачка проверяется целиком: неудачная пачка не добавляется совсем
+        values = negative_bounded_type.array([-5, 0, 5])
+        assert values.is_OK
+        assert (values.low, values.high) == (-5, 5)
+        values.extend([1, 6, 2])
+        assert values.is_ERR
+        assert values.tolist() == [-5, 0, 5]
+        values.extend([10 ** 6])
+        assert values.is_ERR
+        values.extend(iter([4, -4]))
+        assert values.is_OK and len(values) == 5
+        assert values.bounded(3) is negative_bounded_type.of(4)
+
+    def test_view(self, simple_bounded_type):
+        # Вид на буфер без копирования и только для чтения
+        values = simple_bounded_type.array(range(6))
+        view = values.view(2)
+        assert view.readonly
+        assert view.tolist() == [[0, 1], [2, 3], [4, 5]]
+        assert view.obj is values.view().obj
+        with pytest.raises(TypeError):
+            view[0, 0] = 1
+
+    def test_typecode(self):
+        # Буфер -- самый узкий тип, в который влезают границы
+        assert BoundedInt.create_bounded_type(0, 7).array().view().format == "b"
+        assert BoundedInt.create_bounded_type(-1000, 1000).array().view().format == "h"
+
+
 def test_different_bounded_types():
     # Проверка независимости разных типов
     TypeA = BoundedInt.create_bounded_type(0, 10, "TypeA")
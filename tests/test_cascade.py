@@ -0,0 +1,59 @@
+import pytest
+from base import RC, RowInt, ColInt
+from game_board import GameBoard
+from simple_game import SimpleGameFactory
+from cascade import CascadeDriver, run_round_robin
+
+
+class TestCascadeDriver:
+    """Тесты каскада по частям."""
+
+    def setup_method(self):
+        self.game = SimpleGameFactory.create_random_game(seed=11)
+        self.game_board = self.game._game_board
+        self.rc1, self.rc2 = self.game.hints()[0]
+
+    def _start_move(self, game_board: GameBoard) -> None:
+        game_board.begin_move()
+        game_board.smart_swap(self.rc1, self.rc2)
+
+    def test_same_as_process(self):
+        """Тест: каскад по одному раунду дает то же поле и итог, что process."""
+        reference = self.game_board.fork()
+        self._start_move(reference)
+        reference.process()
+        expected = reference.end_move()
+
+        self._start_move(self.game_board)
+        grid = [list(row) for row in self.game_board._board.to_raw()]
+        driver = CascadeDriver(self.game_board)
+        turns = 0
+        while not driver.done:
+            steps = driver.run(max_steps=1)
+            assert len(steps) <= 1
+            turns += 1
+        assert turns >= 2
+        assert driver.result == expected
+        assert not self.game_board.in_move
+        assert str(self.game_board) == str(reference)
+        # изменения по раундам собирают конечное поле из начального
+        for step in driver.steps:
+            assert step.kind in ("erase", "fill")
+            for (row, col), value in step.delta:
+                grid[row][col] = value
+        assert grid == [list(row) for row in self.game_board._board.to_raw()]
+        assert sum(step.kind == "erase" for step in driver.steps) == expected.cascade_rounds
+
+    def test_budget_and_round_robin(self):
+        """Тест бюджетов: нулевой бюджет времени -- один раунд, по очереди -- все каскады до конца."""
+        boards = [self.game_board.fork() for _ in range(3)]
+        drivers = []
+        for game_board in boards:
+            self._start_move(game_board)
+            drivers.append(CascadeDriver(game_board))
+        assert len(drivers[0].run(time_budget=0.0)) == 1
+        while run_round_robin(drivers):
+            pass
+        assert all(driver.done for driver in drivers)
+        assert len({str(game_board) for game_board in boards}) == 1
+        assert drivers[0].run() == []
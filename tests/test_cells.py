@@ -1,6 +1,8 @@
 import pytest
 from base import Rect, Stone, Stone, NonStoneValues, Bonus, RC, R, C, PositiveInt, RowInt, ColInt
-from cells import Cells, BonusChest, Statistics
+import sys
+from cells import Cells, BonusChest, Statistics, STONES, STONE_CODES
+from combinations import Mask, BitMask
 
 # Тесты для класса Cells
 class TestCells:
@@ -94,6 +96,49 @@ class TestCells:
         cells.erase_rc(RC(RowInt(0), ColInt(-1)))
         assert cells.is_ERR
     
+    def test_erase_bits(self):
+        rect = Rect(width=PositiveInt(3), height=PositiveInt(3))
+        cells = Cells(rect)
+        cells.from_raw(["ABC", "ABC", "ABC"])
+
+        # бит row * width + col: стираем (0, 1) и (2, 2)
+        cells.erase_bits((1 << 1) | (1 << 8))
+        assert cells.is_OK
+        assert cells[RC(RowInt(0), ColInt(1))] == NonStoneValues.EMPTY
+        assert cells[RC(RowInt(2), ColInt(2))] == NonStoneValues.EMPTY
+        assert cells[RC(RowInt(0), ColInt(0))] == Stone.A
+
+        # бит за пределами поля -- ничего не стирается
+        cells.erase_bits((1 << 0) | (1 << 9))
+        assert cells.is_ERR
+        assert cells[RC(RowInt(0), ColInt(0))] == Stone.A
+
+    def test_bulk_operations(self):
+        """Тест массовых операций: маска проверяется целиком, запись за один проход."""
+        rect = Rect(width=PositiveInt(3), height=PositiveInt(3))
+        cells = Cells(rect)
+        cells.from_raw(["ABC", "ABC", "ABC"])
+
+        cells.erase_many(Mask({RC(RowInt(0), ColInt(1)), RC(RowInt(2), ColInt(2))}))
+        assert cells.is_OK
+        assert cells.to_raw() == ["A.C", "ABC", "AB."]
+
+        cells.set_many(BitMask((1 << 0) | (1 << 4), rect), Stone.D)
+        assert cells.is_OK
+        assert cells.to_raw() == ["D.C", "ADC", "AB."]
+
+        # ячейка вне поля -- ничего не пишется
+        cells.set_many(Mask({RC(RowInt(0), ColInt(0)), RC(RowInt(5), ColInt(5))}), Stone.E)
+        assert cells.is_ERR
+        assert cells.to_raw() == ["D.C", "ADC", "AB."]
+
+        source = Cells(rect)
+        source.from_raw(["EEE", "FFF", "GGG"])
+        cells.copy_region(source, BitMask(0b111 << 3, rect))
+        assert cells.is_OK
+        assert cells.to_raw() == ["D.C", "FFF", "AB."]
+        assert source.to_raw() == ["EEE", "FFF", "GGG"]
+
     def test_repr(self):
         """Тест для метода __repr__"""
         rect = Rect(width=PositiveInt(2), height=PositiveInt(2))
@@ -171,6 +216,73 @@ class TestCells:
         cells.from_raw(invalid_chars_strings)
         assert cells.is_ERR
 
+    def test_fork(self):
+        rect = Rect(width=PositiveInt(3), height=PositiveInt(3))
+        cells = Cells(rect)
+        cells.from_raw(["ABC", "ABC", "ABC"])
+        other = cells.fork()
+        # строки общие до первой записи
+        assert other._cells[1] is cells._cells[1]
+
+        other[RC(RowInt(1), ColInt(1))] = Stone.D
+        cells[RC(RowInt(2), ColInt(0))] = Stone.E
+        assert cells[RC(RowInt(1), ColInt(1))] == Stone.B
+        assert other[RC(RowInt(1), ColInt(1))] == Stone.D
+        assert other[RC(RowInt(2), ColInt(0))] == Stone.A
+        # нетронутая строка по-прежнему общая
+        assert other._cells[0] is cells._cells[0]
+
+    def test_fork_buffers(self):
+        """Тест развилки байтовых буферов: общие до первой записи, выданные представления не делятся."""
+        rect = Rect(width=PositiveInt(3), height=PositiveInt(3))
+        cells = Cells(rect)
+        cells.from_raw(["ABC", "ABC", "ABC"])
+        other = cells.fork()
+        assert other._codes is cells._codes and other._planes is cells._planes
+        other[RC(RowInt(0), ColInt(0))] = Stone.D
+        assert other._codes is not cells._codes
+        assert cells.codes_view().tolist()[0] == [1, 2, 3]
+        assert other.codes_view().tolist()[0] == [4, 2, 3]
+
+        # у оригинала есть представления -- копия сразу получает свои буферы, оригинал пишет в свои
+        codes = cells.codes_view()
+        third = cells.fork()
+        assert third._codes is not cells._codes
+        cells[RC(RowInt(0), ColInt(1))] = Stone.E
+        assert codes.tolist()[0] == [1, 5, 3]
+        assert third.codes_view().tolist()[0] == [1, 2, 3]
+
+    def test_buffer_views(self):
+        """Тест байтового представления: коды и one-hot без копий, только чтение, видят все виды записи."""
+        rect = Rect(width=PositiveInt(3), height=PositiveInt(2))
+        cells = Cells(rect)
+        codes, planes = cells.codes_view(), cells.one_hot_view()
+        assert codes.readonly and planes.readonly
+        assert codes.shape == (2, 3) and planes.shape == (len(STONES), 2, 3)
+        with pytest.raises(TypeError):
+            codes[0, 0] = 1
+
+        def expected_codes():
+            return [[STONE_CODES[value] for value in row] for row in cells.to_raw()]
+
+        cells.from_raw(["AB.", "CCA"])
+        cells[RC(RowInt(0), ColInt(2))] = Stone.H
+        cells.erase_many(Mask({RC(RowInt(1), ColInt(0))}))
+        assert codes.tolist() == expected_codes() == [[1, 2, 8], [0, 3, 1]]
+        for i, stone in enumerate(STONES):
+            assert planes.tolist()[i] == [[int(value == stone) for value in row] for row in cells.to_raw()]
+
+        other = cells.fork()
+        other.set_many(BitMask(0b111, rect), Stone.D)
+        assert codes.tolist() == [[1, 2, 8], [0, 3, 1]]
+        assert other.codes_view().tolist() == [[4, 4, 4], [0, 3, 1]]
+        assert other.one_hot_view().tolist()[STONES.index(Stone.D)] == [[1, 1, 1], [0, 0, 0]]
+
+        cells.clear()
+        assert codes.tolist() == [[0, 0, 0], [0, 0, 0]] and not any(planes.cast("B", (len(STONES) * 6,)))
+        if sys.version_info >= (3, 12):
+            assert memoryview(cells).tolist() == codes.tolist()
+
 # Тесты для класса BonusChest
 class TestBonusChest:
     def test_init(self):
@@ -216,6 +328,17 @@ class TestBonusChest:
         assert chest.is_ERR
         assert chest.get_bonus_count(Bonus.BRUSH) == 0
     
+    def test_fork(self):
+        chest = BonusChest()
+        chest.add_bonus(Bonus.ROW)
+        other = chest.fork()
+        other.use_bonus(Bonus.ROW)
+        other.add_bonus(Bonus.COL)
+        assert chest.get_bonus_count(Bonus.ROW) == 1
+        assert chest.get_bonus_count(Bonus.COL) == 0
+        assert other.get_bonus_count(Bonus.ROW) == 0
+        assert other.get_bonus_count(Bonus.COL) == 1
+
     def test_reset(self):
         chest = BonusChest()
         # Добавляем бонусы
@@ -0,0 +1,69 @@
+import io
+from base import Printer
+from cli import GameCLI
+from commands import SwapCommand, EraseRowCommand
+from renderer import BoardRenderer
+from simple_game import SimpleGameFactory
+
+
+class TestGameCLI:
+    """Тесты разбора и выполнения команд."""
+
+    def setup_method(self):
+        self.game = SimpleGameFactory.create_random_game(seed=11)
+        self.cli = GameCLI(self.game, BoardRenderer(io.StringIO()))
+
+    def test_dispatch_table(self):
+        """Таблица разбора содержит все полные имена и алиасы."""
+        table = GameCLI._dispatch_table()
+        assert table is GameCLI._dispatch_table()
+        for alias, name in GameCLI.COMMAND_ALIASES.items():
+            assert table[alias][0] == name
+        assert isinstance(table["swap"][1], SwapCommand)
+        assert table["swap"][2] and not table["help"][2]
+
+    def test_deserialize(self):
+        """Координаты разбираются в целые и проверяются по полю."""
+        command = EraseRowCommand()
+        command.deserialize(["7"])
+        assert command.is_OK and command.row == 7
+        command.deserialize(["8"])
+        assert command.is_ERR
+        command.deserialize(["x"])
+        assert command.is_ERR
+        for arg in ("²", "٣", "-1"):
+            command.deserialize([arg])
+            assert command.is_ERR and command.message.endswith(EraseRowCommand.ERR_INVALID_ARGS_TYPE)
+        command.deserialize([])
+        assert command.is_ERR
+
+    def test_execute(self, capsys):
+        """Выполнение команд: алиасы, регистр, ошибки разбора."""
+        Printer.board_off()
+        try:
+            (row1, col1), (row2, col2) = (rc.raw_repr for rc in self.game.hints()[0])
+            self.cli.execute(f"S {row1} {col1} {row2} {col2}")
+            assert self.cli.is_OK and self.game.is_OK
+            assert self.game.scores > 0
+            self.cli.execute("swap 0 0 0 9")
+            assert self.cli.is_ERR
+            self.cli.execute("nothing")
+            assert "nothing" in capsys.readouterr().out
+        finally:
+            Printer.all_on()
+
+    def test_hints_keep_game_status(self, capsys):
+        """Подсказки первой командой и после неудачного хода: без ошибок и без старого сообщения."""
+        hint = "swap {} {} {} {}".format(*(value for rc in self.game.hints()[0] for value in rc.raw_repr))
+        self.cli.execute("hints")
+        assert self.cli.is_OK
+        assert hint in capsys.readouterr().out
+
+        self.cli.execute("swap 0 0 5 5")
+        assert self.game.is_ERR
+        failed = capsys.readouterr().out
+        assert self.game.message in failed
+        self.cli.execute("hints")
+        assert self.cli.is_OK
+        out = capsys.readouterr().out
+        assert hint in out and self.game.message not in out
@@ -9,7 +9,12 @@ from base import (
     RowInt, ColInt, RowIntExt, ColIntExt, PositiveInt,
     RC, RCExt, Rect, MAIN_RECT, HEIGHT, WIDTH, EraseMaskBonus
 )
-from combinations import Mask, COMBINATIONS, ERASE_BONUS_MASKS, DEFAULT_PIVOT
+from combinations import (
+    Mask, LazyMask, BitMask, erase_bonus_bitmask, COMBINATIONS, ERASE_BONUS_MASKS, DEFAULT_PIVOT,
+    run_length, has_line_at, has_line, swap_forms_line, iter_swaps_raw, is_line_free_placement,
+    generate_playable_grid, combination_at_raw, longest_combination_raw
+)
+import random
 
 
 # Фикстуры для тестов
@@ -164,6 +169,56 @@ class TestMask:
             assert rc.is_OK
 
 
+class TestLazyMask:
+    def test_streaming_without_materialization(self, test_rc_set):
+        calls = []
+        def source():
+            calls.append(1)
+            return iter(test_rc_set)
+        mask = LazyMask(source, contains=lambda rc: rc in test_rc_set, length=lambda: len(test_rc_set))
+
+        assert len(mask) == 3
+        assert RC(RowInt(1), ColInt(1)) in mask
+        assert not mask.is_materialized
+        assert set(mask) == test_rc_set
+        assert not mask.is_materialized
+        assert len(calls) == 1
+
+    def test_materialize_on_demand(self, test_rc_set):
+        mask = LazyMask(lambda: iter(test_rc_set))
+        assert len(mask) == 3
+        assert mask.is_materialized
+        assert not mask.is_empty
+        mask.move(RC(RowInt(1), ColInt(1)))
+        assert len(mask) == 3
+
+
+class TestBitMask:
+    def test_basic(self, test_rc_set):
+        mask = BitMask.from_rcs(test_rc_set)
+        assert len(mask) == mask.popcount == 3
+        assert set(mask) == test_rc_set
+        assert RC(RowInt(2), ColInt(2)) in mask
+        assert RC(RowInt(2), ColInt(3)) not in mask
+        assert BitMask().is_empty
+
+    def test_set_operations(self, test_rc_set, simple_mask):
+        a = BitMask.from_rcs(test_rc_set)
+        b = BitMask.from_rcs(simple_mask)
+        other = BitMask.from_rcs({RC(RowInt(1), ColInt(1)), RC(RowInt(1), ColInt(2))})
+        assert set(a | b) == test_rc_set | set(simple_mask)
+        assert set(a & other) == {RC(RowInt(1), ColInt(1))}
+        assert set(a - other) == test_rc_set - {RC(RowInt(1), ColInt(1))}
+        # с обычной маской тоже работает
+        assert a.union(simple_mask) == a | b
+
+    @pytest.mark.parametrize("bonus", list(EraseMaskBonus))
+    def test_erase_bonus_bitmask_matches_raw(self, bonus):
+        for pivot in [(0, 0), (3, 5), (HEIGHT - 1, WIDTH - 1)]:
+            expected = set(Mask().from_raw(pivot, ERASE_BONUS_MASKS[bonus]))
+            assert set(erase_bonus_bitmask(bonus, pivot)) == expected
+
+
 # Интеграционные тесты
 class TestMaskIntegration:
     def test_create_mask_from_combination(self):
@@ -201,6 +256,66 @@ class TestMaskIntegration:
         assert len(mask) <= initial_len  # может уменьшиться из-за границ
 
 
+# Тесты для функций над "сырым" полем
+class TestRawGrid:
+    def test_run_length_and_line(self):
+        grid = [list("AAAB"), list("BCAB"), list("BCAB")]
+        assert run_length(grid, 0, 0, 0, 1) == 2
+        assert run_length(grid, 0, 3, 1, 0) == 2
+        assert has_line_at(grid, 0, 1)
+        assert has_line_at(grid, 1, 3)
+        assert not has_line_at(grid, 1, 1)
+        assert has_line(grid)
+        assert not has_line([list("AB."), list("BA."), list("AB.")])
+
+    def test_swaps(self):
+        grid = [list("ABAC"), list("CACB")]
+        assert not has_line(grid)
+        assert swap_forms_line(grid, (0, 1), (1, 1))
+        # после проверки поле не изменилось
+        assert grid == [list("ABAC"), list("CACB")]
+        swaps = list(iter_swaps_raw(grid))
+        assert ((0, 1), (1, 1)) in swaps
+        assert all(swap_forms_line(grid, rc1, rc2) for rc1, rc2 in swaps)
+
+    def test_combination_raw(self):
+        grid = [list("AAAB"), list("ABCB"), list("ACBC")]
+        # угол с опорой в (0, 0) длиннее тройки в строке
+        assert len(combination_at_raw(grid, 0, 0)) == 5
+        assert len(combination_at_raw(grid, 0, 1)) == 3
+        assert combination_at_raw(grid, 1, 1) == ()
+        assert len(longest_combination_raw(grid)) == 5
+        assert len(longest_combination_raw(grid, [(0, 2)])) == 5
+        assert longest_combination_raw([list("AB"), list("BA")]) == ()
+
+    def test_is_line_free_placement(self):
+        grid = [list("AA."), list("A.."), list("...")]
+        assert not is_line_free_placement(grid, 0, 2, "A")
+        assert is_line_free_placement(grid, 0, 2, "B")
+        assert not is_line_free_placement(grid, 2, 0, "A")
+        assert is_line_free_placement(grid, 2, 1, ".")
+
+    @pytest.mark.parametrize("height, width, min_swaps", [(8, 8, 3), (5, 12, 10), (20, 20, 40)])
+    def test_generate_playable_grid(self, height, width, min_swaps):
+        grid, swaps_count = generate_playable_grid(height, width, min_swaps, random.Random(7))
+        assert len(grid) == height and all(len(row) == width for row in grid)
+        assert not has_line(grid)
+        assert swaps_count == len(list(iter_swaps_raw(grid)))
+        assert swaps_count >= min_swaps
+
+    def test_generate_playable_grid_seed(self):
+        grid1, _ = generate_playable_grid(8, 8, 3, random.Random(42))
+        grid2, _ = generate_playable_grid(8, 8, 3, random.Random(42))
+        assert grid1 == grid2
+
+    @pytest.mark.parametrize("stones", [("A", "B"), ("A",), ("A", "A", "B")])
+    def test_generate_playable_grid_few_stones(self, stones):
+        with pytest.raises(ValueError):
+            generate_playable_grid(8, 8, 3, random.Random(1), stones)
+        grid, _ = generate_playable_grid(8, 8, 3, random.Random(1), ("A", "B", "C"))
+        assert not has_line(grid)
+
+
 if __name__ == "__main__":
     # Простой тест для проверки работоспособности
     mask = Mask()
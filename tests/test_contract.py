@@ -0,0 +1,76 @@
+import pytest
+from contract import Contract, ContractMode, ContractMonitor, ContractStatus, FAILED
+from base import RC, RowInt, ColInt
+from simple_game import SimpleGameFactory
+
+
+class Probe(Contract):
+    """Простейший класс с контрактом для тестов."""
+
+    @Contract.on
+    def positive(self, value: int) -> int:
+        self.check_pre(value > 0, "value must be positive")
+        return value
+
+    @Contract.on
+    def soft_positive(self, value: int) -> int:
+        if value <= 0:
+            return self.fail_pre("value must be positive")
+        return value
+
+
+class TestContractModes:
+    """Тесты режимов проверки и счетчиков нарушений."""
+
+    def setup_method(self):
+        ContractMonitor.set_mode(ContractMode.FULL)
+        ContractMonitor.reset_counters()
+        self.probe = Probe()
+
+    def teardown_method(self):
+        ContractMonitor.set_mode(ContractMode.FULL)
+        ContractMonitor.reset_counters()
+
+    def test_full(self):
+        """Тест полного режима: все вызовы проверены, нарушения посчитаны."""
+        assert self.probe.positive(-1) is None
+        assert self.probe.is_ERR
+        assert self.probe.positive(3) == 3 and self.probe.is_OK
+        counters = ContractMonitor.counters()["Probe.positive"]
+        assert (counters.calls, counters.checked, counters.err, counters.violations) == (2, 2, 1, 1)
+
+    def test_fail_without_exception(self):
+        """Тест проверки без исключения: тот же статус и сообщение, что у check_pre."""
+        assert self.probe.soft_positive(-1) is None
+        soft_message = self.probe.message
+        self.probe.positive(-1)
+        assert self.probe.is_ERR and self.probe.message == soft_message
+        assert repr(FAILED) == "FAILED" and not FAILED
+
+    def test_sampled(self):
+        """Тест выборки: проверяется ровно доля вызовов, остальные идут быстрым путем."""
+        ContractMonitor.set_mode(ContractMode.SAMPLED, rate=0.25)
+        results = [self.probe.positive(-1) for _ in range(8)]
+        assert results.count(None) == 2 and results.count(-1) == 6
+        counters = ContractMonitor.violations()["Probe.positive"]
+        assert (counters.calls, counters.checked, counters.err) == (8, 2, 2)
+        assert self.probe.positive(-1) == -1 and self.probe.is_OK
+
+    def test_off(self):
+        """Тест выключенных проверок: fail_* (правила) работают, check_* -- нет."""
+        ContractMonitor.set_mode(ContractMode.OFF)
+        assert self.probe.positive(-1) == -1
+        assert self.probe.soft_positive(-1) is None and self.probe.is_ERR
+        assert ContractMonitor.counters()["Probe.positive"].checked == 0
+        game = SimpleGameFactory.create_test_game()
+        game._game_board._chest.reset()
+        state = game.to_state()
+        game.erase_row_move(RC(RowInt(0), ColInt(0)))
+        assert game.is_ERR and game.to_state() == state
+        assert ContractMonitor.violations()["SimpleGame.erase_row_move"].err == 1
+
+    def test_bad_rate(self):
+        """Тест неверной доли выборки."""
+        with pytest.raises(ValueError):
+            ContractMonitor.set_mode(ContractMode.SAMPLED, rate=2.0)
+        assert ContractMonitor.mode() == ContractMode.FULL
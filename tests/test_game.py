@@ -2,10 +2,11 @@ import pytest
 from copy import deepcopy
 from base import Stone, Bonus, RC, RowInt, ColInt
 from cells import BonusChest, Statistics
-from combinations import Mask
+from combinations import Mask, iter_swaps_raw
 from game_board import Board, GameBoard
 from simple_game import SimpleGame, SimpleGameFactory
-from commands import GameCommand
+from commands import GameCommand, SwapCommand
+from rollout import RolloutEvaluator
 
 
 class TestGame:
@@ -54,6 +55,50 @@ class TestGame:
         ...
 
 
+    def test_hints_and_gameover(self):
+        """Тест подсказок и окончания игры."""
+        hints = self.game.hints()
+        assert hints
+        assert all(self.game._game_board.is_smart_swap_correct(rc1, rc2) for rc1, rc2 in hints)
+        assert not self.game.is_gameover
+
+        final_game = SimpleGameFactory.create_final_game()
+        assert final_game.hints() == []
+        assert final_game.is_gameover
+        final_game._game_board._chest.add_bonus(Bonus.ROW)
+        assert not final_game.is_gameover
+
+    def test_invalid_swap_status(self):
+        """Тест неверного обмена: статус и сообщение без исключений, поле не меняется."""
+        state = self.game.to_state()
+        assert self.game.smart_swap_move(RC(RowInt(0), ColInt(0)), RC(RowInt(5), ColInt(5))) is None
+        assert self.game.is_ERR
+        assert self.game.message.startswith("Contract precondition error: Некорректный ход обмена")
+        assert self.game.to_state() == state
+        command = SwapCommand()
+        command.deserialize(["0", "0", "0", "99"])
+        assert command.is_ERR and command.message.endswith(GameCommand.ERR_ARGS_OUT_OF_RANGE)
+        command.deserialize(["0", "0", "0", "1"])
+        assert command.is_OK
+
+    def test_invalid_bonus_step_status(self):
+        """Тест неудачного шага внутри бонусного хода: чистая ошибка предусловия, ход откатывается."""
+        empty = RC(RowInt(0), ColInt(0))
+        self.game._game_board._board.erase_mask(Mask({empty}))
+        self.game._game_board._chest.add_bonus(Bonus.BRUSH)
+        self.game._game_board._chest.add_bonus(Bonus.SWAP)
+        state = self.game.to_state()
+
+        assert self.game.brush_move(empty) is None
+        assert self.game.is_ERR
+        assert self.game.message == "Contract precondition error: Нельзя удалять пустую ячейку"
+        assert self.game.to_state() == state
+
+        assert self.game.swap_bonus_move(empty, RC(RowInt(0), ColInt(1))) is None
+        assert self.game.is_ERR
+        assert self.game.message == "Contract precondition error: Некорректный обмен"
+        assert self.game.to_state() == state
+
     def test_accept_command(self):
         """Тест принятия команды."""
         # Создаем простую тестовую команду
@@ -86,6 +131,18 @@ class TestGameFactory:
         # Проверяем, что поле заполнено начальными значениями
         assert not game._game_board.has_empty_cells()
     
+    def test_create_random_game(self):
+        """Тест случайной игры: без комбинаций, с ходами, воспроизводима по seed."""
+        game = SimpleGameFactory.create_random_game(seed=123, min_swaps=2)
+        board = game._game_board._board
+        assert not game._game_board.has_empty_cells()
+        assert game._game_board.find_combination_mask().is_empty
+        assert len(list(iter_swaps_raw(board.to_raw()))) >= 2
+
+        same_game = SimpleGameFactory.create_random_game(seed=123, min_swaps=2)
+        assert same_game._game_board._board.to_raw() == board.to_raw()
+        assert str(same_game._game_board._chest) == str(game._game_board._chest)
+
     def test_create_test_game(self):
         """Тест создания тестовой игры."""
         game = SimpleGameFactory.create_test_game()
@@ -96,4 +153,108 @@ class TestGameFactory:
         
         # Сравниваем типы компонентов
         assert type(game._game_board) == type(regular_game._game_board)
-        assert type(game._game_board._board) == type(regular_game._game_board._board)
\ No newline at end of file
+        assert type(game._game_board._board) == type(regular_game._game_board._board)
+    def test_move_result(self, capsys):
+        """Тест итога хода: игра ничего не печатает, шаги получает слушатель."""
+        game = SimpleGameFactory.create_test_game()
+        steps = []
+        game.set_step_listener(lambda step, board: steps.append(step))
+        rc1, rc2 = game.hints()[0]
+        result = game.smart_swap_move(rc1, rc2)
+        assert game.is_OK
+        assert result is game.last_result
+        assert result.cascade_rounds >= 1
+        assert result.score_delta == game.scores == GameBoard.SCORES_PER_STONE.value * len(result.erased)
+        assert steps[:2] == ["drop", "erase"]
+        assert capsys.readouterr().out == ""
+
+        game._game_board._chest.add_bonus(Bonus.ROW)
+        result = game.erase_row_move(RC(RowInt(0), ColInt(0)))
+        assert game.is_OK
+        assert result.score_delta == GameBoard.BONUS_SCORES.value + \
+            GameBoard.SCORES_PER_STONE.value * len(result.erased)
+        assert {(0, col) for col in range(8)} <= set(result.erased)
+        assert capsys.readouterr().out == ""
+
+    def test_process_outside_move(self):
+        """Тест: каскад вне хода не попадает в итог следующего хода."""
+        game = SimpleGameFactory.create_test_game()
+        game_board = game._game_board
+        game_board._board.swap(*game.hints()[0])
+        game_board.process()
+        assert game.scores > 0
+        assert game_board._move_erased == [] and game_board._move_rounds == 0
+        result = game.smart_swap_move(*game.hints()[0])
+        assert result.score_delta == GameBoard.SCORES_PER_STONE.value * len(result.erased)
+
+    def test_failed_bonus_move_rolls_back(self):
+        """Тест отката: неудачный шаг посреди хода не тратит бонус и не меняет поле."""
+        game = SimpleGameFactory.create_test_game()
+        chest = game._game_board._chest
+        chest.add_bonus(Bonus.SWAP)
+        count = chest.get_bonus_count(Bonus.SWAP)
+        # обмен камня с пустой ячейкой некорректен -- но бонус уже списан use_bonus
+        game._game_board._board.erase_mask(Mask({RC(RowInt(7), ColInt(7))}))
+        state = game.to_state()
+        game.swap_bonus_move(RC(RowInt(0), ColInt(0)), RC(RowInt(7), ColInt(7)))
+        assert game.is_ERR
+        assert chest.get_bonus_count(Bonus.SWAP) == count
+        assert game._game_board._statistics.get_used_bonus_count(Bonus.SWAP) == 0
+        assert game.to_state() == state
+        assert not game._game_board.in_move
+
+    def test_post_failure_rolls_back(self, monkeypatch):
+        """Тест отката: нарушенное пост-условие после части каскада возвращает состояние хода."""
+        game = SimpleGameFactory.create_test_game()
+        game._game_board._chest.add_bonus(Bonus.ROW)
+        state = game.to_state()
+        original_process = GameBoard.process
+
+        def broken_process(game_board):
+            original_process(game_board)
+            game_board.check_post(False, "сломанный каскад")
+        monkeypatch.setattr(GameBoard, "process", broken_process)
+        game.erase_row_move(RC(RowInt(0), ColInt(0)))
+        assert game.is_BROKEN
+        assert game.to_state() == state
+        # журнал хода закрыт, следующий ход идет как обычно
+        monkeypatch.setattr(GameBoard, "process", original_process)
+        result = game.erase_row_move(RC(RowInt(0), ColInt(0)))
+        assert game.is_OK and result.score_delta > 0
+
+
+class TestRollout:
+    """Тесты оценки ходов случайными партиями."""
+
+    def setup_method(self):
+        self.game = SimpleGameFactory.create_random_game(seed=5)
+        self.game._game_board._chest.add_bonus(Bonus.ROW)
+        self.game._game_board._chest.add_bonus(Bonus.SHUFFLE)
+        self.moves = [move for move in self.game.legal_moves() if move.bonus in (Bonus.ROW, Bonus.SHUFFLE)][-2:]
+
+    def test_state(self):
+        """Тест сырого состояния: восстановленная игра совпадает с исходной."""
+        copy = SimpleGameFactory.create_from_state(self.game.to_state())
+        assert copy.to_state() == self.game.to_state()
+        assert str(copy) == str(self.game)
+
+    def test_play(self):
+        """Тест хода из перечня: очки совпадают с предсказанием для немедленного стирания."""
+        move = next(move for move in self.moves if move.bonus == Bonus.ROW)
+        self.game.play(move)
+        assert self.game.is_OK
+        assert self.game.scores >= move.score_delta
+
+    def test_evaluate(self, capsys):
+        """Тест оценщика: без печати, воспроизводимо, одинаково в одном и нескольких процессах."""
+        serial = RolloutEvaluator(rollouts=2, horizon=1, workers=1, seed=3).evaluate(self.game, self.moves)
+        assert capsys.readouterr().out == ""
+        assert [estimate.samples for estimate in serial] == [2, 2]
+        assert all(estimate.low <= estimate.mean <= estimate.high for estimate in serial)
+        assert serial[0].mean >= serial[1].mean
+        again = RolloutEvaluator(rollouts=2, horizon=1, workers=1, seed=3).evaluate(self.game, self.moves)
+        assert again == serial
+        parallel = RolloutEvaluator(rollouts=2, horizon=1, workers=2, seed=3).evaluate(self.game, self.moves)
+        assert parallel == serial
+        # исходная игра не изменилась
+        assert self.game.scores == 0
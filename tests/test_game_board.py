@@ -3,8 +3,8 @@ from unittest.mock import Mock, patch
 from copy import deepcopy
 
 from base import PositiveInt, Stone, NonStoneValues, Bonus, RC, RowInt, ColInt, MAIN_RECT
-from cells import BonusChest, Statistics
-from combinations import Mask
+from cells import BonusChest, Statistics, STONES, STONE_CODES
+from combinations import Mask, has_line, iter_swaps_raw, longest_combination_raw, combination_at_raw
 from game_board import Board, GameBoard
 
 
@@ -40,7 +40,55 @@ class TestBoard:
         assert rc1 in mask
         assert rc2 in mask
         assert len(mask) >= 2
-    
+
+    def test_stone_index(self):
+        """Тест индекса камней: поиск и счетчики обновляются при каждом изменении."""
+        self.board.from_raw(["ABCDABCD"] * 8)
+        assert self.board.stone_count(Stone.A) == 16
+        assert self.board.stone_count(NonStoneValues.EMPTY) == 0
+        assert len(self.board.find_by_value(Stone.E)) == 0
+
+        rc1 = RC(RowInt(0), ColInt(0))  # A
+        rc2 = RC(RowInt(0), ColInt(1))  # B
+        self.board.swap(rc1, rc2)
+        assert rc1 in self.board.find_by_value(Stone.B)
+        assert rc2 in self.board.find_by_value(Stone.A)
+        assert rc1 not in self.board.find_by_value(Stone.A)
+
+        self.board.erase_mask(Mask({rc1}))
+        assert self.board.stone_count(Stone.B) == 15
+        assert self.board.stone_count(NonStoneValues.EMPTY) == 1
+
+        histogram = self.board.stone_histogram()
+        assert histogram[Stone.A] == 16
+        assert histogram[Stone.B] == 15
+        assert sum(histogram.values()) == 63
+
+        self.board.reset()
+        assert self.board.stone_count(NonStoneValues.EMPTY) == 64
+        assert self.board.find_by_value(Stone.A).is_empty
+
+    def test_shuffle_playable(self):
+        """Тест перемешивания без готовых комбинаций и с хотя бы одним ходом."""
+        self.board.from_raw(["AAAABBBB", "CCCCDDDD", "EEEEAAAA", "BBBBCCCC"] * 2)
+        histogram_before = self.board.stone_histogram()
+        self.board.shuffle_playable()
+
+        assert self.board.is_OK
+        assert 1 <= self.board.last_shuffle_attempts <= Board.SHUFFLE_MAX_ATTEMPTS
+        assert self.board.stone_histogram() == histogram_before
+        grid = self.board.to_raw()
+        assert not has_line(grid)
+        assert next(iter_swaps_raw(grid), None) is not None
+
+    def test_shuffle_playable_impossible(self):
+        """Тест перемешивания, когда играбельной перестановки не существует."""
+        self.board.from_raw(["AAAAAAAA"] * 8)
+        self.board.shuffle_playable(max_attempts=3)
+        assert self.board.is_WARN
+        assert self.board.last_shuffle_attempts == 3
+        assert self.board.stone_count(Stone.A) == 64
+
     def test_cells_are_equal(self):
         """Тест проверки равенства ячеек в маске."""
         # Создаем маску с одинаковыми значениями
@@ -103,6 +151,50 @@ class TestBoard:
         assert len(new_non_empty_mask) == len(non_empty_mask) + 1
         assert rc in new_non_empty_mask
     
+    def test_region_cache(self):
+        """Тест кэша областей: одна версия поля -- одно представление, изменение -- новое."""
+        version = self.board.version
+        empty_mask = self.board.empty_cells
+        assert self.board.empty_cells is empty_mask
+        assert self.board.version == version
+
+        rc = RC(RowInt(3), ColInt(3))
+        self.board._update_rc(rc, Stone.C)
+        assert self.board.version > version
+        assert self.board.empty_cells is not empty_mask
+        # старое представление -- снимок своей версии
+        assert rc in empty_mask
+        assert rc not in self.board.empty_cells
+        assert list(self.board.non_empty_cells) == [rc]
+
+    def _runs_by_definition(self, board, row, col):
+        """Серии по определению: идем от ячейки в каждую сторону, пока камень тот же."""
+        grid = board.to_raw()
+        value = grid[row][col]
+        if value == NonStoneValues.EMPTY:
+            return (0, 0, 0, 0)
+        ans = []
+        for d_row, d_col in ((0, -1), (0, 1), (-1, 0), (1, 0)):
+            length, r, c = 0, row + d_row, col + d_col
+            while 0 <= r < len(grid) and 0 <= c < len(grid[0]) and grid[r][c] == value:
+                length, r, c = length + 1, r + d_row, c + d_col
+            ans.append(length)
+        return tuple(ans)
+
+    def test_run_lengths(self):
+        """Тест серий: после обмена, стирания, падения и развилки совпадают с определением."""
+        board = Board()
+        board.from_raw(["AAAB.CDE", "BCDEABCD", "CDEABCDE", "DEACBDEA"] * 2)
+        assert board.run_lengths(RC(RowInt(0), ColInt(1))) == (1, 1, 0, 0)
+        fork = board.fork()
+        board.swap(RC(RowInt(1), ColInt(0)), RC(RowInt(1), ColInt(1)))
+        board.erase_mask(Mask({RC(RowInt(0), ColInt(0)), RC(RowInt(2), ColInt(2))}))
+        board.drop_all()
+        for target in (board, fork):
+            for rc in target.rect:
+                row, col = rc.raw_repr
+                assert target.run_lengths(rc) == self._runs_by_definition(target, row, col)
+
     def test_swap(self):
         """Тест обмена элементов."""
         rc1 = RC(RowInt(0), ColInt(0))
@@ -140,7 +232,41 @@ class TestBoard:
         
         assert self.board._cells[rc1] == Stone.A
         assert self.board._cells[rc2] == Stone.A
-    
+        assert self.board.stone_count(Stone.A) == 2
+        assert self.board.run_lengths(rc1) == (0, 1, 0, 0)
+
+    def test_copy_region(self):
+        """Тест копирования области из другого поля: ячейки, индекс и серии."""
+        other = Board()
+        other.from_raw(["ABCDEFGH"] * 8)
+        row = {RC(RowInt(2), ColInt(col)) for col in range(8)}
+        self.board.copy_region(other, Mask(row))
+        assert "".join(self.board.to_raw()[2]) == "ABCDEFGH"
+        assert self.board.stone_count(Stone.A) == 1
+        assert self.board.stone_count(NonStoneValues.EMPTY) == 56
+        assert self.board.run_lengths(RC(RowInt(2), ColInt(0))) == (0, 0, 0, 0)
+    
+    def test_occupancy(self):
+        """Тест счетчика пустых ячеек и высот столбцов после стирания, падения, обмена и заполнения."""
+        self.board.from_raw(["ABCDEFGH"] * 8)
+        assert self.board.empty_count == 0
+        assert self.board.column_heights == (8,) * 8
+        holes = {RC(RowInt(1), ColInt(0)), RC(RowInt(5), ColInt(0)), RC(RowInt(7), ColInt(3))}
+        self.board.erase_mask(Mask(holes))
+        assert self.board.empty_count == 3 == len(self.board.empty_cells)
+        assert self.board.column_heights[:4] == (1, 8, 8, 7)
+        assert not self.board.is_column_settled(0) and self.board.is_column_settled(3)
+        self.board.swap(RC(RowInt(0), ColInt(0)), RC(RowInt(1), ColInt(0)))
+        assert self.board.column_heights[0] == 0
+        fork = self.board.fork()
+        self.board.drop_all()
+        assert self.board.column_heights[0] == 6
+        assert all(self.board.is_column_settled(col) for col in range(8))
+        assert fork.column_heights[0] == 0
+        self.board.fill_first_empty_layer_random()
+        assert self.board.empty_count == 1
+        assert self.board.column_heights[:4] == (7, 8, 8, 8)
+
     def test_drop_column(self):
         """Тест сдвига элементов в столбце."""
         # Заполним столбец с пропуском
@@ -502,6 +628,170 @@ class TestGameBoard:
         # Проверяем, что состояние сохранилось (очки не изменились)
         assert game_board._statistics.get_scores() == current_scores + game_board.BONUS_SCORES
     
+    def _brute_force_swaps(self, game_board):
+        """Ходы обменом по определению: обмен на копии поля и поиск линии на ней."""
+        ans = set()
+        for rc1 in game_board._board.rect:
+            for rc2 in game_board._board.rect:
+                if rc1 < rc2 and game_board.is_swap_correct(rc1, rc2) and \
+                        abs(rc1.row.value - rc2.row.value) + abs(rc1.col.value - rc2.col.value) == 1:
+                    fork = game_board.fork()
+                    fork._board.swap(rc1, rc2)
+                    if has_line(fork._board.to_raw()):
+                        ans.add((rc1.raw_repr, rc2.raw_repr))
+        return ans
+
+    @pytest.mark.parametrize("rows", [
+        ["ABABABAB", "BABABABA", "CDCDCDCD", "DCDCDCDC"] * 2,
+        ["AAAB.CDE", "BCDEABCD", "CDEABCDE", "DEACBDEA"] * 2,
+        ["ABCDEFGH", "CDEFGHAB"] * 4,
+    ])
+    def test_line_means_combination(self, rows):
+        """Комбинация на поле есть тогда и только тогда, когда есть линия из трех."""
+        board = Board()
+        board.from_raw(rows)
+        game_board = GameBoard(board, BonusChest(), Statistics())
+        assert has_line(board.to_raw()) == (not game_board.find_combination_mask().is_empty)
+
+    @pytest.mark.parametrize("rows", [
+        ["AAAB.CDE", "ABCDABCD", "ABAABCDE", "DEACBDEA", "AAAAAEEE", "BBAAA.EE", "CCACCCEE", "DEAEEEEE"],
+        ["ABCDEFGH", "CDEFGHAB"] * 4,
+    ])
+    def test_combination_from_runs(self, rows):
+        """Тест комбинаций по сериям: совпадают с поиском по определению на сыром поле."""
+        board = Board()
+        board.from_raw(rows)
+        game_board = GameBoard(board, BonusChest(), Statistics())
+        grid = board.to_raw()
+        for rc in board.rect:
+            row, col = rc.raw_repr
+            expected = set(combination_at_raw(grid, row, col))
+            assert {cell.raw_repr for cell in game_board.get_rc_combination_mask(rc)} == expected
+        assert len(game_board.find_combination_mask()) == len(longest_combination_raw(grid))
+
+    @pytest.mark.parametrize("rows", [
+        ["ABABABAB", "BABABABA", "CDCDCDCD", "DCDCDCDC"] * 2,
+        ["AAAB.CDE", "BCDEABCD", "CDEABCDE", "DEACBDEA"] * 2,
+    ])
+    def test_legal_swaps(self, rows):
+        """Тест кэша ходов обменом: совпадает с проверкой по определению."""
+        board = Board()
+        board.from_raw(rows)
+        game_board = GameBoard(board, BonusChest(), Statistics())
+        legal = {(rc1.raw_repr, rc2.raw_repr) for rc1, rc2 in game_board.legal_swaps}
+        assert legal == self._brute_force_swaps(game_board)
+        assert game_board.has_smart_swap == bool(legal)
+        rows, cols = game_board.legal_swap_arrays
+        assert rows.is_OK and cols.is_OK
+        pairs = zip(rows.view(2).tolist(), cols.view(2).tolist())
+        assert {((r1, c1), (r2, c2)) for (r1, r2), (c1, c2) in pairs} == legal
+
+    def test_legal_swaps_cache(self):
+        """Тест кэша ходов: пересчитывается только после изменения поля."""
+        board = Board()
+        board.from_raw(["ABABABAB", "BABABABA"] * 4)
+        game_board = GameBoard(board, BonusChest(), Statistics())
+        swaps, _ = game_board._swaps_raw()
+        assert game_board._swaps_raw()[0] is swaps
+        rc1, rc2 = game_board.find_smart_swap()
+        assert game_board.is_smart_swap_correct(rc1, rc2)
+        assert game_board.is_smart_swap_correct(rc2, rc1)
+
+        board.from_raw(["ABCDEFGH", "CDEFGHAB"] * 4)
+        assert not game_board.has_smart_swap
+        assert game_board.legal_swaps == []
+
+    def test_legal_moves_swaps(self):
+        """Тест перечня ходов: размер стирания обменом совпадает с настоящим ходом."""
+        board = Board()
+        board.from_raw(["AAAB.CDE", "BCDEABCD", "CDEABCDE", "DEACBDEA"] * 2)
+        game_board = GameBoard(board, BonusChest(), Statistics())
+        moves = game_board.legal_moves()
+        assert {move.cells for move in moves} == {(rc1.raw_repr, rc2.raw_repr) for rc1, rc2 in game_board.legal_swaps}
+        for i, move in enumerate(moves):
+            assert move.bonus is None
+            (r1, c1), (r2, c2) = move.cells
+            fork = game_board.fork()
+            fork._board.swap(RC(RowInt(r1), ColInt(c1)), RC(RowInt(r2), ColInt(c2)))
+            assert move.erase_size == len(longest_combination_raw(fork._board.to_raw()))
+            if i < 2:  # полный поиск по GameBoard медленный, сверяем с ним выборочно
+                assert move.erase_size == len(fork.find_combination_mask())
+            assert move.score_delta == game_board.SCORES_PER_STONE.value * move.erase_size
+
+    def test_legal_moves_bonuses(self):
+        """Тест перечня ходов: бонусы только из сундука, очки по числу стираемых ячеек."""
+        board = Board()
+        board.from_raw(["ABCDEFGH", "CDEFGHAB"] * 4)
+        chest = BonusChest()
+        for bonus in (Bonus.ROW, Bonus.CROSS, Bonus.BRUSH, Bonus.SWAP, Bonus.SHUFFLE):
+            chest.add_bonus(bonus)
+        game_board = GameBoard(board, chest, Statistics())
+        moves = game_board.legal_moves()
+        by_bonus = {}
+        for move in moves:
+            by_bonus.setdefault(move.bonus, []).append(move)
+        assert set(by_bonus) == {Bonus.ROW, Bonus.CROSS, Bonus.BRUSH, Bonus.SWAP, Bonus.SHUFFLE}
+        assert len(by_bonus[Bonus.ROW]) == 8 and all(m.erase_size == 8 for m in by_bonus[Bonus.ROW])
+        assert len(by_bonus[Bonus.CROSS]) == 64 and all(m.erase_size == 15 for m in by_bonus[Bonus.CROSS])
+        assert {m.erase_size for m in by_bonus[Bonus.BRUSH]} == {8}
+        assert len(by_bonus[Bonus.BRUSH]) == 8
+        bonus_scores = game_board.BONUS_SCORES.value
+        assert by_bonus[Bonus.SHUFFLE][0].score_delta == bonus_scores
+        # SWAP -- все пары непустых ячеек, как принимает swap; с фильтром -- только стирающие сразу
+        assert len(by_bonus[Bonus.SWAP]) == 64 * 63 // 2
+        for move in by_bonus[Bonus.SWAP]:
+            assert move.score_delta == bonus_scores + game_board.SCORES_PER_STONE.value * move.erase_size
+        erasing = [move for move in by_bonus[Bonus.SWAP] if move.erase_size > 0]
+        assert erasing and all(move.erase_size >= 3 for move in erasing)
+        filtered = [move for move in game_board.legal_moves(swap_bonus_filter=True) if move.bonus == Bonus.SWAP]
+        assert filtered == erasing
+
+    def test_fork(self):
+        """Тест развилки: изменения копии не видны в оригинале и наоборот."""
+        board = Board()
+        board.from_raw(["ABCDABCD"] * 8)
+        chest = BonusChest()
+        chest.add_bonus(Bonus.ROW)
+        game_board = GameBoard(board, chest, Statistics())
+
+        fork = game_board.fork()
+        rc = RC(RowInt(0), ColInt(0))
+        fork._board.erase_mask(Mask({rc}))
+        fork.use_bonus(Bonus.ROW)
+
+        assert not game_board._board.is_empty_cell(rc)
+        assert game_board._board.stone_count(Stone.A) == 16
+        assert fork._board.stone_count(Stone.A) == 15
+        assert game_board.can_use_bonus(Bonus.ROW)
+        assert not fork.can_use_bonus(Bonus.ROW)
+        assert game_board._statistics.get_scores() == 0
+        assert fork._statistics.get_scores() == game_board.BONUS_SCORES
+        assert game_board._statistics.get_used_bonus_count(Bonus.ROW) == 0
+
+    def test_buffer_views(self):
+        """Тест представлений поля: взятые до загрузки и ходов, они видят текущее поле без копий."""
+        board = Board()
+        game_board = GameBoard(board, BonusChest(), Statistics())
+        codes, planes = game_board.codes_view(), game_board.one_hot_view()
+        assert board.codes_view() is codes and codes.readonly
+
+        def expected_codes():
+            return [[STONE_CODES[value] for value in row] for row in board.to_raw()]
+
+        board.from_raw(["ABCDABCD"] * 8)
+        assert codes.tolist() == expected_codes()
+        board.generate_playable(seed=5)
+        assert codes.tolist() == expected_codes()
+        # неверные строки -- поле и представление не меняются
+        board.from_raw(["AB"] * 8)
+        assert board.is_ERR and codes.tolist() == expected_codes()
+
+        game_board.smart_swap(*game_board.find_smart_swap())
+        game_board.process()
+        assert codes.tolist() == expected_codes()
+        assert planes.tolist() == [[[int(value == stone) for value in row] for row in board.to_raw()]
+                                   for stone in STONES]
+
     def test_erase_mask(self):
         """Тест удаления маски с начислением очков."""
         rc1 = RC(RowInt(0), ColInt(0))
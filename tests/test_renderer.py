@@ -0,0 +1,47 @@
+import io
+from renderer import BoardRenderer
+
+
+class TestBoardRenderer:
+    """Тесты вывода кадров в консоль."""
+
+    def test_full_frames_when_not_tty(self):
+        """Не терминал: каждый кадр выводится целиком, без управляющих последовательностей."""
+        stream = io.StringIO()
+        renderer = BoardRenderer(stream)
+        assert not renderer.is_incremental
+        renderer.render("a\nb")
+        renderer.render("a\nc\n")
+        assert stream.getvalue() == "a\nb\na\nc\n"
+
+    def test_incremental_rows(self):
+        """Терминал: первый кадр целиком, дальше -- только изменившиеся строки."""
+        stream = io.StringIO()
+        renderer = BoardRenderer(stream, incremental=True)
+        renderer.render("title\nrow 1\nrow 0")
+        first = stream.getvalue()
+        assert BoardRenderer.CLEAR_SCREEN in first and "row 1" in first
+
+        stream.seek(0)
+        stream.truncate()
+        renderer.render("title\nrow X\nrow 0")
+        update = stream.getvalue()
+        assert update == (BoardRenderer.SAVE_CURSOR + "\x1b[2;1H" + BoardRenderer.CLEAR_LINE + "row X"
+                          + BoardRenderer.RESTORE_CURSOR)
+
+        stream.seek(0)
+        stream.truncate()
+        renderer.render("title\nrow X\nrow 0")
+        assert stream.getvalue() == ""
+        assert renderer.last_frame == ["title", "row X", "row 0"]
+
+    def test_frame_size_change(self):
+        """Другое число строк или сброс -- снова полный кадр."""
+        stream = io.StringIO()
+        renderer = BoardRenderer(stream, incremental=True)
+        renderer.render("a\nb")
+        renderer.render("a\nb\nc")
+        assert stream.getvalue().count(BoardRenderer.CLEAR_SCREEN) == 2
+        renderer.close()
+        assert renderer.last_frame == []
+        assert stream.getvalue().endswith("\n")
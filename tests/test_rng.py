@@ -0,0 +1,65 @@
+from base import Stone, RC, RowInt, ColInt
+from combinations import Mask
+from game_board import Board
+from rng import GameRng
+from simple_game import SimpleGameFactory
+
+
+class TestGameRng:
+    """Тесты случайности игры."""
+
+    def test_same_seed(self):
+        """Одинаковое зерно -- одинаковые камни; пачка совпадает с выдачей по одному."""
+        rng1, rng2 = GameRng(5), GameRng(5)
+        batch = rng1.stones(GameRng.STONE_BUFFER_SIZE + 10)
+        assert batch == [rng2.next_stone() for _ in range(GameRng.STONE_BUFFER_SIZE + 10)]
+        assert all(isinstance(stone, Stone) for stone in batch)
+        assert set(batch) == set(Stone)
+
+    def test_independent_streams(self):
+        """Расход одного потока не сдвигает другие."""
+        rng1, rng2 = GameRng(7), GameRng(7)
+        rng1.shuffle.random()
+        rng1.bonus.random()
+        assert rng1.stones(20) == rng2.stones(20)
+
+    def test_fork(self):
+        """Развилка повторяет будущее оригинала и не влияет на него."""
+        rng = GameRng(9)
+        rng.stones(3)
+        fork = rng.fork()
+        assert fork.stones(50) == rng.stones(50)
+
+    def test_fork_shares_streams(self):
+        """Развилка не копирует потоки: поток копируется при первом обращении, остальные остаются общими."""
+        board = Board(rng=GameRng(3))
+        fork = board.fork()
+        streams = board.rng._streams
+        assert all(fork.rng._streams[name] is streams[name] for name in GameRng.STREAMS)
+        expected = GameRng(3).shuffle.random()
+        assert fork.rng.shuffle.random() == expected
+        assert fork.rng._streams["shuffle"] is not streams["shuffle"]
+        assert fork.rng._streams["refill"] is streams["refill"]
+        assert board.rng.shuffle.random() == expected
+
+    def test_board_refill(self):
+        """Поля с одинаковым зерном пополняются одинаково."""
+        boards = []
+        for i in range(2):
+            board = Board(rng=GameRng(11))
+            board.from_raw(["ABCDEFGH"] * 8)
+            board.erase_mask(Mask({RC(RowInt(7), ColInt(col)) for col in range(8)}))
+            board.fill_first_empty_layer_random()
+            boards.append(board.to_raw())
+        assert boards[0] == boards[1]
+        assert "." not in boards[0][7]
+
+    def test_start_board_stream(self):
+        """Начальное поле берется из потока layout: поток перемешивания игры его не повторяет."""
+        game = SimpleGameFactory.create_random_game(seed=13)
+        rng = game._game_board._board.rng
+        fresh = GameRng(13)
+        assert rng.shuffle.getstate() == fresh.shuffle.getstate()
+        assert rng.layout.getstate() != fresh.layout.getstate()
+        assert fresh.shuffle.random() != fresh.layout.random()
+        assert SimpleGameFactory.create_random_game(seed=13).to_state() == game.to_state()
@@ -0,0 +1,119 @@
+import random
+import pytest
+import vector_engine
+from base import Bonus
+from cells import BonusChest, Statistics
+from game_board import Board, GameBoard
+from simple_game import SimpleGameFactory
+from vector_engine import VectorEngine
+
+
+def _game_board(rows):
+    board = Board()
+    board.from_raw(rows)
+    return GameBoard(board, BonusChest(), Statistics())
+
+
+def _random_rows(rng, stones="ABC", empty=0.0):
+    return ["".join("." if rng.random() < empty else rng.choice(stones) for _ in range(8)) for _ in range(8)]
+
+
+def test_requires_numpy(monkeypatch):
+    """Тест: без numpy модуль импортируется, а движок не создается."""
+    monkeypatch.setattr(vector_engine, "np", None)
+    with pytest.raises(ImportError):
+        VectorEngine(1)
+
+
+class TestVectorEngine:
+    """Тесты векторного движка: те же правила, что у GameBoard."""
+
+    def setup_method(self):
+        pytest.importorskip("numpy")
+        self.rng = random.Random(7)
+
+    def _engine(self, rows_list):
+        engine = VectorEngine(len(rows_list), seed=1)
+        for i, rows in enumerate(rows_list):
+            engine.load_state(i, (rows, (0,) * len(Bonus), 0))
+        return engine
+
+    def test_find_combinations(self):
+        """Тест: найденная комбинация совпадает с GameBoard.find_combination_mask."""
+        rows_list = [_random_rows(self.rng) for _ in range(40)]
+        found, cells = self._engine(rows_list).find_combinations()
+        for i, rows in enumerate(rows_list):
+            expected = {rc.raw_repr for rc in _game_board(rows).find_combination_mask()}
+            assert found[i] == bool(expected)
+            assert {tuple(rc) for rc in zip(*cells[i].nonzero())} == expected
+
+    def test_drop(self):
+        """Тест: падение совпадает с Board.drop_all."""
+        rows_list = [_random_rows(self.rng, "ABCDEFGH", empty=0.3) for _ in range(10)]
+        engine = self._engine(rows_list)
+        engine.drop()
+        for i, rows in enumerate(rows_list):
+            board = Board()
+            board.from_raw(rows)
+            board.drop_all()
+            assert engine.to_state(i)[0] == tuple(board.to_raw())
+
+    def test_legal_swaps(self):
+        """Тест: ходы обменом совпадают с GameBoard.legal_swaps."""
+        games = [SimpleGameFactory.create_random_game(seed=seed) for seed in range(20)]
+        engine = VectorEngine(len(games))
+        for i, game in enumerate(games):
+            engine.load_state(i, game.to_state())
+        horizontal, vertical = engine.legal_swaps()
+        for i, game in enumerate(games):
+            expected = {(rc1.raw_repr, rc2.raw_repr) for rc1, rc2 in game.hints()}
+            actual = {((r, c), (r, c + 1)) for r, c in zip(*horizontal[i].nonzero())} | \
+                {((r, c), (r + 1, c)) for r, c in zip(*vertical[i].nonzero())}
+            assert actual == expected
+        assert list(engine.is_gameover()) == [game.is_gameover for game in games]
+
+    def test_moves(self):
+        """Тест ходов: некорректные не применяются, после хода поле устойчиво, очки и сундук -- как у игры."""
+        games = [SimpleGameFactory.create_random_game(seed=seed) for seed in range(6)]
+        engine = VectorEngine(len(games), seed=3)
+        for i, game in enumerate(games):
+            engine.load_state(i, game.to_state())
+        hints = [game.hints()[0] for game in games]
+        r1, c1 = zip(*(rc1.raw_repr for rc1, _ in hints))
+        r2, c2 = zip(*(rc2.raw_repr for _, rc2 in hints))
+        games_mask = [True, True, True, False, True, True]
+        applied = engine.swap_move(r1, c1, r2, c2, games=games_mask)
+        assert list(applied) == games_mask
+        assert (engine.scores[applied] >= 3 * GameBoard.SCORES_PER_STONE.value).all()
+        assert engine.scores[3] == 0 and (engine.rounds[applied] >= 1).all()
+        found, _ = engine.find_combinations()
+        assert not found.any() and (engine.boards != VectorEngine.EMPTY).all()
+        # обмен несоседних ячеек -- не ход
+        assert not engine.swap_move([0] * 6, [0] * 6, [2] * 6, [2] * 6).any()
+        # ячейки за пределами поля -- не ход, даже если соседний обмен в пределах поля допустим
+        # (раньше (-1, c)/(0, c) проходил вместо (0, c)/(1, c), а строка -1 попадала на верхнюю)
+        engine.load_state(0, (("ABBCDEFG", "BDEFGHAC") + ("FGHABCDE", "HABCDEFG") * 3, (0,) * len(Bonus), 0))
+        assert engine.legal_swaps()[1][0, 0, 0]
+        boards = engine.boards.copy()
+        assert not engine.swap_move(-1, 0, 0, 0).any()
+        assert not engine.swap_move(7, 0, 8, 0).any()
+        assert (engine.boards == boards).all()
+
+        engine.chests[:] = 0
+        engine.chests[:2, VectorEngine.BONUSES.index(Bonus.ROW)] = 1
+        before = engine.scores.copy()
+        applied = engine.bonus_move(Bonus.ROW, rows=[1] * 6, cols=[0] * 6)
+        assert list(applied) == [True, True, False, False, False, False]
+        delta = engine.scores - before
+        assert (delta[:2] >= GameBoard.BONUS_SCORES.value + 8 * GameBoard.SCORES_PER_STONE.value).all()
+        assert (delta[2:] == 0).all() and (engine.chests == 0).all()
+        engine.chests[:, VectorEngine.BONUSES.index(Bonus.CROSS)] = 1
+        assert not engine.bonus_move(Bonus.CROSS, rows=[-1, 8, 0, 0, 0, 0], cols=[0, 0, -1, 8, -9, 99]).any()
+        assert (engine.chests[:, VectorEngine.BONUSES.index(Bonus.CROSS)] == 1).all()
+        engine.chests[:] = 0
+
+        engine.chests[:, VectorEngine.BONUSES.index(Bonus.SHUFFLE)] = 1
+        applied = engine.bonus_move(Bonus.SHUFFLE)
+        assert applied.all()
+        found, _ = engine.find_combinations()
+        assert not found.any() and engine.has_smart_swap().all()
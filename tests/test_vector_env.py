@@ -0,0 +1,89 @@
+import pytest
+from base import Bonus, RC, RowInt, ColInt
+from simple_game import SimpleGameFactory
+
+np = pytest.importorskip("numpy")
+from vector_env import VectorEnv
+from vector_engine import VectorEngine
+
+
+class TestVectorEnv:
+    """Тесты пачки игр как среды."""
+
+    def setup_method(self):
+        self.seeds = [1, 2, 3, 4]
+        self.env = VectorEnv(len(self.seeds), seed=0)
+        self.first = self.env.reset(self.seeds)
+
+    def _swap_action(self, rc1, rc2):
+        (r1, c1), (r2, c2) = sorted((rc1.raw_repr, rc2.raw_repr))
+        start, _ = self.env.action_slices["SWAP_H" if r1 == r2 else "SWAP_V"]
+        return start + (r1 * 7 + c1 if r1 == r2 else r1 * 8 + c1)
+
+    def test_reset(self):
+        """Тест: игры -- как create_random_game, наблюдения и маски согласованы с полем."""
+        for i, seed in enumerate(self.seeds):
+            game = SimpleGameFactory.create_random_game(seed=seed)
+            assert self.env.engine.to_state(i) == game.to_state()
+            legal_swaps = {self._swap_action(rc1, rc2) for rc1, rc2 in game.hints()}
+            start, end = self.env.action_slices["SWAP_V"]
+            assert set(np.flatnonzero(self.first.legal[i, :end])) == legal_swaps
+            assert self.first.dones[i] == game.is_gameover
+        assert (self.first.observations.sum(axis=1) == 1).all()
+        assert (self.first.observations.argmax(axis=1) + 1 == self.env.engine.boards).all()
+        assert self.env.action_count == self.first.legal.shape[1]
+
+    def test_legal_matches_legal_moves(self):
+        """Тест: маска действий -- те же ходы, что GameBoard.legal_moves на том же поле."""
+        w = 8
+        for i, seed in enumerate(self.seeds):
+            game_board = SimpleGameFactory.create_random_game(seed=seed)._game_board
+            grid = game_board._board.to_raw()
+            expected = set()
+            for move in game_board.legal_moves():
+                cells = [row * w + col for row, col in move.cells]
+                if move.bonus is None:
+                    expected.add(self._swap_action(*(RC(RowInt(row), ColInt(col)) for row, col in move.cells)))
+                    continue
+                start, _ = self.env.action_slices[move.bonus.value]
+                if move.bonus == Bonus.SWAP:
+                    first, second = sorted(cells)
+                    index = first * (2 * w * w - first - 1) // 2 + second - first - 1
+                elif move.bonus == Bonus.BRUSH:
+                    row, col = move.cells[0]
+                    index = VectorEngine.STONES.index(grid[row][col])
+                elif move.bonus == Bonus.ROW:
+                    index = move.cells[0][0]
+                elif move.bonus in (Bonus.ALL, Bonus.SHUFFLE):
+                    index = 0
+                else:
+                    index = cells[0]
+                expected.add(start + index)
+            assert set(np.flatnonzero(self.first.legal[i])) == expected
+
+    def test_step(self):
+        """Тест шага: награда -- прирост счета, недопустимые действия ничего не меняют,
+        наблюдения -- тот же буфер без копий."""
+        games = [SimpleGameFactory.create_random_game(seed=seed) for seed in self.seeds]
+        swap = self._swap_action(*games[0].hints()[0])
+        engine = self.env.engine
+        engine.chests[:] = 0
+        engine.chests[1, VectorEngine.BONUSES.index(Bonus.CROSS)] = 1
+        engine.chests[2, VectorEngine.BONUSES.index(Bonus.SWAP)] = 1
+        # недопустимые номера действий -- пустой шаг, маски пересчитываются по новым сундукам
+        idle = self.env.step([-1] * 4)
+        assert not idle.rewards.any()
+        legal = idle.legal
+        cross = self.env.action_slices[Bonus.CROSS.value][0] + 3 * 8 + 4
+        pair = np.flatnonzero(legal[2, slice(*self.env.action_slices[Bonus.SWAP.value])])[0]
+        swap_bonus = self.env.action_slices[Bonus.SWAP.value][0] + pair
+        board3 = engine.boards[3].copy()
+        result = self.env.step([swap, cross, swap_bonus, cross])
+        assert result.observations is self.first.observations
+        assert result.rewards[0] >= 3 * VectorEngine.SCORES_PER_STONE.value
+        assert result.rewards[1] >= VectorEngine.BONUS_SCORES.value + 15 * VectorEngine.SCORES_PER_STONE.value
+        assert result.rewards[2] >= VectorEngine.BONUS_SCORES.value
+        assert result.rewards[3] == 0 and (engine.boards[3] == board3).all()
+        assert (result.rewards == engine.scores).all()
+        assert (engine.chests == 0).all()
+        assert not result.legal[:, self.env.action_slices[Bonus.ROW.value][0]:].any()